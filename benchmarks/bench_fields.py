@@ -0,0 +1,35 @@
+"""
+Measures schema generation time of synthetic documents with growing number of fields. Generation should scale
+linearly, i.e. time per field should stay roughly constant as the field count grows.
+
+Usage:
+    python benchmarks/bench_fields.py [--sizes 10 100 1000] [--repeat 20]
+"""
+import argparse
+import timeit
+
+from mongoengine_jsonschema import clear_schema_cache
+
+from models import make_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{"fields":>8} {"total (ms)":>12} {"per field (us)":>16}')
+    for size in args.sizes:
+        document = make_model(fields=size).document
+
+        def _generate():
+            clear_schema_cache()
+            document.json_schema()
+
+        seconds = min(timeit.repeat(_generate, number=1, repeat=args.repeat))
+        print(f'{size:>8} {seconds * 1e3:>12.3f} {seconds / size * 1e6:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Runs generation and validation benchmarks on synthetic models of different shapes and writes the results as a JSON
+baseline. A saved baseline can be compared with the current run to catch regressions, e.g. after upgrading a
+dependency.
+
+Measured per scenario:
+    generate_us        schema generation without the cache
+    cache_miss_us      `json_schema()` right after `clear_schema_cache()`
+    cache_hit_us       `json_schema()` of a cached schema
+    schema_bytes       size of the serialized schema, inline and with "$defs"
+    payload_valid      whether the generated payload passes validation
+    *_per_s            validated payloads per second, `jsonschema` and compiled validators
+
+Usage:
+    python benchmarks/bench_suite.py [--scenarios flat nested] [--save baseline.json] [--compare baseline.json]
+                                     [--threshold 0.2] [--repeat 5]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from importlib.metadata import version
+
+from mongoengine_jsonschema import clear_schema_cache
+
+from models import make_model
+
+BASELINE_FORMAT = 1
+
+SCENARIOS = {
+    'flat': {'fields': 20},
+    'wide': {'fields': 200},
+    'nested': {'fields': 10, 'depth': 3, 'fan_out': 2},
+    'geo': {'fields': 10, 'geo': True},
+    'inherited': {'fields': 10, 'inheritance': 4},
+    'mixed': {'fields': 20, 'depth': 2, 'fan_out': 2, 'geo': True, 'inheritance': 2},
+}
+
+
+def _best(func, number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def run_scenario(options: dict, repeat: int = 5) -> dict:
+    model = make_model(**options)
+    document, payload = model.document, model.payload
+
+    def _miss():
+        clear_schema_cache()
+        document.json_schema()
+
+    generate = _best(lambda: document._build_json_schema(True, False), 10, repeat)
+    cache_miss = _best(_miss, 10, repeat)
+    cache_hit = _best(document.json_schema, 10000, repeat)
+
+    json_validator = document.json_validator()
+    compiled_validator = document.compiled_validator()
+    number = max(10, int(0.05 / max(_best(lambda: json_validator.is_valid(payload), 1, 1), 1e-7)))
+
+    metrics = {
+        'payload_valid': json_validator.is_valid(payload),
+        'generate_us': generate * 1e6,
+        'cache_miss_us': cache_miss * 1e6,
+        'cache_hit_us': cache_hit * 1e6,
+        'schema_bytes': len(document.json_schema_bytes()),
+        'schema_defs_bytes': len(document.json_schema_bytes(use_defs=True)),
+        'jsonschema_per_s': 1 / _best(lambda: json_validator.is_valid(payload), number, repeat),
+        'compiled_per_s': 1 / _best(lambda: compiled_validator.is_valid(payload), number * 10, repeat),
+    }
+    return {metric: round(value, 3) if isinstance(value, float) else value for metric, value in metrics.items()}
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> list:
+    """
+    Returns (scenario, metric, baseline value, current value) of metrics that got worse by more than `threshold`.
+    Throughput metrics (`*_per_s`) regress when they decrease, all other metrics when they increase. Schema sizes are
+    deterministic, so any growth is reported, as is a payload that stopped being valid.
+    """
+
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get('results', {}).get(scenario, {}).get(metric)
+            if old is None:
+                continue
+            if metric == 'payload_valid':
+                worse = old and not value
+            elif metric.endswith('_per_s'):
+                worse = value < old * (1 - threshold)
+            elif metric.endswith('_bytes'):
+                worse = value > old
+            else:
+                worse = value > old * (1 + threshold)
+            if worse:
+                regressions.append((scenario, metric, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare results with a baseline written by --save')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown, defaults to 0.2')
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"scenario":>10} {"generate":>10} {"miss":>10} {"hit":>8} {"bytes":>9} {"jsonschema/s":>13} '
+          f'{"compiled/s":>11}')
+    for name in args.scenarios:
+        metrics = results[name] = run_scenario(SCENARIOS[name], args.repeat)
+        print(f'{name:>10} {metrics["generate_us"]:>8.0f}us {metrics["cache_miss_us"]:>8.0f}us '
+              f'{metrics["cache_hit_us"]:>6.2f}us {metrics["schema_bytes"]:>9} {metrics["jsonschema_per_s"]:>13,.0f} '
+              f'{metrics["compiled_per_s"]:>11,.0f}')
+
+    if args.save:
+        data = {
+            'format': BASELINE_FORMAT,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'packages': {package: version(package) for package in ('mongoengine', 'jsonschema')},
+            'scenarios': {name: SCENARIOS[name] for name in results},
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for scenario, metric, old, new in regressions:
+            print(f'regression: {scenario} {metric} {old} -> {new}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Compares validation time of the cached `jsonschema` validator with the validator compiled from document fields, on
+valid and invalid payloads of a synthetic document.
+
+Usage:
+    python benchmarks/bench_validation.py [--fields 20] [--number 1000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+from models import make_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fields', type=int, default=20)
+    parser.add_argument('--number', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    model = make_model(fields=args.fields)
+    validators = {'jsonschema': model.document.json_validator(), 'compiled': model.document.compiled_validator()}
+
+    print(f'{"validator":>12} {"payload":>8} {"per call (us)":>14}')
+    for payload_name, payload in (('valid', model.payload), ('invalid', model.invalid_payload)):
+        for name, validator in validators.items():
+            seconds = min(timeit.repeat(lambda: list(validator.iter_errors(payload)), number=args.number,
+                                        repeat=args.repeat))
+            print(f'{name:>12} {payload_name:>8} {seconds / args.number * 1e6:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic document models for benchmarks. `make_model()` builds a document class of given shape together with a
+payload that is valid against its schema and one where every value is invalid, so generation and validation can be
+measured on the same model.
+"""
+import itertools
+import typing
+from collections import namedtuple
+
+import mongoengine as me
+
+from mongoengine_jsonschema import JsonSchemaMixin
+
+Model = namedtuple('Model', ['document', 'payload', 'invalid_payload'])
+
+# (field factory, valid value, invalid value)
+SCALAR_FIELDS = [
+    (lambda: me.StringField(max_length=32, regex=r'^[a-z]+$'), 'abc', 1),
+    (lambda: me.IntField(min_value=0, max_value=100), 42, -1),
+    (lambda: me.FloatField(), 1.5, 'x'),
+    (lambda: me.BooleanField(required=True), True, 0),
+    (lambda: me.ListField(me.StringField()), ['a', 'b', 'c'], [1]),
+    (lambda: me.StringField(choices=['a', 'b', 'c']), 'b', 'd'),
+    (lambda: me.DateTimeField(), '2020-01-01T00:00:00', 1),
+    (lambda: me.DictField(), {'key': 'value'}, 'x'),
+]
+
+GEO_FIELDS = [
+    (me.GeoPointField, [12.5, 41.9], [200, 41.9]),
+    (me.PointField, {'type': 'Point', 'coordinates': [12.5, 41.9]}, {'type': 'Point', 'coordinates': ['x', 41.9]}),
+    (me.LineStringField, {'type': 'LineString', 'coordinates': [[12.5, 41.9], [13.5, 42.9]]}, 'x'),
+    (me.PolygonField, {'type': 'Polygon', 'coordinates': [[[0, 0], [0, 1], [1, 1], [0, 0]]]}, 'x'),
+]
+
+_COUNTER = itertools.count()
+
+
+def _scalar_fields(prefix: str, count: int, geo: bool) -> typing.Tuple[dict, dict, dict]:
+    attrs, payload, invalid_payload = {}, {}, {}
+    for i in range(count):
+        factory, value, invalid_value = SCALAR_FIELDS[i % len(SCALAR_FIELDS)]
+        attrs[f'{prefix}_{i}'] = factory()
+        payload[f'{prefix}_{i}'] = value
+        invalid_payload[f'{prefix}_{i}'] = invalid_value
+    if geo:
+        for field_cls, value, invalid_value in GEO_FIELDS:
+            name = f'{prefix}_{field_cls.__name__.lower()}'
+            attrs[name] = field_cls()
+            payload[name] = value
+            invalid_payload[name] = invalid_value
+    return attrs, payload, invalid_payload
+
+
+def _add_children(attrs: dict, payload: dict, invalid_payload: dict, child: Model, fan_out: int) -> None:
+    for i in range(fan_out):
+        attrs[f'child_{i}'] = me.EmbeddedDocumentField(child.document)
+        payload[f'child_{i}'] = child.payload
+        invalid_payload[f'child_{i}'] = child.invalid_payload
+
+
+def _embedded(name: str, fields: int, depth: int, fan_out: int, geo: bool) -> Model:
+    attrs, payload, invalid_payload = _scalar_fields('field', fields, geo)
+    if depth > 0:
+        _add_children(attrs, payload, invalid_payload, _embedded(f'{name}Child', fields, depth - 1, fan_out, geo),
+                      fan_out)
+    return Model(type(name, (me.EmbeddedDocument, JsonSchemaMixin), attrs), payload, invalid_payload)
+
+
+def make_model(fields: int = 20, depth: int = 0, fan_out: int = 1, geo: bool = False, inheritance: int = 0) -> Model:
+    """
+    Builds a synthetic document class, a valid payload and a payload with every value invalid for it.
+
+    Args:
+        fields(int): Number of scalar fields of the document and of every embedded document. Defaults to 20.
+        depth(int): Nesting depth of embedded documents. Defaults to 0.
+        fan_out(int): Number of embedded document fields per nesting level. Defaults to 1.
+        geo(bool): If True, adds one field of each geo field type to every document. Defaults to False.
+        inheritance(int): Number of ancestor documents, each declaring two fields of its own. Defaults to 0.
+
+    Returns:
+        Model: Named tuple of (document, payload, invalid_payload)
+    """
+
+    name = f'Bench{next(_COUNTER)}'
+    attrs, payload, invalid_payload = _scalar_fields('field', fields, geo)
+    if depth > 0:
+        _add_children(attrs, payload, invalid_payload, _embedded(f'{name}Embedded', fields, depth - 1, fan_out, geo),
+                      fan_out)
+
+    bases = (me.Document, JsonSchemaMixin)
+    for level in range(inheritance):
+        base_attrs, base_payload, base_invalid_payload = _scalar_fields(f'base_{level}', 2, False)
+        if level == 0:
+            base_attrs['meta'] = {'allow_inheritance': True}
+        bases = (type(f'{name}Base{level}', bases, base_attrs),)
+        payload.update(base_payload)
+        invalid_payload.update(base_invalid_payload)
+
+    return Model(type(f'{name}Document', bases, attrs), payload, invalid_payload)
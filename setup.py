@@ -60,6 +60,9 @@ setuptools.setup(
     packages=setuptools.find_packages('src'),
     python_requires=">=3.8",
     include_package_data=True,
+    entry_points={
+        'console_scripts': ['mongoengine-jsonschema = mongoengine_jsonschema.cli:main'],
+    },
     zip_safe=False,
     project_urls={
         "Documentation": "https://github.com/symphonicityy/mongoengine-jsonschema/blob/main/README.md",
@@ -1 +1,14 @@
-from .mixin import JsonSchemaMixin
+from .aio import async_validation_info, configure_async_validation, reset_async_validation_info
+from .analysis import SchemaAnalysis, analyze_registry, analyze_schema
+from .convert import register_field_converter
+from .dispatch import FieldRegistry
+from .fields import register_field_handler, register_field_type
+from .fingerprint import document_fingerprint, generator_fingerprint
+from .frozen import FrozenDict, FrozenList, freeze, thaw
+from .mixin import JsonSchemaMixin, SchemaContext, clear_schema_cache, schema_cache_info
+from .profiling import DocumentProfile, FieldProfile, GenerationProfiler
+from .rawbson import iter_raw_bson_errors
+from .registry import generate_all, iter_schema_documents
+from .snapshot import export_snapshot, load_snapshot, snapshot_info, unload_snapshot
+from .stream import LineError, StreamStats, iter_ndjson_errors, mongoexport_transform, validate_ndjson
+from .version import __version__
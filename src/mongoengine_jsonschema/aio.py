@@ -0,0 +1,253 @@
+import asyncio
+import json
+import threading
+import time
+import typing
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch import DEFAULT_CHUNK_SIZE, ValidationErrors
+
+AsyncValidationInfo = namedtuple('AsyncValidationInfo', ['inline', 'offloaded', 'queue_depth', 'in_flight',
+                                                         'max_queue_depth', 'mean_latency', 'max_latency'])
+
+
+class _AsyncSettings:
+    """Offloading thresholds and the shared executor of async validation."""
+
+    def __init__(self):
+        self.inline_max_items = 1000
+        self.inline_max_bytes = 64 * 1024
+        self.max_workers = 4
+        self.max_pending = 64
+        self.executor = None
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+
+class _AsyncStats:
+    """Counters of async validation, read with `async_validation_info()`."""
+
+    def __init__(self):
+        self.inline = 0
+        self.offloaded = 0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.lock = threading.Lock()
+
+
+_SETTINGS = _AsyncSettings()
+_STATS = _AsyncStats()
+
+
+def configure_async_validation(inline_max_items: typing.Optional[int] = None,
+                               inline_max_bytes: typing.Optional[int] = None,
+                               max_workers: typing.Optional[int] = None,
+                               max_pending: typing.Optional[int] = None) -> None:
+    """
+    Configures when `avalidate()` and `avalidate_many()` offload validation to a thread pool instead of running it
+    inline on the event loop. Arguments left as None keep their current values. Changing `max_workers` shuts down the
+    current executor after its pending validations finish.
+
+    Args:
+        inline_max_items(typing.Optional[int]): Payloads with at most this many values (dict items and list elements,
+                                                 counted recursively) are validated inline. Defaults to 1000.
+        inline_max_bytes(typing.Optional[int]): Raw JSON payloads (str or bytes) of at most this many characters are
+                                                parsed and validated inline. Defaults to 64 KiB.
+        max_workers(typing.Optional[int]): Number of executor threads. Defaults to 4.
+        max_pending(typing.Optional[int]): Maximum number of offloaded validations per event loop, further calls wait
+                                           for a free slot. Defaults to 64.
+    """
+
+    with _SETTINGS.lock:
+        if inline_max_items is not None:
+            _SETTINGS.inline_max_items = inline_max_items
+        if inline_max_bytes is not None:
+            _SETTINGS.inline_max_bytes = inline_max_bytes
+        if max_pending is not None:
+            _SETTINGS.max_pending = max_pending
+            _SETTINGS.semaphores = weakref.WeakKeyDictionary()
+        if max_workers is not None and max_workers != _SETTINGS.max_workers:
+            _SETTINGS.max_workers = max_workers
+            if _SETTINGS.executor is not None:
+                _SETTINGS.executor.shutdown(wait=False)
+                _SETTINGS.executor = None
+
+
+def async_validation_info() -> AsyncValidationInfo:
+    """
+    Returns async validation metrics. `queue_depth` is the number of offloaded validations waiting for an executor
+    thread and `in_flight` the number of offloaded validations not finished yet. Latencies are in seconds, measured
+    from submitting an offloaded validation to receiving its result.
+
+    Returns:
+        AsyncValidationInfo
+    """
+
+    with _STATS.lock:
+        mean_latency = _STATS.total_latency / _STATS.offloaded if _STATS.offloaded else 0.0
+        return AsyncValidationInfo(_STATS.inline, _STATS.offloaded, _STATS.queue_depth, _STATS.in_flight,
+                                   _STATS.max_queue_depth, mean_latency, _STATS.max_latency)
+
+
+def reset_async_validation_info() -> None:
+    """Resets counters and latencies of async validation metrics."""
+
+    with _STATS.lock:
+        _STATS.inline = 0
+        _STATS.offloaded = 0
+        _STATS.max_queue_depth = _STATS.queue_depth
+        _STATS.total_latency = 0.0
+        _STATS.max_latency = 0.0
+
+
+def _exceeds(payload: typing.Any, limit: int) -> bool:
+    """Returns True if payload holds more than `limit` values, stopping as soon as the limit is exceeded."""
+
+    count = 0
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            count += len(value)
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            count += len(value)
+            stack.extend(value)
+        else:
+            continue
+        if count > limit:
+            return True
+    return False
+
+
+def _is_large(payload: typing.Any) -> bool:
+    if isinstance(payload, (str, bytes, bytearray)):
+        return len(payload) > _SETTINGS.inline_max_bytes
+    return _exceeds(payload, _SETTINGS.inline_max_items)
+
+
+def _executor() -> ThreadPoolExecutor:
+    with _SETTINGS.lock:
+        if _SETTINGS.executor is None:
+            _SETTINGS.executor = ThreadPoolExecutor(max_workers=_SETTINGS.max_workers,
+                                                    thread_name_prefix='mongoengine-jsonschema')
+        return _SETTINGS.executor
+
+
+def _semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    with _SETTINGS.lock:
+        semaphore = _SETTINGS.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _SETTINGS.semaphores[loop] = asyncio.Semaphore(_SETTINGS.max_pending)
+        return semaphore
+
+
+def _dequeue(queued: list) -> None:
+    """Removes an offloaded validation from the queue depth once, when it starts or is cancelled before starting."""
+
+    with _STATS.lock:
+        if queued[0]:
+            queued[0] = False
+            _STATS.queue_depth -= 1
+
+
+def _started(queued: list, function: typing.Callable, *args) -> typing.Any:
+    _dequeue(queued)
+    return function(*args)
+
+
+async def _offload(function: typing.Callable, *args) -> typing.Any:
+    loop = asyncio.get_running_loop()
+    async with _semaphore(loop):
+        queued = [True]
+        with _STATS.lock:
+            _STATS.queue_depth += 1
+            _STATS.in_flight += 1
+            _STATS.max_queue_depth = max(_STATS.max_queue_depth, _STATS.queue_depth)
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(_executor(), _started, queued, function, *args)
+        finally:
+            _dequeue(queued)
+            latency = time.perf_counter() - start
+            with _STATS.lock:
+                _STATS.in_flight -= 1
+                _STATS.offloaded += 1
+                _STATS.total_latency += latency
+                _STATS.max_latency = max(_STATS.max_latency, latency)
+
+
+def _parse_and_validate(validator: typing.Any, payload: typing.Any) -> typing.Any:
+    if isinstance(payload, (str, bytes, bytearray)):
+        payload = json.loads(payload)
+    validator.validate(payload)
+    return payload
+
+
+def _chunk_errors(validator: typing.Any, start: int,
+                  chunk: typing.Sequence) -> typing.List[typing.Tuple[int, ValidationErrors]]:
+    results = []
+    for index, instance in enumerate(chunk, start):
+        errors = validator.errors(instance)
+        if errors:
+            results.append((index, errors))
+    return results
+
+
+async def avalidate(validator: typing.Any, payload: typing.Any) -> typing.Any:
+    """
+    Validates a payload without blocking the event loop for long. Small payloads are validated inline, payloads
+    above the configured thresholds are validated in a shared thread pool. See `configure_async_validation()`.
+
+    Args:
+        validator(CompiledValidator): Validator to use
+        payload(typing.Any): JSON document, or raw JSON as str or bytes which is parsed first
+
+    Returns:
+        typing.Any: Validated JSON document
+
+    Raises:
+        jsonschema.exceptions.ValidationError: If the payload is invalid
+        ValueError: If a raw payload is not valid JSON
+    """
+
+    if _is_large(payload):
+        return await _offload(_parse_and_validate, validator, payload)
+    with _STATS.lock:
+        _STATS.inline += 1
+    return _parse_and_validate(validator, payload)
+
+
+async def avalidate_many(validator: typing.Any, payloads: typing.Sequence,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> typing.List[typing.Tuple[int, ValidationErrors]]:
+    """
+    Validates many payloads and returns `(index, errors)` of invalid ones in input order, errors being lists of
+    `(path, message)` tuples. Payloads are validated inline if they hold few values in total, otherwise in chunks in
+    the shared thread pool.
+
+    Args:
+        validator(CompiledValidator): Validator to use
+        payloads(typing.Sequence): JSON documents
+        chunk_size(int): Number of payloads validated per offloaded task. Defaults to 1000.
+
+    Returns:
+        typing.List[typing.Tuple[int, ValidationErrors]]
+    """
+
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+
+    payloads = payloads if isinstance(payloads, list) else list(payloads)
+    if not _is_large(payloads):
+        with _STATS.lock:
+            _STATS.inline += 1
+        return _chunk_errors(validator, 0, payloads)
+
+    chunks = await asyncio.gather(*(_offload(_chunk_errors, validator, start, payloads[start:start + chunk_size])
+                                    for start in range(0, len(payloads), chunk_size)))
+    return [result for chunk in chunks for result in chunk]
@@ -0,0 +1,125 @@
+import json
+import typing
+from collections import namedtuple
+
+from .fields import GEO_TYPES, POINT_PROP
+from .registry import iter_schema_documents
+
+
+class SchemaAnalysis(namedtuple('SchemaAnalysis', ['document', 'size', 'defs_size', 'properties', 'inlined',
+                                                   'point_blocks'])):
+    """
+    Size report of a document's JSON schema. Sizes are in bytes of canonical serialized JSON, as returned by
+    `json_schema_bytes()`.
+
+    Attributes:
+        document(str): Document registry name
+        size(int): Size of the schema with embedded documents inlined
+        defs_size(int): Size of the schema with embedded documents under "$defs"
+        properties(typing.List[typing.Tuple[tuple, int]]): (path, size) of every property, properties of inlined
+                                                           embedded documents included, largest first
+        inlined(typing.Dict[str, typing.Tuple[int, int]]): Embedded document name to (times inlined, total size)
+        point_blocks(typing.Tuple[int, int]): (times inlined, total size) of geo coordinate pair schemas
+    """
+
+    __slots__ = ()
+
+    @property
+    def defs_savings(self) -> int:
+        """Bytes saved by emitting embedded documents under "$defs"."""
+
+        return self.size - self.defs_size
+
+
+def _size(value: typing.Any) -> int:
+    return len(json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                          default=str).encode('utf-8'))
+
+
+def _is_geo_field(schema: dict) -> bool:
+    """Returns True for schemas of geo JSON fields, whose object form has "type" and "coordinates" properties."""
+
+    branches = schema.get('anyOf')
+    if not isinstance(branches, list) or not branches or not isinstance(branches[0], dict):
+        return False
+    geo_properties = branches[0].get('properties')
+    if not isinstance(geo_properties, dict) or set(geo_properties) != {'type', 'coordinates'}:
+        return False
+    geo_types = [[geo_type] for _, (geo_type, _) in GEO_TYPES.items()]
+    return geo_properties['type'].get('enum') in geo_types
+
+
+def _walk(schema: typing.Any, path: tuple, properties: list, inlined: dict, points: list, root: bool) -> None:
+    if isinstance(schema, list):
+        for item in schema:
+            _walk(item, path, properties, inlined, points, False)
+        return
+    if not isinstance(schema, dict):
+        return
+
+    if 'prefixItems' in schema and {k: v for k, v in schema.items() if k != 'title'} == POINT_PROP:
+        # Coordinate pair block, inlined as is or with a title by geo point fields
+        points.append(_size(POINT_PROP))
+        return
+
+    if _is_geo_field(schema):
+        # Leaf field schema, "type" and "coordinates" are parts of the value, not properties of a document
+        _walk(schema['anyOf'], path, [], inlined, points, False)
+        return
+
+    schema_id = schema.get('$id')
+    if not root and isinstance(schema_id, str) and schema_id.startswith('/schemas/'):
+        name = schema_id[len('/schemas/'):]
+        count, size = inlined.get(name, (0, 0))
+        inlined[name] = (count + 1, size + _size(schema))
+
+    for key, value in schema.items():
+        if key == 'properties' and isinstance(value, dict):
+            for name, prop in value.items():
+                properties.append((path + (name,), _size(prop)))
+                _walk(prop, path + (name,), properties, inlined, points, False)
+        else:
+            _walk(value, path, properties, inlined, points, False)
+
+
+def analyze_schema(document: type, strict: bool = True) -> SchemaAnalysis:
+    """
+    Reports the size of a document's JSON schema: per property sizes, how many times each embedded document and geo
+    coordinate pair schema is inlined and how many bytes emitting embedded documents under "$defs" saves.
+
+    Args:
+        document(type): A MongoEngine document class that inherits JsonSchemaMixin
+        strict(bool): Passed to `json_schema()`. Defaults to True.
+
+    Returns:
+        SchemaAnalysis
+    """
+
+    properties, inlined, points = [], {}, []
+    _walk(document.json_schema(strict=strict), (), properties, inlined, points, True)
+    properties.sort(key=lambda item: item[1], reverse=True)
+    return SchemaAnalysis(
+        document=getattr(document, '_class_name', document.__name__),
+        size=len(document.json_schema_bytes(strict=strict)),
+        defs_size=len(document.json_schema_bytes(strict=strict, use_defs=True)),
+        properties=properties,
+        inlined=dict(sorted(inlined.items(), key=lambda item: item[1][1], reverse=True)),
+        point_blocks=(len(points), sum(points))
+    )
+
+
+def analyze_registry(strict: bool = True, include_embedded: bool = True) -> typing.List[SchemaAnalysis]:
+    """
+    Analyzes schemas of all registered documents that inherit JsonSchemaMixin with `analyze_schema()`.
+
+    Args:
+        strict(bool): Passed to `json_schema()`. Defaults to True.
+        include_embedded(bool): If False, embedded documents are skipped. Defaults to True.
+
+    Returns:
+        typing.List[SchemaAnalysis]: Analyses sorted by schema size, largest first
+    """
+
+    analyses = [analyze_schema(doc_cls, strict=strict)
+                for _, doc_cls in iter_schema_documents(include_embedded=include_embedded)]
+    return sorted(analyses, key=lambda analysis: analysis.size, reverse=True)
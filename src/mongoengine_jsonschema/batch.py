@@ -0,0 +1,83 @@
+import collections
+import itertools
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+from .validation import build_validator
+
+DEFAULT_CHUNK_SIZE = 1000
+
+ValidationErrors = typing.List[typing.Tuple[tuple, str]]
+
+_WORKER_VALIDATOR = None
+
+
+def _chunks(iterable: typing.Iterable, chunk_size: int) -> typing.Iterator[typing.Tuple[int, list]]:
+    iterator = iter(iterable)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _chunk_errors(validator: typing.Any, start: int, chunk: list) -> typing.List[typing.Tuple[int, ValidationErrors]]:
+    results = []
+    for index, instance in enumerate(chunk, start):
+        errors = [(tuple(error.absolute_path), error.message) for error in validator.iter_errors(instance)]
+        if errors:
+            results.append((index, errors))
+    return results
+
+
+def _init_worker(schema: dict) -> None:
+    global _WORKER_VALIDATOR
+    _WORKER_VALIDATOR = build_validator(schema)
+
+
+def _validate_chunk(start: int, chunk: list) -> typing.List[typing.Tuple[int, ValidationErrors]]:
+    return _chunk_errors(_WORKER_VALIDATOR, start, chunk)
+
+
+def validate_many(validator: typing.Any,
+                  iterable: typing.Iterable,
+                  workers: typing.Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> typing.Iterator[typing.Tuple[int, ValidationErrors]]:
+    """
+    Validates instances of an iterable in chunks and yields `(index, errors)` of invalid instances in input order,
+    where errors is a list of `(path, message)` tuples. The iterable is consumed lazily, at most `2 * workers` chunks
+    are held in memory at once.
+
+    Args:
+        validator(jsonschema.protocols.Validator): Validator used in the current process. Its schema is sent once to
+                                                   each worker process, which builds its own validator from it.
+        iterable(typing.Iterable): Instances to validate
+        workers(typing.Optional[int]): Number of worker processes. If None or 0, chunks are validated in the current
+                                       process. Instances must be picklable when workers are used.
+        chunk_size(int): Number of instances sent to a worker at once. Defaults to 1000.
+
+    Returns:
+        typing.Iterator[typing.Tuple[int, ValidationErrors]]
+    """
+
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+
+    chunks = _chunks(iterable, chunk_size)
+    if not workers:
+        for start, chunk in chunks:
+            yield from _chunk_errors(validator, start, chunk)
+        return
+
+    schema = validator.schema
+    schema = schema.to_dict() if hasattr(schema, 'to_dict') else schema
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema,)) as executor:
+        pending = collections.deque()
+        for start, chunk in chunks:
+            pending.append(executor.submit(_validate_chunk, start, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
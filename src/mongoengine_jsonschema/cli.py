@@ -0,0 +1,209 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import typing
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .analysis import analyze_schema
+from .fingerprint import document_fingerprint, generator_fingerprint
+from .registry import iter_schema_documents
+from .stream import mongoexport_transform, validate_ndjson
+
+MANIFEST_NAME = '.fingerprints.json'
+
+ExportResult = namedtuple('ExportResult', ['name', 'path', 'status', 'seconds'])
+
+
+def _import_modules(modules: typing.Iterable[str]) -> None:
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _in_modules(doc_cls: type, modules: typing.Sequence[str]) -> bool:
+    return any(doc_cls.__module__ == module or doc_cls.__module__.startswith(f'{module}.') for module in modules)
+
+
+def _write_json(path: str, data: typing.Any) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False, default=str)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def export_schemas(modules: typing.Sequence[str],
+                   out_dir: typing.Union[str, os.PathLike],
+                   strict: bool = True,
+                   use_defs: bool = False,
+                   include_embedded: bool = True,
+                   workers: typing.Optional[int] = None,
+                   force: bool = False) -> typing.List[ExportResult]:
+    """
+    Imports given modules and writes JSON schema of every document defined in them to `<out_dir>/<name>.json`, where
+    name is the document's registry name. Fingerprints of exported documents are kept in a manifest file in the output
+    directory, documents whose fingerprint did not change since the last export are skipped. All documents are
+    exported again if the options, the package version or registered field handlers changed, see
+    `generator_fingerprint()`.
+
+    Args:
+        modules(typing.Sequence[str]): Dotted names of modules (or packages) defining documents
+        out_dir(typing.Union[str, os.PathLike]): Output directory, created if missing
+        strict(bool): Passed to `json_schema()`. Defaults to True.
+        use_defs(bool): Passed to `json_schema()`. Defaults to False.
+        include_embedded(bool): If False, embedded documents are not exported. Defaults to True.
+        workers(typing.Optional[int]): Number of worker threads. Defaults to ThreadPoolExecutor's default.
+        force(bool): If True, exports all documents regardless of fingerprints. Defaults to False.
+
+    Returns:
+        typing.List[ExportResult]: Results of exported and skipped documents, sorted by name
+    """
+
+    _import_modules(modules)
+    out_dir = os.fspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    options = {'strict': strict, 'use_defs': use_defs}
+    generator = generator_fingerprint()
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if force or manifest.get('options') != options or manifest.get('generator') != generator:
+        manifest = {'options': options, 'generator': generator, 'documents': {}}
+    previous = manifest['documents']
+
+    documents = [(name, doc_cls) for name, doc_cls in iter_schema_documents(include_embedded=include_embedded)
+                 if _in_modules(doc_cls, modules)]
+
+    def _export(item):
+        name, doc_cls = item
+        start = time.perf_counter()
+        path = os.path.join(out_dir, f'{name}.json')
+        fingerprint = document_fingerprint(doc_cls)
+        if previous.get(name) == fingerprint and os.path.exists(path):
+            return ExportResult(name, path, 'unchanged', time.perf_counter() - start), fingerprint
+        _write_json(path, doc_cls.json_schema(strict=strict, use_defs=use_defs))
+        return ExportResult(name, path, 'written', time.perf_counter() - start), fingerprint
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        exported = list(executor.map(_export, documents))
+
+    manifest['documents'] = {result.name: fingerprint for result, fingerprint in exported}
+    _write_json(manifest_path, manifest)
+    return [result for result, _ in exported]
+
+
+def _load_document(path: str) -> type:
+    module, _, name = path.rpartition('.')
+    if not module:
+        raise ValueError(f'{path} is not a dotted path to a document class')
+    _import_modules([module])
+    return getattr(sys.modules[module], name)
+
+
+def _format_path(path: tuple) -> str:
+    return '/'.join(str(key) for key in path) or '<root>'
+
+
+def _analyzed_documents(targets: typing.Sequence[str], include_embedded: bool) -> typing.List[type]:
+    documents, modules = [], []
+    for target in targets:
+        try:
+            _import_modules([target])
+            modules.append(target)
+        except ImportError:
+            documents.append(_load_document(target))
+    if modules:
+        documents.extend(doc_cls for _, doc_cls in iter_schema_documents(include_embedded=include_embedded)
+                         if _in_modules(doc_cls, modules) and doc_cls not in documents)
+    return documents
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='mongoengine-jsonschema',
+                                     description='JSON Schema Generator for MongoEngine Documents')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='write one JSON schema file per document')
+    export_parser.add_argument('modules', nargs='+', help='dotted names of modules defining documents')
+    export_parser.add_argument('--out', required=True, help='output directory')
+    export_parser.add_argument('--non-strict', action='store_true', help='omit "required" keywords')
+    export_parser.add_argument('--use-defs', action='store_true', help='emit embedded documents under "$defs"')
+    export_parser.add_argument('--no-embedded', action='store_true', help='skip embedded documents')
+    export_parser.add_argument('--workers', type=int, default=None, help='number of worker threads')
+    export_parser.add_argument('--force', action='store_true', help='export unchanged documents too')
+
+    validate_parser = subparsers.add_parser('validate', help='validate a newline-delimited JSON file')
+    validate_parser.add_argument('document', help='dotted path of the document class, e.g. "app.models.Person"')
+    validate_parser.add_argument('file', help='newline-delimited JSON file, "-" for standard input')
+    validate_parser.add_argument('--non-strict', action='store_true', help='do not check required fields')
+    validate_parser.add_argument('--mongoexport', action='store_true',
+                                 help='flatten extended JSON, drop "_id" and "_cls" and map database field names')
+    validate_parser.add_argument('--max-errors', type=int, default=None, help='stop reporting after N invalid lines')
+
+    analyze_parser = subparsers.add_parser('analyze', help='report schema sizes and inlined duplicates')
+    analyze_parser.add_argument('targets', nargs='+',
+                                help='dotted names of modules defining documents or of document classes')
+    analyze_parser.add_argument('--non-strict', action='store_true', help='omit "required" keywords')
+    analyze_parser.add_argument('--no-embedded', action='store_true', help='skip embedded documents of modules')
+    analyze_parser.add_argument('--top', type=int, default=5, help='number of largest properties to list per document')
+    analyze_parser.add_argument('--json', action='store_true', help='print the report as JSON')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        results = export_schemas(args.modules, args.out, strict=not args.non_strict, use_defs=args.use_defs,
+                                 include_embedded=not args.no_embedded, workers=args.workers, force=args.force)
+        for result in results:
+            print(f'{result.status:<10} {result.seconds * 1e3:>9.2f} ms  {result.name}')
+        written = sum(result.status == 'written' for result in results)
+        print(f'{written} written, {len(results) - written} unchanged in {time.perf_counter() - start:.2f} s')
+
+    elif args.command == 'validate':
+        document = _load_document(args.document)
+        transform = mongoexport_transform(document) if args.mongoexport else None
+        reported = []
+
+        def _report(line_error):
+            if args.max_errors is None or len(reported) < args.max_errors:
+                for path, message in line_error.errors:
+                    print(f'line {line_error.line}: {_format_path(path)}: {message}')
+            reported.append(line_error.line)
+
+        source = sys.stdin.buffer if args.file == '-' else args.file
+        stats = validate_ndjson(document, source, strict=not args.non_strict, transform=transform, on_error=_report)
+        print(f'{stats.lines} lines, {stats.invalid} invalid in {stats.seconds:.2f} s '
+              f'({stats.lines_per_second:,.0f} lines/s, {stats.megabytes_per_second:.1f} MB/s)')
+        return 1 if stats.invalid else 0
+
+    elif args.command == 'analyze':
+        documents = _analyzed_documents(args.targets, include_embedded=not args.no_embedded)
+        analyses = sorted((analyze_schema(doc_cls, strict=not args.non_strict) for doc_cls in documents),
+                          key=lambda analysis: analysis.size, reverse=True)
+        if args.json:
+            report = [{**analysis._asdict(), 'defs_savings': analysis.defs_savings,
+                       'properties': [['/'.join(path), size] for path, size in analysis.properties[:args.top]]}
+                      for analysis in analyses]
+            print(json.dumps(report, indent=2))
+            return 0
+
+        print(f'{"size":>9} {"$defs":>9} {"saved":>8}  document')
+        for analysis in analyses:
+            print(f'{analysis.size:>9} {analysis.defs_size:>9} {analysis.defs_savings:>8}  {analysis.document}')
+            for name, (count, size) in analysis.inlined.items():
+                print(f'{"":>30}inlined {name} x{count}, {size} bytes')
+            if analysis.point_blocks[0]:
+                print(f'{"":>30}inlined coordinate pair x{analysis.point_blocks[0]}, {analysis.point_blocks[1]} bytes')
+            for path, size in analysis.properties[:args.top]:
+                print(f'{"":>30}{size:>8}  {_format_path(path)}')
+
+    return 0
@@ -0,0 +1,779 @@
+import numbers
+import re
+import typing
+
+import mongoengine as me
+
+from jsonschema.exceptions import ValidationError
+
+from .convert import CONVERTERS
+from .fields import (DISCRIMINATOR, FIELD_HANDLERS, FIELD_TYPES, GEO_TYPES, LIST_ITEM_HANDLERS, SPECIAL_FIELDS,
+                     _handle_base_field, _handle_base_item, _handle_embedded_doc_field, _handle_embedded_doc_item,
+                     _handle_generic_reference_field, _handle_generic_reference_item, _handle_geo_field,
+                     _handle_geo_item, _handle_list_field, generic_documents, reference_id_type)
+from .validation import build_validator, compiled_pattern
+
+_TYPE_CHECKS = {
+    'string': 'isinstance({v}, str)',
+    'integer': ('((isinstance({v}, int) and not isinstance({v}, bool)) or '
+                '(isinstance({v}, float) and {v}.is_integer()))'),
+    'number': '(isinstance({v}, Number) and not isinstance({v}, bool))',
+    'boolean': 'isinstance({v}, bool)',
+    'object': 'isinstance({v}, dict)',
+    'array': 'isinstance({v}, list)',
+    'null': '({v} is None)',
+}
+
+_GENERIC_EMBEDDED = me.fields.GenericEmbeddedDocumentField
+
+_SPECIAL_KEYWORDS = {'format', 'enum', 'patternProperties', 'type', 'prefixItems', 'items'}
+
+
+def _equal(one: typing.Any, two: typing.Any) -> bool:
+    """JSON equality as implemented by jsonschema: booleans never equal numbers."""
+
+    if one is two:
+        return True
+    if isinstance(one, str) or isinstance(two, str):
+        return one == two
+    if isinstance(one, (list, tuple)) and isinstance(two, (list, tuple)):
+        return len(one) == len(two) and all(_equal(i, j) for i, j in zip(one, two))
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(_equal(one[k], two[k]) for k in one)
+    if isinstance(one, bool) or isinstance(two, bool):
+        return isinstance(one, bool) and isinstance(two, bool) and one == two
+    return one == two
+
+
+def _enum_contains(value: typing.Any, choices: typing.Sequence) -> bool:
+    return any(_equal(value, choice) for choice in choices)
+
+
+def _is_number(value: typing.Any) -> bool:
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def _coordinates_valid(value: typing.Any, depth: int) -> bool:
+    if not isinstance(value, list):
+        return False
+    if depth == 0:
+        return len(value) <= 2 and all(_is_number(coordinate) for coordinate in value)
+    return all(_coordinates_valid(item, depth - 1) for item in value)
+
+
+def _geo_valid(value: typing.Any, geo_type: str, depth: int) -> bool:
+    if isinstance(value, dict):
+        if 'type' in value and value['type'] != geo_type:
+            return False
+        return 'coordinates' not in value or _coordinates_valid(value['coordinates'], depth)
+    return _coordinates_valid(value, depth)
+
+
+def _convert_value(converter: typing.Callable, field: me.fields.BaseField, value: typing.Any, path: tuple,
+                   errors: list) -> typing.Any:
+    try:
+        return converter(field, value)
+    except Exception:
+        errors.append((path, f'{value!r} is not a valid {type(field).__name__} value'))
+        return value
+
+
+def _field_regex(field: me.fields.BaseField) -> typing.Optional[typing.Pattern]:
+    """
+    Returns the regular expression the schema's "pattern" keyword is generated from. MongoEngine's compiled regex is
+    reused as long as it has no flags that "pattern" cannot express, otherwise the pattern is compiled again.
+    """
+
+    regex = getattr(field, 'url_regex', None) or getattr(field, 'regex', None)
+    if regex is None:
+        return None
+    plain = compiled_pattern(regex.pattern)
+    return regex if regex.flags == plain.flags else plain
+
+
+def _document_plan(field: typing.Optional[me.fields.BaseField]) -> dict:
+    if field is None:
+        return {}
+    if isinstance(field, me.fields.GenericEmbeddedDocumentField):
+        documents = generic_documents(field)
+        if not documents:
+            return {'type': 'object'}
+        return {
+            'union': {name: {'document': doc_cls} if hasattr(doc_cls, 'compiled_validator') else {}
+                      for name, doc_cls in documents},
+            'required': [DISCRIMINATOR],
+            'additional_properties': True,
+        }
+    try:
+        document = field.document_type
+    except (AttributeError, me.errors.NotRegistered):
+        return {}
+    return {'document': document} if hasattr(document, 'compiled_validator') else {}
+
+
+def _reference_plan(field: me.fields.GenericReferenceField) -> dict:
+    return {
+        'field': field,
+        'union': {name: {'reference': reference_id_type(doc_cls)} if doc_cls is not None else {}
+                  for name, doc_cls in generic_documents(field)},
+        'required': [DISCRIMINATOR, '_ref'],
+        'additional_properties': False,
+    }
+
+
+def _base_plan(field: me.fields.BaseField) -> typing.Optional[dict]:
+    plan = {'field': field}
+    _type = FIELD_TYPES.resolve(type(field))
+    if _type is not None:
+        plan['type'] = _type
+
+    _parser = SPECIAL_FIELDS.resolve(type(field))
+    special = _parser(field) if _parser is not None else None
+    if special:
+        if not _SPECIAL_KEYWORDS.issuperset(special):
+            return None
+        if 'type' in special:
+            plan['type'] = special['type']
+        if 'enum' in special:
+            plan['enum'] = list(special['enum'])
+        if 'prefixItems' in special:
+            plan['point'] = True
+        for pattern, subschema in special.get('patternProperties', {}).items():
+            if set(subschema) - {'type'}:
+                return None
+            plan.setdefault('pattern_properties', []).append((compiled_pattern(pattern), dict(subschema)))
+
+    for attr, key in (('min_value', 'minimum'), ('max_value', 'maximum'),
+                      ('min_length', 'min_length'), ('max_length', 'max_length')):
+        value = getattr(field, attr, None)
+        if value is not None:
+            plan[key] = value
+
+    choices = getattr(field, 'choices', None)
+    if choices is not None and not isinstance(field, me.fields.EnumField):
+        plan['enum'] = list(choices)
+
+    regex = _field_regex(field)
+    if regex is not None:
+        plan['regex'] = regex
+    return plan
+
+
+def _item_plan(field: typing.Optional[me.fields.BaseField], items_schema: typing.Optional[dict]) -> dict:
+    handler = LIST_ITEM_HANDLERS.resolve(type(field))
+    if handler is _handle_embedded_doc_item:
+        return _document_plan(field)
+    if handler is _handle_geo_item:
+        return {'geo': GEO_TYPES.resolve(type(field), ('Point', 0))}
+    if handler is _handle_generic_reference_item and getattr(field, 'choices', None):
+        return _reference_plan(field)
+    if handler in (_handle_base_item, _handle_generic_reference_item):
+        return {'type': FIELD_TYPES.resolve(type(field), 'string'), 'field': field}
+    return {'fallback': items_schema or {}}
+
+
+def field_plan(field: me.fields.BaseField, prop_schema: dict) -> dict:
+    """
+    Returns validation plan of a document field, built from the same field metadata schema generation uses. Fields
+    parsed by custom handlers fall back to validating their generated property schema with `jsonschema`.
+
+    Args:
+        field(me.fields.BaseField): A MongoEngine field instance
+        prop_schema(dict): Generated property schema of the field
+
+    Returns:
+        dict
+    """
+
+    handler = FIELD_HANDLERS.resolve(type(field))
+    plan = None
+    if handler is _handle_embedded_doc_field:
+        plan = _document_plan(field)
+    elif handler is _handle_list_field:
+        inner_field = getattr(field, 'field', None)
+        plan = {'type': 'array', 'field': field}
+        if getattr(field, 'required', False):
+            plan['min_items'] = 1
+        if inner_field is not None:
+            plan['items'] = _item_plan(inner_field, prop_schema.get('items'))
+    elif handler is _handle_geo_field:
+        plan = {'geo': GEO_TYPES.resolve(type(field), ('Point', 0))}
+    elif handler is _handle_generic_reference_field and getattr(field, 'choices', None):
+        plan = _reference_plan(field)
+    elif handler in (_handle_base_field, _handle_generic_reference_field):
+        plan = _base_plan(field)
+    return plan if plan is not None else {'fallback': prop_schema}
+
+
+def document_plan(document: type, strict: bool = True) -> dict:
+    """
+    Returns validation plan of a document: its property plans keyed by field name, required properties and whether
+    additional properties are allowed. Structure is taken from the generated schema, so the plan covers exactly the
+    properties `json_schema()` does.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        strict(bool): If True, includes required properties
+
+    Returns:
+        dict
+    """
+
+    schema = document.json_schema(strict=strict)
+    fields = getattr(document, '_fields', {})
+    if getattr(document, '_JSONSCHEMA', None) is not None:
+        return {'fallback': schema}
+
+    properties = {}
+    for name, prop_schema in schema.get('properties', {}).items():
+        field = fields.get(name)
+        properties[name] = field_plan(field, prop_schema) if field is not None else {'fallback': prop_schema}
+
+    return {
+        'properties': properties,
+        'required': list(schema.get('required', ())),
+        'additional_properties': schema.get('additionalProperties', True) is not False,
+    }
+
+
+class _CodeBuilder:
+    """Collects generated source lines and constants referenced by them."""
+
+    def __init__(self, strict: bool, construct: bool = False):
+        self.strict = strict
+        self.construct = construct
+        self.lines = []
+        self.namespace = {
+            'Number': numbers.Number,
+            '_enum_contains': _enum_contains,
+            '_is_number': _is_number,
+            '_geo_valid': _geo_valid,
+            '_coordinates_valid': _coordinates_valid,
+            '_convert_value': _convert_value,
+        }
+        self._counter = 0
+
+    def name(self, prefix: str) -> str:
+        self._counter += 1
+        return f'{prefix}{self._counter}'
+
+    def const(self, value: typing.Any, prefix: str = '_c') -> str:
+        name = self.name(prefix)
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append('    ' * indent + line)
+
+    def error(self, indent: int, path: str, message: str) -> None:
+        self.emit(indent, f'errors.append(({path}, {message}))')
+
+
+def _nested_validator(document: type, strict: bool) -> typing.Callable:
+    """Returns a function calling compiled validator of given document, compiled lazily on first call."""
+
+    function = None
+
+    def validate(value, path, errors):
+        nonlocal function
+        if function is None:
+            function = document.compiled_validator(strict=strict).function
+        function(value, path, errors)
+
+    return validate
+
+
+def _compile_union(plan: dict, strict: bool = True) -> typing.Callable:
+    """
+    Generates and compiles validation function `function(value, path, errors)` of a union plan of generic fields.
+    Each branch gets its own function, selected by the "_cls" value with a single lookup, so only the matching branch
+    is evaluated. Embedded documents are validated without their "_cls" key by their own compiled validators.
+
+    Args:
+        plan(dict): Plan with "union", branch plans keyed by "_cls" value, "required" and "additional_properties"
+        strict(bool): If True, required keys are checked. Defaults to True.
+
+    Returns:
+        typing.Callable
+    """
+
+    b = _CodeBuilder(strict)
+    branches = {}
+    for name, branch in plan['union'].items():
+        function_name = b.name('validate_branch')
+        b.emit(0, f'def {function_name}(data, path, errors):')
+        if 'document' in branch:
+            nested = b.const(_nested_validator(branch['document'], strict), '_document')
+            b.emit(1, f'{nested}({{k: v for k, v in data.items() if k != {DISCRIMINATOR!r}}}, path, errors)')
+        elif 'reference' in branch:
+            b.emit(1, "if '_ref' in data:")
+            b.emit(2, "v = data['_ref']")
+            _emit_plan(b, {'type': branch['reference']}, 'v', "path + ('_ref',)", 2)
+        b.emit(1, 'return')
+        b.emit(0, '')
+        branches[name] = function_name
+
+    b.emit(0, 'def validate_union(data, path, errors):')
+    keys = [DISCRIMINATOR] + (['_ref'] if not plan['additional_properties'] else [])
+    _emit_document_checks(b, {'required': plan['required'] if strict else [], 'properties': keys,
+                              'additional_properties': plan['additional_properties']}, '')
+    b.emit(1, f'if {DISCRIMINATOR!r} not in data:')
+    b.emit(2, 'return')
+    b.emit(1, f'name = data[{DISCRIMINATOR!r}]')
+    b.emit(1, 'validate = _branches.get(name) if isinstance(name, str) else None')
+    b.emit(1, 'if validate is None:')
+    b.error(2, f'path + ({DISCRIMINATOR!r},)', f'f"{{name!r}} is not one of {{{b.const(list(plan["union"]))}!r}}"')
+    b.emit(2, 'return')
+    b.emit(1, 'validate(data, path, errors)')
+
+    source = '\n'.join(b.lines) + '\n'
+    exec(compile(source, '<compiled union validator>', 'exec'), b.namespace)
+    b.namespace['_branches'] = {name: b.namespace[function_name] for name, function_name in branches.items()}
+    return b.namespace['validate_union']
+
+
+def _nested_converter(document: type, strict: bool, construct: bool) -> typing.Callable:
+    """Returns a function calling compiled converter of given document, compiled lazily on first call."""
+
+    function = None
+
+    def convert(value, path, errors):
+        nonlocal function
+        if function is None:
+            function = document.compiled_converter(strict=strict, construct=construct).function
+        return function(value, path, errors)
+
+    return convert
+
+
+def _converter(plan: dict) -> typing.Optional[typing.Callable]:
+    field = plan.get('field')
+    if field is None or 'items' in plan or 'fallback' in plan:
+        return None
+    return CONVERTERS.resolve(type(field))
+
+
+def _needs_conversion(plan: dict) -> bool:
+    if 'document' in plan:
+        return True
+    if plan.get('items'):
+        return _needs_conversion(plan['items'])
+    return _converter(plan) is not None
+
+
+def _emit_convert(b: _CodeBuilder, plan: dict, v: str, path: str, indent: int) -> str:
+    """Emits validation and conversion of `v`, returns name of the variable holding converted value."""
+
+    if not _needs_conversion(plan):
+        _emit_plan(b, plan, v, path, indent)
+        return v
+
+    converted = b.name('r')
+    if 'document' in plan:
+        nested = b.const(_nested_converter(plan['document'], b.strict, b.construct), '_document')
+        b.emit(indent, f'{converted} = {nested}({v}, {path}, errors)')
+        return converted
+
+    if plan.get('items'):
+        _emit_plan(b, {key: value for key, value in plan.items() if key != 'items'}, v, path, indent)
+        index, item = b.name('i'), b.name('v')
+        b.emit(indent, f'{converted} = {v}')
+        b.emit(indent, f'if isinstance({v}, list):')
+        b.emit(indent + 1, f'{converted} = []')
+        b.emit(indent + 1, f'for {index}, {item} in enumerate({v}):')
+        converted_item = _emit_convert(b, plan['items'], item, f'{path} + ({index},)', indent + 2)
+        b.emit(indent + 2, f'{converted}.append({converted_item})')
+        return converted
+
+    errors_before = b.name('n')
+    b.emit(indent, f'{errors_before} = len(errors)')
+    _emit_plan(b, plan, v, path, indent)
+    converter, field = b.const(_converter(plan), '_converter'), b.const(plan['field'], '_field')
+    b.emit(indent, f'{converted} = _convert_value({converter}, {field}, {v}, {path}, errors) '
+                   f'if len(errors) == {errors_before} else {v}')
+    return converted
+
+
+def _emit_plan(b: _CodeBuilder, plan: dict, v: str, path: str, indent: int) -> None:
+    if 'fallback' in plan:
+        validator = b.const(build_validator(plan['fallback']), '_validator')
+        e = b.name('e')
+        b.emit(indent, f'for {e} in {validator}.iter_errors({v}):')
+        b.error(indent + 1, f'{path} + tuple({e}.absolute_path)', f'{e}.message')
+        return
+
+    if 'document' in plan:
+        nested = b.const(_nested_validator(plan['document'], b.strict), '_document')
+        b.emit(indent, f'{nested}({v}, {path}, errors)')
+        return
+
+    if 'union' in plan:
+        union = b.const(_compile_union(plan, b.strict), '_union')
+        b.emit(indent, f'{union}({v}, {path}, errors)')
+        return
+
+    if 'geo' in plan:
+        geo_type, depth = plan['geo']
+        b.emit(indent, f'if not _geo_valid({v}, {geo_type!r}, {depth}):')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is not valid under any of the given schemas"')
+        return
+
+    _type = plan.get('type')
+    if _type is not None:
+        b.emit(indent, f'if not {_TYPE_CHECKS[_type].format(v=v)}:')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is not of type {_type!r}"')
+
+    if 'minimum' in plan:
+        minimum = b.const(plan['minimum'])
+        b.emit(indent, f'if _is_number({v}) and {v} < {minimum}:')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is less than the minimum of {{{minimum}!r}}"')
+
+    if 'maximum' in plan:
+        maximum = b.const(plan['maximum'])
+        b.emit(indent, f'if _is_number({v}) and {v} > {maximum}:')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is greater than the maximum of {{{maximum}!r}}"')
+
+    if 'min_length' in plan:
+        b.emit(indent, f'if isinstance({v}, str) and len({v}) < {int(plan["min_length"])}:')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is too short"')
+
+    if 'max_length' in plan:
+        b.emit(indent, f'if isinstance({v}, str) and len({v}) > {int(plan["max_length"])}:')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is too long"')
+
+    if 'regex' in plan:
+        regex = b.const(plan['regex'], '_regex')
+        b.emit(indent, f'if isinstance({v}, str) and not {regex}.search({v}):')
+        b.error(indent + 1, path, f'f"{{{v}!r}} does not match {{{regex}.pattern!r}}"')
+
+    if 'enum' in plan:
+        choices = plan['enum']
+        if all(isinstance(choice, str) for choice in choices):
+            allowed = b.const(frozenset(choices), '_enum')
+            b.emit(indent, f'if not (isinstance({v}, str) and {v} in {allowed}):')
+        else:
+            allowed = b.const(choices, '_enum')
+            b.emit(indent, f'if not _enum_contains({v}, {allowed}):')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is not one of {{{b.const(choices)}!r}}"')
+
+    if plan.get('point'):
+        b.emit(indent, f'if isinstance({v}, list) and not _coordinates_valid({v}, 0):')
+        b.error(indent + 1, path, f'f"{{{v}!r}} is not a valid point"')
+
+    if 'pattern_properties' in plan:
+        key, value = b.name('k'), b.name('v')
+        b.emit(indent, f'if isinstance({v}, dict):')
+        b.emit(indent + 1, f'for {key}, {value} in {v}.items():')
+        for regex, subschema in plan['pattern_properties']:
+            regex = b.const(regex, '_regex')
+            b.emit(indent + 2, f'if {regex}.search({key}):')
+            if 'type' in subschema:
+                _emit_plan(b, {'type': subschema['type']}, value, f'{path} + ({key},)', indent + 3)
+            else:
+                b.emit(indent + 3, 'pass')
+
+    if 'min_items' in plan or plan.get('items'):
+        b.emit(indent, f'if isinstance({v}, list):')
+        if 'min_items' in plan:
+            b.emit(indent + 1, f'if len({v}) < {int(plan["min_items"])}:')
+            b.error(indent + 2, path, f'f"{{{v}!r}} should be non-empty"')
+        if plan.get('items'):
+            index, item = b.name('i'), b.name('v')
+            b.emit(indent + 1, f'for {index}, {item} in enumerate({v}):')
+            lines_before = len(b.lines)
+            _emit_plan(b, plan['items'], item, f'{path} + ({index},)', indent + 2)
+            if len(b.lines) == lines_before:
+                b.emit(indent + 2, 'pass')
+
+
+def _emit_document_checks(b: _CodeBuilder, plan: dict, returned: str) -> None:
+    b.emit(1, 'if not isinstance(data, dict):')
+    b.error(2, 'path', 'f"{data!r} is not of type \'object\'"')
+    b.emit(2, f'return {returned}'.rstrip())
+
+    for name in plan['required']:
+        b.emit(1, f'if {name!r} not in data:')
+        b.error(2, 'path', repr(f'{name!r} is a required property'))
+
+    if not plan['additional_properties']:
+        properties = b.const(frozenset(plan['properties']), '_properties')
+        b.emit(1, 'for key in data:')
+        b.emit(2, f'if key not in {properties}:')
+        b.error(3, 'path', 'f"Additional properties are not allowed ({key!r} was unexpected)"')
+
+
+def _emit_document(b: _CodeBuilder, plan: dict, function_name: str) -> None:
+    b.emit(0, f'def {function_name}(data, path, errors):')
+    if 'fallback' in plan:
+        _emit_plan(b, plan, 'data', 'path', 1)
+        return
+
+    _emit_document_checks(b, plan, '')
+
+    for name, field_plan_ in plan['properties'].items():
+        lines_before = len(b.lines)
+        b.emit(1, f'if {name!r} in data:')
+        v = b.name('v')
+        b.emit(2, f'{v} = data[{name!r}]')
+        _emit_plan(b, field_plan_, v, f'path + ({name!r},)', 2)
+        if len(b.lines) == lines_before + 2:
+            del b.lines[lines_before:]
+
+    b.emit(1, 'return')
+
+
+def _emit_converter(b: _CodeBuilder, document: type, plan: dict, function_name: str) -> None:
+    b.emit(0, f'def {function_name}(data, path, errors):')
+    b.emit(1, 'errors_before = len(errors)')
+    if 'fallback' in plan:
+        _emit_plan(b, plan, 'data', 'path', 1)
+        b.emit(1, 'converted = data')
+    else:
+        _emit_document_checks(b, plan, 'data')
+        b.emit(1, 'converted = dict(data)')
+        for name, field_plan_ in plan['properties'].items():
+            lines_before = len(b.lines)
+            b.emit(1, f'if {name!r} in data:')
+            v = b.name('v')
+            b.emit(2, f'{v} = data[{name!r}]')
+            converted = _emit_convert(b, field_plan_, v, f'path + ({name!r},)', 2)
+            if converted != v:
+                b.emit(2, f'converted[{name!r}] = {converted}')
+            elif len(b.lines) == lines_before + 2:
+                del b.lines[lines_before:]
+
+    if b.construct:
+        document_cls = b.const(document, '_document_cls')
+        b.emit(1, 'if len(errors) == errors_before:')
+        if 'fallback' in plan:
+            b.emit(2, f'return {document_cls}(**converted)')
+        else:
+            for name in plan['properties']:
+                field = document._fields.get(name)
+                if isinstance(field, _GENERIC_EMBEDDED) or isinstance(getattr(field, 'field', None), _GENERIC_EMBEDDED):
+                    # Document class of generic embedded documents is only known from their "_cls" value
+                    b.emit(2, f'if {name!r} in converted:')
+                    b.emit(3, f'converted[{name!r}] = {b.const(field, "_field")}.to_python(converted[{name!r}])')
+            b.emit(2, f'return {document_cls}(__auto_convert=False, **converted)')
+    b.emit(1, 'return converted')
+
+
+class CompiledValidator:
+    """
+    Validator generated as specialized Python code for a single document class. Validates the same JSON documents as
+    a `jsonschema` validator of the document's schema, except "format" keywords, which are not checked by default in
+    `jsonschema` either. Exposes the commonly used part of `jsonschema` validator interface.
+
+    Attributes:
+        function(typing.Callable): Generated function `function(instance, path, errors)` appending (path, message)
+                                   tuples to `errors`
+        source(str): Source code of generated function
+    """
+
+    def __init__(self, function: typing.Callable, source: str):
+        self.function = function
+        self.source = source
+
+    def errors(self, instance: typing.Any) -> typing.List[typing.Tuple[tuple, str]]:
+        """
+        Returns list of (path, message) tuples of validation errors, empty if the instance is valid.
+
+        Args:
+            instance(typing.Any): JSON document to validate
+
+        Returns:
+            typing.List[typing.Tuple[tuple, str]]
+        """
+
+        errors = []
+        self.function(instance, (), errors)
+        return errors
+
+    def iter_errors(self, instance: typing.Any) -> typing.Iterator[ValidationError]:
+        """
+        Yields validation errors of given instance.
+
+        Args:
+            instance(typing.Any): JSON document to validate
+
+        Returns:
+            typing.Iterator[ValidationError]
+        """
+
+        for path, message in self.errors(instance):
+            yield ValidationError(message, path=path)
+
+    def is_valid(self, instance: typing.Any) -> bool:
+        """
+        Returns True if given instance is valid.
+
+        Args:
+            instance(typing.Any): JSON document to validate
+
+        Returns:
+            bool
+        """
+
+        return not self.errors(instance)
+
+    def validate(self, instance: typing.Any) -> None:
+        """
+        Raises the first validation error of given instance, if any.
+
+        Args:
+            instance(typing.Any): JSON document to validate
+
+        Raises:
+            ValidationError
+        """
+
+        for error in self.iter_errors(instance):
+            raise error
+
+
+def compile_validator(document: type, strict: bool = True) -> CompiledValidator:
+    """
+    Generates and compiles a validation function specialized for given document class. Embedded documents are
+    validated by their own compiled validators, which are compiled on first use.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        strict(bool): If True, required properties are checked. Defaults to True.
+
+    Returns:
+        CompiledValidator
+    """
+
+    b = _CodeBuilder(strict)
+    function_name = f'validate_{re.sub(r"[^0-9a-zA-Z_]", "_", document.__name__)}'
+    _emit_document(b, document_plan(document, strict=strict), function_name)
+    source = '\n'.join(b.lines) + '\n'
+    exec(compile(source, f'<compiled validator {document.__qualname__}>', 'exec'), b.namespace)
+    return CompiledValidator(b.namespace[function_name], source)
+
+
+class CompiledConverter(CompiledValidator):
+    """
+    Compiled validator that also converts JSON values to Python values of document fields, see
+    `compile_converter()`.
+
+    Attributes:
+        function(typing.Callable): Generated function `function(instance, path, errors)` appending (path, message)
+                                   tuples to `errors` and returning converted instance
+        source(str): Source code of generated function
+    """
+
+    def convert(self, instance: typing.Any) -> typing.Any:
+        """
+        Validates and converts given instance in a single pass.
+
+        Args:
+            instance(typing.Any): JSON document to validate and convert
+
+        Returns:
+            typing.Any: Converted document, a dict or a document instance
+
+        Raises:
+            ValidationError: First validation or conversion error
+        """
+
+        errors = []
+        converted = self.function(instance, (), errors)
+        if errors:
+            path, message = errors[0]
+            raise ValidationError(message, path=path)
+        return converted
+
+
+def compile_converter(document: type, strict: bool = True, construct: bool = False) -> CompiledConverter:
+    """
+    Generates and compiles a function that validates a JSON document like `compile_validator()` does and converts its
+    values to Python values of document fields in the same traversal, e.g. ObjectId strings to `bson.ObjectId` and
+    ISO 8601 strings to `datetime`. Converters are looked up by field class, see `register_field_converter()`. Input is
+    not modified, converted values are written to copies of dicts and lists that contain them.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        strict(bool): If True, required properties are checked. Defaults to True.
+        construct(bool): If True, the document and embedded documents are constructed from converted values.
+                         Defaults to False.
+
+    Returns:
+        CompiledConverter
+    """
+
+    b = _CodeBuilder(strict, construct=construct)
+    function_name = f'convert_{re.sub(r"[^0-9a-zA-Z_]", "_", document.__name__)}'
+    _emit_converter(b, document, document_plan(document, strict=strict), function_name)
+    source = '\n'.join(b.lines) + '\n'
+    exec(compile(source, f'<compiled converter {document.__qualname__}>', 'exec'), b.namespace)
+    return CompiledConverter(b.namespace[function_name], source)
+
+
+class PartialValidator(CompiledValidator):
+    """
+    Compiled validator of partial updates, see `compile_partial_validator()`.
+
+    Attributes:
+        function(typing.Callable): Generated function `function(instance, path, errors)`
+        source(str): Source code of generated functions
+        field_validators(typing.Dict[str, typing.Callable]): Validation functions `function(value, path, errors)`
+                                                             keyed by field name
+    """
+
+    def __init__(self, function: typing.Callable, source: str, field_validators: typing.Dict[str, typing.Callable]):
+        super().__init__(function, source)
+        self.field_validators = field_validators
+
+
+def compile_partial_validator(document: type, strict: bool = True) -> PartialValidator:
+    """
+    Generates and compiles a validator of partial updates (e.g. PATCH payloads) for given document class. Each field
+    gets its own validation function, indexed by field name, so only keys present in the update are validated and
+    unknown keys are rejected with a single lookup. By default present values are validated strictly, e.g. a
+    replaced embedded document must have its required fields.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        strict(bool): If True, required properties of embedded documents are checked. Defaults to True.
+
+    Returns:
+        PartialValidator
+    """
+
+    plan = document_plan(document, strict=strict)
+    if 'fallback' in plan:
+        schema = plan['fallback']
+        plan = {
+            'properties': {name: {'fallback': prop_schema} for name, prop_schema in schema.get('properties', {}).items()},
+            'additional_properties': schema.get('additionalProperties', True) is not False,
+        }
+
+    b = _CodeBuilder(strict)
+    function_names = {}
+    for name, field_plan_ in plan['properties'].items():
+        function_name = b.name('validate_field')
+        b.emit(0, f'def {function_name}(v, path, errors):')
+        _emit_plan(b, field_plan_, 'v', 'path', 1)
+        b.emit(1, 'return')
+        b.emit(0, '')
+        function_names[name] = function_name
+
+    function_name = f'validate_partial_{re.sub(r"[^0-9a-zA-Z_]", "_", document.__name__)}'
+    b.emit(0, f'def {function_name}(data, path, errors):')
+    b.emit(1, 'if not isinstance(data, dict):')
+    b.error(2, 'path', 'f"{data!r} is not of type \'object\'"')
+    b.emit(2, 'return')
+    b.emit(1, 'for key, value in data.items():')
+    b.emit(2, 'validate = _field_validators.get(key)')
+    b.emit(2, 'if validate is None:')
+    if not plan['additional_properties']:
+        b.error(3, 'path', 'f"Additional properties are not allowed ({key!r} was unexpected)"')
+    b.emit(3, 'continue')
+    b.emit(2, 'validate(value, path + (key,), errors)')
+
+    source = '\n'.join(b.lines) + '\n'
+    exec(compile(source, f'<compiled partial validator {document.__qualname__}>', 'exec'), b.namespace)
+    field_validators = {name: b.namespace[name_] for name, name_ in function_names.items()}
+    b.namespace['_field_validators'] = field_validators
+    return PartialValidator(b.namespace[function_name], source, field_validators)
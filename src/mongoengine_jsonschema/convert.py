@@ -0,0 +1,122 @@
+import base64
+import datetime
+import decimal
+import typing
+import uuid
+
+import bson
+import mongoengine as me
+from mongoengine.base.common import _document_registry
+
+from .dispatch import FieldRegistry
+from .fields import _registered
+
+
+def _to_object_id(field: me.fields.BaseField, value: typing.Any) -> bson.ObjectId:
+    return bson.ObjectId(value)
+
+
+def _from_isoformat(value: str) -> datetime.datetime:
+    if value[-1:] in ('Z', 'z'):
+        # RFC 3339 UTC designator, accepted by datetime.fromisoformat() only since Python 3.11
+        value = f'{value[:-1]}+00:00'
+    return datetime.datetime.fromisoformat(value)
+
+
+def _to_datetime(field: me.fields.DateTimeField, value: typing.Any) -> datetime.datetime:
+    try:
+        return _from_isoformat(value)
+    except ValueError:
+        result = field.to_mongo(value)
+        if result is None:
+            raise
+        return result
+
+
+def _to_date(field: me.fields.DateField, value: typing.Any) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        return _to_datetime(field, value).date()
+
+
+def _to_complex_datetime(field: me.fields.ComplexDateTimeField, value: typing.Any) -> datetime.datetime:
+    try:
+        return field._convert_from_string(value)
+    except (ValueError, TypeError):
+        return _from_isoformat(value)
+
+
+def _to_uuid(field: me.fields.UUIDField, value: typing.Any) -> uuid.UUID:
+    return uuid.UUID(value)
+
+
+def _to_decimal(field: me.fields.DecimalField, value: typing.Any) -> decimal.Decimal:
+    result = field.to_python(value)
+    if not isinstance(result, decimal.Decimal):
+        raise ValueError(value)
+    return result
+
+
+def _to_decimal128(field: me.fields.Decimal128Field, value: typing.Any) -> decimal.Decimal:
+    return decimal.Decimal(str(value))
+
+
+def _to_bytes(field: me.fields.BinaryField, value: typing.Any) -> bytes:
+    return base64.b64decode(value, validate=True)
+
+
+def _to_enum(field: me.fields.EnumField, value: typing.Any) -> typing.Any:
+    return field._enum_cls(value)
+
+
+def _to_primary_key(document: type, value: typing.Any) -> typing.Any:
+    pk_field = document._fields.get(document._meta.get('id_field'))
+    converter = CONVERTERS.resolve(type(pk_field)) if pk_field is not None else _to_object_id
+    return converter(pk_field, value) if converter is not None else value
+
+
+def _to_reference_id(field: me.fields.BaseField, value: typing.Any) -> typing.Any:
+    return _to_primary_key(field.document_type, value)
+
+
+def _to_generic_reference(field: me.fields.GenericReferenceField, value: typing.Any) -> typing.Any:
+    if not isinstance(value, dict):
+        # Generic references without choices are plain ids of unknown documents
+        return value
+    document = _document_registry[value['_cls']]
+    return {'_cls': value['_cls'],
+            '_ref': bson.DBRef(document._get_collection_name(), _to_primary_key(document, value['_ref']))}
+
+
+CONVERTERS = FieldRegistry({
+    me.fields.BinaryField: _to_bytes,
+    me.fields.CachedReferenceField: _to_reference_id,
+    me.fields.ComplexDateTimeField: _to_complex_datetime,
+    me.fields.DateField: _to_date,
+    me.fields.DateTimeField: _to_datetime,
+    me.fields.Decimal128Field: _to_decimal128,
+    me.fields.DecimalField: _to_decimal,
+    me.fields.EnumField: _to_enum,
+    me.fields.GenericReferenceField: _to_generic_reference,
+    me.fields.LazyReferenceField: _to_reference_id,
+    me.fields.ObjectIdField: _to_object_id,
+    me.fields.ReferenceField: _to_reference_id,
+    me.fields.UUIDField: _to_uuid,
+})
+
+
+def register_field_converter(field_cls: type, converter: typing.Optional[typing.Callable]) -> None:
+    """
+    Registers converter of JSON values to Python values for given field class and its subclasses, used by
+    `from_json_validated()`. Converters are called as `converter(field, value)` with values that passed validation and
+    should raise an exception if the value cannot be converted, e.g. `lambda field, value: ipaddress.ip_address(value)`.
+    Cached schemas are cleared together with converters compiled from them.
+
+    Args:
+        field_cls(type): A MongoEngine field class
+        converter(typing.Optional[typing.Callable]): Converter, or None to keep values as they are
+    """
+
+    CONVERTERS.register(field_cls, converter)
+    _registered()
@@ -0,0 +1,68 @@
+import typing
+
+
+class FieldRegistry:
+    """
+    Maps MongoEngine field classes to values (usually handler functions). Lookups walk the MRO of the field class, so
+    subclasses of registered fields inherit the value of their closest registered ancestor. The result of each lookup
+    is cached per field class, therefore resolving a field type costs a single dictionary lookup after the first time.
+
+    Args:
+        entries(typing.Optional[dict]): Initial mapping of field classes to values
+
+    Attributes:
+        version(int): Number of registrations since creation, e.g. to detect changed registries
+    """
+
+    def __init__(self, entries: typing.Optional[dict] = None):
+        self._entries = dict(entries or {})
+        self._resolved = {}
+        self.version = 0
+
+    def register(self, field_cls: type, value: typing.Any) -> None:
+        """
+        Registers a value for given field class and its subclasses.
+
+        Args:
+            field_cls(type): A MongoEngine field class
+            value(typing.Any): Value to return for the class and subclasses without their own entry
+        """
+
+        self._entries[field_cls] = value
+        self._resolved.clear()
+        self.version += 1
+
+    def items(self) -> typing.List[typing.Tuple[type, typing.Any]]:
+        """
+        Returns registered (field class, value) pairs, not including inherited lookups.
+
+        Returns:
+            typing.List[typing.Tuple[type, typing.Any]]
+        """
+
+        return list(self._entries.items())
+
+    def resolve(self, field_cls: type, default: typing.Any = None) -> typing.Any:
+        """
+        Returns value registered for given field class or its closest ancestor.
+
+        Args:
+            field_cls(type): A MongoEngine field class
+            default(typing.Any): Returned if neither the class nor its ancestors are registered
+
+        Returns:
+            typing.Any
+        """
+
+        try:
+            value = self._resolved[field_cls]
+        except KeyError:
+            value = next((self._entries[klass] for klass in field_cls.__mro__ if klass in self._entries), _MISSING)
+            self._resolved[field_cls] = value
+        return default if value is _MISSING else value
+
+    def __contains__(self, field_cls: type) -> bool:
+        return self.resolve(field_cls, _MISSING) is not _MISSING
+
+
+_MISSING = object()
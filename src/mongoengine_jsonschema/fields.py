@@ -0,0 +1,251 @@
+import typing
+
+import mongoengine as me
+import mongoengine.base
+from mongoengine.base.common import _document_registry
+
+from .dispatch import FieldRegistry
+
+# Key MongoEngine stores the class name of documents under, in inheritance hierarchies and generic fields
+DISCRIMINATOR = '_cls'
+
+
+TYPE_MAP = {
+    'BinaryField': 'string',
+    'BooleanField': 'boolean',
+    'CachedReferenceField': 'string',
+    'ComplexDateTimeField': 'string',
+    'DateField': 'string',
+    'DateTimeField': 'string',
+    'Decimal128Field': 'number',
+    'DecimalField': 'number',
+    'DictField': 'object',
+    'EmailField': 'string',
+    'EnumField': 'string',
+    'FloatField': 'number',
+    'GenericReferenceField': 'string',
+    'GenericLazyReferenceField': 'string',
+    'GeoPointField': 'array',
+    'IntField': 'integer',
+    'LongField': 'integer',
+    'MapField': 'object',
+    'ObjectIdField': 'string',
+    'ReferenceField': 'string',
+    'LazyReferenceField': 'string',
+    'SequenceField': 'integer',
+    'StringField': 'string',
+    'URLField': 'string',
+    'UUIDField': 'string',
+}
+
+ATTR_MAP = {'required': 'required',
+            'default': 'default',
+            'min_value': 'minimum',
+            'max_value': 'maximum',
+            'min_length': 'minLength',
+            'max_length': 'maxLength',
+            'choices': 'enum',
+            'regex': 'pattern',
+            'url_regex': 'pattern'}
+
+POINT_PROP = {
+    'type': 'array',
+    'prefixItems': [
+        {
+            'type': 'number',  # longitude
+            'min_value': -180,
+            'max_value': 180
+        },
+        {
+            'type': 'number',  # latitude
+            'min_value': -90,
+            'max_value': 90
+        }
+    ],
+    'items': False
+}
+
+FIELD_TYPES = FieldRegistry({getattr(me.fields, name): _type for name, _type in TYPE_MAP.items()
+                             if hasattr(me.fields, name)})
+
+GEO_TYPES = FieldRegistry({
+    me.fields.PointField: ('Point', 0),
+    me.fields.LineStringField: ('LineString', 1),
+    me.fields.MultiPointField: ('MultiPoint', 1),
+    me.fields.PolygonField: ('Polygon', 2),
+    me.fields.MultiLineStringField: ('MultiLineString', 2),
+    me.fields.MultiPolygonField: ('MultiPolygon', 3),
+})
+
+
+def _parse_enum_field(field: me.fields.EnumField) -> dict:
+    return {'enum': [e.value for e in getattr(field, 'choices', None)]}
+
+
+def _parse_map_field(field: me.fields.MapField) -> typing.Optional[dict]:
+    _field = getattr(field, 'field', None)
+    _field_type = FIELD_TYPES.resolve(type(_field)) if _field is not None else None
+
+    if _field_type is not None:
+        return {'patternProperties': {
+            ".*": {"type": _field_type}
+        }
+        }
+
+
+SPECIAL_FIELDS = FieldRegistry({
+    me.fields.GeoPointField: lambda field: POINT_PROP,
+    me.fields.UUIDField: lambda field: {'format': 'uuid'},
+    me.fields.EmailField: lambda field: {'format': 'email'},
+    me.fields.DateField: lambda field: {'format': 'date'},
+    me.fields.DateTimeField: lambda field: {'format': 'date-time'},
+    me.fields.ComplexDateTimeField: lambda field: {'format': 'date-time'},
+    me.fields.URLField: lambda field: {'format': 'uri'},
+    me.fields.EnumField: _parse_enum_field,
+    me.fields.MapField: _parse_map_field,
+})
+
+
+def generic_documents(field: me.fields.BaseField) -> typing.List[typing.Tuple[str, typing.Optional[type]]]:
+    """
+    Returns ("_cls" value, document class) pairs of documents allowed by `choices` of a generic embedded document or
+    generic reference field, empty if the field has no choices. Generic embedded document fields also accept
+    instances of subclasses of their choices, which are included. Document class is None for names that are not
+    registered.
+
+    Args:
+        field(me.fields.BaseField): A GenericEmbeddedDocumentField or GenericReferenceField instance
+
+    Returns:
+        typing.List[typing.Tuple[str, typing.Optional[type]]]
+    """
+
+    documents = []
+    for choice in getattr(field, 'choices', None) or ():
+        document = _document_registry.get(choice) if isinstance(choice, str) else choice
+        if document is None:
+            documents.append((choice, None))
+            continue
+        names = document._subclasses if isinstance(field, me.fields.GenericEmbeddedDocumentField) else ()
+        for name in names or (document._class_name,):
+            doc_cls = _document_registry.get(name)
+            if doc_cls is not None and not doc_cls._meta.get('abstract', False) and (name, doc_cls) not in documents:
+                documents.append((name, doc_cls))
+    return documents
+
+
+def reference_id_type(document: type) -> str:
+    """
+    Returns JSON type of primary key values of given document class, i.e. of ids references to it are stored with.
+
+    Args:
+        document(type): A MongoEngine document class
+
+    Returns:
+        str
+    """
+
+    pk_field = document._fields.get(document._meta.get('id_field'))
+    return FIELD_TYPES.resolve(type(pk_field), 'string') if pk_field is not None else 'string'
+
+
+def _handle_embedded_doc_field(cls, name, field, ctx):
+    return cls._add_title(name, cls._parse_embedded_doc_field(field, ctx))
+
+
+def _handle_list_field(cls, name, field, ctx):
+    return cls._add_title(name, cls._parse_list_field(field, ctx))
+
+
+def _handle_geo_field(cls, name, field, ctx):
+    return cls._parse_geo_field(field)
+
+
+def _handle_generic_reference_field(cls, name, field, ctx):
+    if not getattr(field, 'choices', None):
+        return _handle_base_field(cls, name, field, ctx)
+    prop = cls._parse_generic_reference_field(field, ctx)
+    if getattr(field, 'required', False):
+        prop['required'] = True
+    return cls._add_title(name, prop)
+
+
+def _handle_base_field(cls, name, field, ctx):
+    return cls._add_title(name, cls._parse_field(field))
+
+
+FIELD_HANDLERS = FieldRegistry({
+    me.fields.EmbeddedDocumentField: _handle_embedded_doc_field,
+    me.fields.GenericEmbeddedDocumentField: _handle_embedded_doc_field,
+    me.fields.GenericReferenceField: _handle_generic_reference_field,
+    me.fields.ListField: _handle_list_field,
+    me.base.GeoJsonBaseField: _handle_geo_field,
+    me.base.BaseField: _handle_base_field,
+})
+
+
+def _handle_embedded_doc_item(cls, field, ctx):
+    return cls._parse_embedded_doc_field(field, ctx)
+
+
+def _handle_generic_reference_item(cls, field, ctx):
+    if not getattr(field, 'choices', None):
+        return _handle_base_item(cls, field, ctx)
+    return cls._parse_generic_reference_field(field, ctx)
+
+
+def _handle_geo_item(cls, field, ctx):
+    return cls._parse_geo_field(field)
+
+
+def _handle_base_item(cls, field, ctx):
+    return {'type': FIELD_TYPES.resolve(type(field), 'string')}
+
+
+LIST_ITEM_HANDLERS = FieldRegistry({
+    me.fields.EmbeddedDocumentField: _handle_embedded_doc_item,
+    me.fields.GenericEmbeddedDocumentField: _handle_embedded_doc_item,
+    me.fields.GenericReferenceField: _handle_generic_reference_item,
+    me.base.GeoJsonBaseField: _handle_geo_item,
+    me.base.BaseField: _handle_base_item,
+})
+
+
+# Callables called without arguments after a field handler, type or converter is registered, e.g. to drop cached
+# schemas and validators generated with the previous registrations
+_REGISTRATION_HOOKS = []
+
+
+def _registered() -> None:
+    for hook in _REGISTRATION_HOOKS:
+        hook()
+
+
+def register_field_handler(field_cls: type, handler: typing.Callable) -> None:
+    """
+    Registers a property generator for given field class and its subclasses. Handlers are called as
+    `handler(document_cls, name, field, ctx)` and must return the property JSON of the field, e.g.
+    `lambda cls, name, field, ctx: cls._add_title(name, {'type': 'string', 'format': 'ipv4'})`. Cached schemas are
+    cleared, so the handler applies to documents generated before too.
+
+    Args:
+        field_cls(type): A MongoEngine field class
+        handler(typing.Callable): Property generator
+    """
+
+    FIELD_HANDLERS.register(field_cls, handler)
+    _registered()
+
+
+def register_field_type(field_cls: type, json_type: str) -> None:
+    """
+    Registers JSON type of given field class and its subclasses, used for fields parsed as base fields and for list
+    and map items. Cached schemas are cleared, so the type applies to documents generated before too.
+
+    Args:
+        field_cls(type): A MongoEngine field class
+        json_type(str): JSON schema type, e.g. 'string'
+    """
+
+    FIELD_TYPES.register(field_cls, json_type)
+    _registered()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import typing
+
+import mongoengine as me
+
+from .fields import FIELD_HANDLERS, FIELD_TYPES, GEO_TYPES, LIST_ITEM_HANDLERS, SPECIAL_FIELDS, generic_documents
+from .version import __version__
+
+FINGERPRINT_ATTRS = ('required', 'default', 'min_value', 'max_value', 'min_length', 'max_length', 'choices', 'regex',
+                     'url_regex', 'exclude_from_schema')
+
+# Registries schema generation dispatches fields through, their entries are part of the generator fingerprint
+GENERATOR_REGISTRIES = (FIELD_HANDLERS, FIELD_TYPES, LIST_ITEM_HANDLERS, SPECIAL_FIELDS, GEO_TYPES)
+
+
+def _qualname(obj: type) -> str:
+    return f'{obj.__module__}.{obj.__qualname__}'
+
+
+def _value_signature(value: typing.Any) -> typing.Any:
+    if hasattr(value, 'pattern'):
+        return value.pattern
+    if isinstance(value, type):
+        return _qualname(value)
+    if callable(value):
+        return 'callable'
+    return repr(value)
+
+
+def _field_signature(field: me.fields.BaseField, seen: frozenset) -> list:
+    signature = [_qualname(type(field))]
+    signature.extend(_value_signature(getattr(field, attr, None)) for attr in FINGERPRINT_ATTRS)
+
+    inner_field = getattr(field, 'field', None)
+    if isinstance(inner_field, me.fields.BaseField):
+        signature.append(_field_signature(inner_field, seen))
+
+    if isinstance(field, me.fields.EmbeddedDocumentField):
+        try:
+            signature.append(_fingerprint(field.document_type_obj, seen))
+        except me.errors.NotRegistered:
+            signature.append(repr(field.document_type))
+
+    if isinstance(field, (me.fields.GenericEmbeddedDocumentField, me.fields.GenericReferenceField)):
+        signature.append([(name, _fingerprint(doc_cls, seen) if doc_cls is not None else None)
+                          for name, doc_cls in generic_documents(field)])
+    return signature
+
+
+def _document_signature(cls: type, seen: frozenset) -> typing.Any:
+    custom_schema = getattr(cls, '_JSONSCHEMA', None)
+    if custom_schema is not None:
+        return json.dumps(custom_schema, sort_keys=True, default=str)
+
+    fields = getattr(cls, '_fields', {})
+    declared_in = {}
+    for klass in reversed(cls.__mro__):
+        declared_in.update((key, _qualname(klass)) for key in klass.__dict__ if key in fields)
+    return [
+        [_qualname(klass) for klass in cls.__mro__],
+        [(key, declared_in.get(key), _field_signature(fields[key], seen))
+         for key in getattr(cls, '_fields_ordered', ())]
+    ]
+
+
+_FINGERPRINTS = {}
+
+
+def _fingerprint(cls: type, seen: frozenset) -> str:
+    name = _qualname(cls)
+    if name in seen:
+        # Self-referencing document, its own fingerprint is being computed
+        return name
+
+    fields_identity = tuple((key, id(field)) for key, field in getattr(cls, '_fields', {}).items())
+    cached = _FINGERPRINTS.get(cls)
+    if cached is not None and cached[0] == fields_identity:
+        return cached[1]
+
+    signature = json.dumps([name, _document_signature(cls, seen | {name})], sort_keys=True, default=str)
+    fingerprint = hashlib.sha256(signature.encode('utf-8')).hexdigest()
+    _FINGERPRINTS[cls] = (fields_identity, fingerprint)
+    return fingerprint
+
+
+def document_fingerprint(cls: type) -> str:
+    """
+    Returns a content fingerprint of a document class's schema-relevant definition: its bases, its fields with their
+    types and constraints, and fingerprints of embedded documents it uses, including documents allowed by `choices`
+    of generic fields. Unlike the in-process cache fingerprint, it is stable across processes, so it can be stored and
+    compared later to detect changed models. Fingerprints are memoized per class until its `_fields` change.
+
+    Args:
+        cls(type): A MongoEngine document class
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+
+    return _fingerprint(cls, frozenset())
+
+
+_SHAPES = {}
+
+
+def _shape_fields(field: me.fields.BaseField, seen: frozenset) -> typing.Iterator[str]:
+    yield _qualname(type(field))
+    inner_field = getattr(field, 'field', None)
+    if isinstance(inner_field, me.fields.BaseField):
+        yield from _shape_fields(inner_field, seen)
+
+    if isinstance(field, me.fields.EmbeddedDocumentField):
+        try:
+            yield _shape(field.document_type, seen)
+        except (AttributeError, me.errors.NotRegistered):
+            yield repr(field.document_type_obj)
+
+    if isinstance(field, (me.fields.GenericEmbeddedDocumentField, me.fields.GenericReferenceField)):
+        for name, doc_cls in generic_documents(field):
+            yield name
+            yield _shape(doc_cls, seen) if doc_cls is not None else ''
+
+
+def _shape(cls: type, seen: frozenset) -> str:
+    name = _qualname(cls)
+    if name in seen:
+        return name
+
+    fields = getattr(cls, '_fields', {})
+    fields_identity = (len(fields), *map(id, fields.values()))
+    cached = _SHAPES.get(cls)
+    if cached is not None and cached[0] == fields_identity:
+        return cached[1]
+
+    parts = [name, *(_qualname(klass) for klass in cls.__mro__)]
+    for key in getattr(cls, '_fields_ordered', ()):
+        parts.append(key)
+        parts.extend(_shape_fields(fields[key], seen | {name}))
+    shape = hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+    _SHAPES[cls] = (fields_identity, shape)
+    return shape
+
+
+def document_shape(cls: type) -> str:
+    """
+    Returns a fingerprint of a document class's structure only: its bases and the names and types of its fields and
+    of fields of embedded documents it uses, without field options. It is several times cheaper to compute than
+    `document_fingerprint()` and stable across processes, e.g. to check at startup that a schema exported earlier
+    still matches the document's fields.
+
+    Args:
+        cls(type): A MongoEngine document class
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+
+    return _shape(cls, frozenset())
+
+
+def _entry_signature(value: typing.Any) -> str:
+    if callable(value) and hasattr(value, '__qualname__'):
+        return _qualname(value)
+    return repr(value)
+
+
+# Generator fingerprints keyed by versions of the registries they were computed from
+_GENERATOR = {}
+
+
+def generator_fingerprint() -> str:
+    """
+    Returns a fingerprint of what turns document definitions into schemas: the package version and the field
+    handlers and types registered with it, e.g. by `register_field_handler()`. Schemas generated with a different
+    fingerprint may differ even if the documents did not change.
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+
+    versions = tuple(registry.version for registry in GENERATOR_REGISTRIES)
+    fingerprint = _GENERATOR.get(versions)
+    if fingerprint is None:
+        signature = json.dumps([__version__, *(sorted((_qualname(field_cls), _entry_signature(value))
+                                                      for field_cls, value in registry.items())
+                                               for registry in GENERATOR_REGISTRIES)])
+        fingerprint = _GENERATOR[versions] = hashlib.sha256(signature.encode('utf-8')).hexdigest()
+    return fingerprint
@@ -0,0 +1,111 @@
+import typing
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' object is read-only, use .to_dict() to get a mutable copy")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary used for cached schemas. It is a `dict` subclass, so it can be passed directly to `json`,
+    `jsonschema` and any code that expects a dictionary, but every mutating method raises `TypeError`. Since
+    instances never change, they are shared between calls and threads without copying, `copy.copy()` and
+    `copy.deepcopy()` return the same instance.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> 'FrozenDict':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'FrozenDict':
+        return self
+
+    def __reduce__(self) -> tuple:
+        return type(self), (dict(self),)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict.__repr__(self)})'
+
+    def to_dict(self) -> dict:
+        """
+        Returns a mutable deep copy made of plain dictionaries and lists.
+
+        Returns:
+            dict
+        """
+
+        return thaw(self)
+
+
+class FrozenList(list):
+    """Read-only list used for arrays in cached schemas. See FrozenDict."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self) -> 'FrozenList':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'FrozenList':
+        return self
+
+    def __reduce__(self) -> tuple:
+        return type(self), (list(self),)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list.__repr__(self)})'
+
+    def to_list(self) -> list:
+        """
+        Returns a mutable deep copy made of plain dictionaries and lists.
+
+        Returns:
+            list
+        """
+
+        return thaw(self)
+
+
+def freeze(value: typing.Any) -> typing.Any:
+    """
+    Returns a read-only version of given JSON-like value. Dictionaries and lists are converted recursively, values
+    that are already frozen are reused as they are, so frozen sub-schemas are shared instead of copied.
+
+    Args:
+        value(typing.Any): A JSON-like value
+
+    Returns:
+        typing.Any
+    """
+
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: typing.Any) -> typing.Any:
+    """
+    Returns a mutable deep copy of given JSON-like value, converting frozen containers to plain dictionaries and lists.
+
+    Args:
+        value(typing.Any): A JSON-like value
+
+    Returns:
+        typing.Any
+    """
+
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
@@ -1,71 +1,213 @@
+import hashlib
+import json
 import typing
 import re
+import threading
+from collections import namedtuple
 
 import mongoengine as me
 import mongoengine.base
 
+from . import aio, batch
+from .compiler import compile_converter, compile_partial_validator, compile_validator
+from .fields import (_REGISTRATION_HOOKS, ATTR_MAP, DISCRIMINATOR, FIELD_HANDLERS, FIELD_TYPES, GEO_TYPES,
+                     LIST_ITEM_HANDLERS, POINT_PROP, SPECIAL_FIELDS, generic_documents, reference_id_type)
+from .fields import TYPE_MAP, register_field_handler, register_field_type  # noqa: F401
+from .frozen import freeze
+from .mongo import mongo_json_schema, mongo_validator_command
+from .polymorphic import (compile_polymorphic_validator, discriminated_branch, discriminated_union,
+                          polymorphic_json_schema)
+from .profiling import GenerationProfiler
+from .rawbson import compile_raw_bson_validator
+from .validation import build_validator
+
+
+SchemaCacheInfo = namedtuple('SchemaCacheInfo', ['hits', 'misses', 'currsize'])
+
+
+class _SchemaCache:
+    """
+    Thread-safe store for generated schemas keyed by (document class, strict, use_defs). Each entry remembers the
+    fingerprint of the class's fields at generation time, a tuple of objects compared by identity, so added, removed
+    or replaced fields are treated as a miss. Values derived from a schema (serialized bytes, validators, etc.) are
+    stored on the same entry and are dropped together with it.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, fingerprint: tuple) -> typing.Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and len(entry[0]) == len(fingerprint) and \
+                    all(one is two for one, two in zip(entry[0], fingerprint)):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key: tuple, fingerprint: tuple, schema: dict) -> None:
+        with self._lock:
+            self._entries[key] = (fingerprint, schema, {})
+
+    def derive(self, key: tuple, schema: dict, name: str, factory: typing.Callable[[dict], typing.Any]) -> typing.Any:
+        """
+        Returns value derived from given cached schema, calling `factory(schema)` on first access. If the schema is
+        no longer the cached one, the value is computed but not stored.
+        """
 
-TYPE_MAP = {
-    'BinaryField': 'string',
-    'BooleanField': 'boolean',
-    'CachedReferenceField': 'string',
-    'ComplexDateTimeField': 'string',
-    'DateField': 'string',
-    'DateTimeField': 'string',
-    'Decimal128Field': 'number',
-    'DecimalField': 'number',
-    'DictField': 'object',
-    'EmailField': 'string',
-    'EnumField': 'string',
-    'FloatField': 'number',
-    'GenericReferenceField': 'string',
-    'GenericLazyReferenceField': 'string',
-    'GeoPointField': 'array',
-    'IntField': 'integer',
-    'LongField': 'integer',
-    'MapField': 'object',
-    'ObjectIdField': 'string',
-    'ReferenceField': 'string',
-    'LazyReferenceField': 'string',
-    'SequenceField': 'integer',
-    'StringField': 'string',
-    'URLField': 'string',
-    'UUIDField': 'string',
-}
-
-ATTR_MAP = {'required': 'required',
-            'default': 'default',
-            'min_value': 'minimum',
-            'max_value': 'maximum',
-            'min_length': 'minLength',
-            'max_length': 'maxLength',
-            'choices': 'enum',
-            'regex': 'pattern',
-            'url_regex': 'pattern'}
-
-POINT_PROP = {
-    'type': 'array',
-    'prefixItems': [
-        {
-            'type': 'number',  # longitude
-            'min_value': -180,
-            'max_value': 180
-        },
-        {
-            'type': 'number',  # latitude
-            'min_value': -90,
-            'max_value': 90
-        }
-    ],
-    'items': False
-}
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is schema and name in entry[2]:
+                return entry[2][name]
+
+        value = factory(schema)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is schema:
+                return entry[2].setdefault(name, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> SchemaCacheInfo:
+        with self._lock:
+            return SchemaCacheInfo(self.hits, self.misses, len(self._entries))
+
+
+_SCHEMA_CACHE = _SchemaCache()
+_IN_PROGRESS = threading.local()
+
+# Callables `source(document_cls, strict, use_defs)` consulted on cache miss before generating a schema. A source
+# returns a ready FrozenDict schema or None to fall through to the next source or to generation.
+_SCHEMA_SOURCES = []
+
+
+def _in_progress() -> list:
+    """Returns cache keys of schemas currently being generated by the calling thread, outermost first."""
+
+    keys = getattr(_IN_PROGRESS, 'keys', None)
+    if keys is None:
+        keys = _IN_PROGRESS.keys = []
+        _IN_PROGRESS.dependent = set()
+    return keys
+
+
+def _refer_to_in_progress(key: tuple) -> None:
+    """
+    Records that the schema being generated refers to the enclosing schema of given in-progress key, e.g. with a
+    "$ref" to its "$id". Schemas nested between the two are only valid inside the enclosing one, so they are not
+    cached.
+    """
+
+    keys = _in_progress()
+    _IN_PROGRESS.dependent.update(keys[keys.index(key) + 1:])
+
+
+def _is_dependent(key: tuple) -> bool:
+    """Returns True if the schema of given key, just generated, refers to a schema enclosing it."""
+
+    _in_progress()
+    dependent = key in _IN_PROGRESS.dependent
+    _IN_PROGRESS.dependent.discard(key)
+    return dependent
+
+
+def _fields_fingerprint(cls) -> tuple:
+    """
+    Returns an identity fingerprint of a document class's fields: the `_fields` mapping and `_fields_ordered` tuple
+    and the field objects themselves. Assigning new ones, or adding, removing or replacing a field in place,
+    invalidates cached schemas of that class. Field objects are kept alive by the cache entry, so their identity is
+    never reused by new fields.
+    """
+
+    fields = getattr(cls, '_fields', None)
+    return (fields, getattr(cls, '_fields_ordered', None), *(fields.values() if fields is not None else ()))
+
+
+def clear_schema_cache() -> None:
+    """
+    Drops all cached schemas and resets hit/miss counters. Call this after modifying a document class in a way that
+    is not reflected in its own `_fields` (e.g. changing a field of an embedded document it uses).
+    """
+
+    _SCHEMA_CACHE.clear()
+
+
+_REGISTRATION_HOOKS.append(clear_schema_cache)
+
+
+def schema_cache_info() -> SchemaCacheInfo:
+    """
+    Returns schema cache statistics.
+
+    Returns:
+        SchemaCacheInfo: Named tuple of (hits, misses, currsize)
+    """
+
+    return _SCHEMA_CACHE.info()
+
+
+def _schema_parents(cls: type) -> list:
+    """
+    Returns the nearest ancestors of a document class, one per base class, whose schemas its schema extends. Documents
+    that do not inherit JsonSchemaMixin are skipped, their fields are not part of the schema.
+    """
+
+    parents = []
+    for base in cls.__bases__:
+        parent = next((klass for klass in base.__mro__ if klass is not JsonSchemaMixin
+                       and issubclass(klass, JsonSchemaMixin) and hasattr(klass, '_fields')), None)
+        if parent is not None and parent not in parents:
+            parents.append(parent)
+    return parents
+
+
+def _nested_schema(doc_cls: type, ctx: 'SchemaContext', use_defs: bool) -> dict:
+    """
+    Returns schema of a document used by the one being generated. While profiling, it is generated without the cache
+    so that its fields are profiled too.
+    """
+
+    if ctx.profiler is None or getattr(doc_cls, '_JSONSCHEMA', None) is not None:
+        return doc_cls.json_schema(strict=ctx.strict, use_defs=use_defs)
+    return doc_cls._build_json_schema(ctx.strict, use_defs, ctx.profiler)
+
+
+class SchemaContext:
+    """
+    Options of a single schema generation call. A new context is created for every generation and passed down to
+    parser methods explicitly, so concurrent calls with different options never share state.
+
+    Args:
+        strict(bool): If True, adds "required" keys to generated schemas.
+        use_defs(bool): If True, embedded documents are collected once in `defs` and referenced with "$ref".
+        profiler(typing.Optional[GenerationProfiler]): If given, parsing of documents and fields is profiled.
+    """
+
+    __slots__ = ('strict', 'use_defs', 'defs', 'profiler')
+
+    def __init__(self, strict: bool = True, use_defs: bool = False,
+                 profiler: typing.Optional[GenerationProfiler] = None):
+        self.strict = strict
+        self.use_defs = use_defs
+        self.defs = {}
+        self.profiler = profiler
+
+    def __repr__(self) -> str:
+        return f'SchemaContext(strict={self.strict!r}, use_defs={self.use_defs!r})'
 
 
 class JsonSchemaMixin:
     """Mixin class that adds generating JSON schema functionality directly to MongoEngine documents."""
 
-    _STRICT = False
-
     @classmethod
     def _get_title(cls, name: str) -> str:
         """
@@ -114,37 +256,9 @@ class JsonSchemaMixin:
             dict
         """
 
-        if isinstance(field, me.fields.GeoPointField):
-            return POINT_PROP
-
-        elif isinstance(field, me.fields.UUIDField):
-            return {'format': 'uuid'}
-
-        elif isinstance(field, me.fields.EmailField):
-            return {'format': 'email'}
-
-        elif isinstance(field, me.fields.DateField):
-            return {'format': 'date'}
-
-        elif isinstance(field, (me.fields.DateTimeField, me.fields.ComplexDateTimeField)):
-            return {'format': 'date-time'}
-
-        elif isinstance(field, me.fields.URLField):
-            return {'format': 'uri'}
-
-        elif isinstance(field, me.fields.EnumField):
-            _field = getattr(field, 'choices', None)
-            return {'enum': [e.value for e in _field]}
-
-        elif isinstance(field, me.fields.MapField):
-            _field = getattr(field, 'field', None)
-            _field_type = TYPE_MAP.get(type(_field).__name__, None)
-
-            if None not in (_field, _field_type):
-                return {'patternProperties': {
-                    ".*": {"type": TYPE_MAP.get(type(_field).__name__, None)}
-                }
-                }
+        _parser = SPECIAL_FIELDS.resolve(type(field))
+        if _parser is not None:
+            return _parser(field)
 
     @classmethod
     def _parse_field(cls, field: me.fields.BaseField) -> dict:
@@ -157,7 +271,7 @@ class JsonSchemaMixin:
         Returns:
             dict
         """
-        _type = TYPE_MAP.get(type(field).__name__, None)
+        _type = FIELD_TYPES.resolve(type(field))
         field_dict = {'type': _type} if _type is not None else {}
         _parsed_special = cls._parse_special_fields(field)
         if _parsed_special is not None:
@@ -181,14 +295,18 @@ class JsonSchemaMixin:
 
     @classmethod
     def _parse_embedded_doc_field(cls, field: typing.Union[me.fields.EmbeddedDocumentField,
-                                                           me.fields.GenericEmbeddedDocumentField] = None):
+                                                           me.fields.GenericEmbeddedDocumentField] = None,
+                                  ctx: SchemaContext = None):
         """
         Generates JSON schema for given EmbeddedDocumentField and returns it. Make sure the embedded document
         class also inherits this mixin class (JsonSchemaMixin) or this method will return an empty dictionary.
+        GenericEmbeddedDocumentFields are parsed as objects, or by `_parse_generic_embedded_doc_field` if they have
+        choices.
 
         Args:
             field(typing.Union[me.fields.EmbeddedDocumentField, me.fields.GenericEmbeddedDocumentField]):
                 A MongoEngine EmbeddedDocumentField instance
+            ctx(SchemaContext): Generation options. Defaults to a strict context.
 
         Returns:
             dict
@@ -198,15 +316,110 @@ class JsonSchemaMixin:
             return {}
 
         elif isinstance(field, me.fields.GenericEmbeddedDocumentField):
+            if getattr(field, 'choices', None):
+                return cls._parse_generic_embedded_doc_field(field, ctx)
             return {
                 'type': 'object'
             }
 
+        ctx = ctx or SchemaContext()
         try:
-            return field.document_type_obj.json_schema(strict=cls._STRICT)
-        except AttributeError:
+            doc_cls = field.document_type
+            if ctx.use_defs:
+                return doc_cls._definition_ref(ctx)
+            if (doc_cls, ctx.strict, ctx.use_defs) in _in_progress():
+                # Self-referencing document, refer to the enclosing inlined schema by its "$id"
+                _refer_to_in_progress((doc_cls, ctx.strict, ctx.use_defs))
+                return {'$ref': f'/schemas/{doc_cls.__name__}'}
+            return _nested_schema(doc_cls, ctx, False)
+        except (AttributeError, me.errors.NotRegistered):
             return {}
 
+    @classmethod
+    def _parse_generic_embedded_doc_field(cls, field: me.fields.GenericEmbeddedDocumentField,
+                                          ctx: SchemaContext = None) -> dict:
+        """
+        Generates JSON schema for a GenericEmbeddedDocumentField with choices: a union of the allowed embedded
+        documents switched on the "_cls" value MongoEngine stores generic embedded documents with. Each branch is the
+        schema of a document with its "_cls" value, shared under "$defs" if `use_defs` is set. Branches of documents
+        that do not inherit this mixin class, or that would recurse into an inlined document, allow any properties.
+
+        Args:
+            field(me.fields.GenericEmbeddedDocumentField): A MongoEngine GenericEmbeddedDocumentField instance
+            ctx(SchemaContext): Generation options. Defaults to a strict context.
+
+        Returns:
+            dict
+        """
+
+        ctx = ctx or SchemaContext()
+        branches, mapping = [], {}
+        for name, doc_cls in generic_documents(field):
+            if not hasattr(doc_cls, '_definition_ref'):
+                branch = {}
+            elif ctx.use_defs:
+                branch = doc_cls._definition_ref(ctx, discriminated=True)
+                mapping[name] = branch['$ref']
+            elif (doc_cls, ctx.strict, False) in _in_progress():
+                # The enclosing inlined schema does not allow "_cls", so it cannot be referred to by its "$id"
+                _refer_to_in_progress((doc_cls, ctx.strict, False))
+                branch = {}
+            else:
+                branch = discriminated_branch(_nested_schema(doc_cls, ctx, False), name)
+            branches.append((name, branch))
+        return discriminated_union(branches, strict=ctx.strict, mapping=mapping)
+
+    @classmethod
+    def _parse_generic_reference_field(cls, field: me.fields.GenericReferenceField, ctx: SchemaContext = None) -> dict:
+        """
+        Generates JSON schema for a GenericReferenceField or GenericLazyReferenceField with choices. Generic
+        references are stored as `{"_cls": ..., "_ref": ...}` objects, so they are defined as a union switched on
+        "_cls" whose branches check the type of "_ref", i.e. of the referenced document's primary key. Branches are
+        inlined even if `use_defs` is set, as they are smaller than references to them.
+
+        Args:
+            field(me.fields.GenericReferenceField): A MongoEngine GenericReferenceField instance
+            ctx(SchemaContext): Generation options. Defaults to a strict context.
+
+        Returns:
+            dict
+        """
+
+        ctx = ctx or SchemaContext()
+        union = discriminated_union([(name, {'properties': {'_ref': {'type': reference_id_type(doc_cls)}}}
+                                     if doc_cls is not None else {})
+                                     for name, doc_cls in generic_documents(field)], strict=False)
+        union['properties']['_ref'] = {}
+        union['additionalProperties'] = False
+        if ctx.strict:
+            # "required" of the property is the field's own flag, collected into the document's "required" list
+            union['allOf'].insert(0, {'required': [DISCRIMINATOR, '_ref']})
+        return union
+
+    @classmethod
+    def _definition_ref(cls, ctx: SchemaContext, discriminated: bool = False) -> dict:
+        """
+        Adds document schema to shared definitions of given context, unless it is already there, and returns a "$ref"
+        to it. The definition slot is reserved before generation, so self-referencing documents resolve to a "$ref"
+        instead of recursing endlessly.
+
+        Args:
+            ctx(SchemaContext): Generation options and collected definitions
+            discriminated(bool): If True, the definition is a branch of a union switched on "_cls", i.e. the schema
+                                 with its "_cls" value, named "<document>:_cls". Defaults to False.
+
+        Returns:
+            dict
+        """
+
+        name = getattr(cls, '_class_name', cls.__name__)
+        def_name = f'{name}:{DISCRIMINATOR}' if discriminated else name
+        if def_name not in ctx.defs:
+            ctx.defs[def_name] = None
+            schema = {k: v for k, v in cls._generate(ctx).items() if k != '$id'}
+            ctx.defs[def_name] = discriminated_branch(schema, name) if discriminated else schema
+        return {'$ref': f'#/$defs/{def_name}'}
+
     @classmethod
     def _parse_geo_field(cls, field: me.base.GeoJsonBaseField = None) -> dict:
         """
@@ -223,67 +436,40 @@ class JsonSchemaMixin:
         if field is None:
             return {}
 
+        _geo_type, _depth = GEO_TYPES.resolve(type(field), ('Point', 0))
         _coord_prop = POINT_PROP
-        _prop = {
+        for _ in range(_depth):
+            _coord_prop = {
+                'type': 'array',
+                'items': _coord_prop
+            }
+
+        _title = cls._get_title(getattr(field, 'name', ''))
+        return {
             'anyOf': [
                 {
                     'type': 'object',
-                    'title': cls._get_title(getattr(field, 'name', '')),
+                    'title': _title,
                     'properties': {
                         'type': {
                             'type': 'string',
-                            'enum': ['Point']
+                            'enum': [_geo_type]
                         },
                         'coordinates': _coord_prop
                     }
                 },
-                {**_coord_prop, 'title': cls._get_title(getattr(field, 'name', ''))}
+                {**_coord_prop, 'title': _title}
             ]
         }
 
-        if isinstance(field, (me.fields.LineStringField, me.fields.MultiPointField)):
-            _prop['anyOf'][0]['properties']['type']['enum'] = ['LineString'] \
-                if isinstance(field, me.fields.LineStringField) else ['MultiPoint']
-            _coord_prop = {
-                'type': 'array',
-                'items': POINT_PROP
-            }
-
-        elif isinstance(field, (me.fields.PolygonField, me.fields.MultiLineStringField)):
-            _prop['anyOf'][0]['properties']['type']['enum'] = ['Polygon'] \
-                if isinstance(field, me.fields.PolygonField) else ['MultiLineString']
-            _coord_prop = {
-                'type': 'array',
-                'items': {
-                    'type': 'array',
-                    'items': POINT_PROP
-                }
-            }
-
-        elif isinstance(field, me.fields.MultiPolygonField):
-            _prop['anyOf'][0]['properties']['type']['enum'] = ['MultiPolygon']
-            _coord_prop = {
-                'type': 'array',
-                'items': {
-                    'type': 'array',
-                    'items': {
-                        'type': 'array',
-                        'items': POINT_PROP
-                    }
-                }
-            }
-
-        _prop['anyOf'][0]['properties']['coordinates'] = _coord_prop
-        _prop['anyOf'][1] = {**_coord_prop, 'title': cls._get_title(getattr(field, 'name', ''))}
-        return _prop
-
     @classmethod
-    def _parse_list_field(cls, field: me.fields.ListField) -> dict:
+    def _parse_list_field(cls, field: me.fields.ListField, ctx: SchemaContext = None) -> dict:
         """
         Generates JSON schema for given list field and returns it.
 
         Args:
             field(me.fields.ListField): An instance of a MongoEngine ListField.
+            ctx(SchemaContext): Generation options. Defaults to a strict context.
 
         Returns:
             dict
@@ -295,75 +481,505 @@ class JsonSchemaMixin:
         if getattr(field, 'required', False):
             field_dict['minItems'] = 1
 
-        if isinstance(_field, (me.fields.EmbeddedDocumentField, me.fields.GenericEmbeddedDocumentField)):
-            field_dict['items'] = cls._parse_embedded_doc_field(_field)
-
-        elif isinstance(_field, me.base.GeoJsonBaseField):
-            field_dict['items'] = cls._parse_geo_field(_field)
-
-        elif isinstance(_field, me.base.BaseField):
-            field_dict['items'] = {'type': TYPE_MAP.get(type(_field).__name__, 'string')}
+        _handler = LIST_ITEM_HANDLERS.resolve(type(_field))
+        if _handler is not None:
+            field_dict['items'] = _handler(cls, _field, ctx)
 
         return field_dict
 
     @classmethod
-    def _parse(cls) -> dict:
+    def _parse(cls, ctx: SchemaContext) -> dict:
         """
         Parses the MongoEngine document model and its fields. Generates and returns JSON schema for document. Fields
         are split into four categories: embedded document fields, list fields, geo JSON fields and base fields.
+        Only fields declared on this class are parsed, in declaration order, fields inherited from parent documents
+        are merged by `_generate`.
+
+        Args:
+            ctx(SchemaContext): Generation options
 
         Returns:
             dict
         """
 
         model_dict = {}
-        for key, value in cls.__dict__.items():
-            if not (isinstance(key, str) and
-                    not key.startswith('_') and
-                    key not in ['objects', 'id',
-                                'DoesNotExist',
-                                'MultipleObjectsReturned'] and
-                    value is not None and not getattr(value, 'exclude_from_schema', False)):
+        _own = cls.__dict__
+        _fields = getattr(cls, '_fields', {})
+        for key in getattr(cls, '_fields_ordered', ()):
+            if key.startswith('_') or key == 'id' or key not in _own:
                 continue
 
-            if isinstance(value, (me.fields.EmbeddedDocumentField, me.fields.GenericEmbeddedDocumentField)):
-                model_dict = {**model_dict, key: cls._add_title(key, cls._parse_embedded_doc_field(value))}
-
-            elif isinstance(value, me.fields.ListField):
-                model_dict = {**model_dict, key: cls._add_title(key, cls._parse_list_field(value))}
-
-            elif isinstance(value, me.base.GeoJsonBaseField):
-                model_dict = {**model_dict, key: cls._parse_geo_field(value)}
+            value = _fields[key]
+            if getattr(value, 'exclude_from_schema', False):
+                continue
 
-            elif isinstance(value, me.base.BaseField):
-                model_dict = {**model_dict, key: cls._add_title(key, cls._parse_field(value))}
+            _handler = FIELD_HANDLERS.resolve(type(value))
+            if _handler is None:
+                continue
+            if ctx.profiler is None:
+                model_dict[key] = _handler(cls, key, value, ctx)
+            else:
+                model_dict[key] = ctx.profiler.field(cls, key, value, lambda: _handler(cls, key, value, ctx))
 
         return model_dict
 
     @classmethod
-    def json_schema(cls, strict: bool = True) -> dict:
+    def json_schema(cls, strict: bool = True, use_defs: bool = False) -> dict:
         """
-        Generates JSON schema.
+        Returns JSON schema. Schemas are cached per document class, `strict` and `use_defs` values and returned as
+        read-only FrozenDict instances that are shared between calls and threads. Use `.to_dict()` on the result to
+        get a mutable copy.
 
         Args:
             strict(bool): If True, adds "required" key to schema. Defaults to True. Setting to False is useful for
                           validating JSONs when updating documents using HTTP PATCH method.
+            use_defs(bool): If True, schema of each embedded document is emitted once under "$defs" and referenced
+                            with "$ref" at every use site. Defaults to False.
 
         Returns:
-            dict
+            FrozenDict
         """
 
-        cls._STRICT = strict
+        custom_schema = getattr(cls, '_JSONSCHEMA', None)
+        if custom_schema is not None:
+            return cls._custom_json_schema(custom_schema, strict)
+
+        key = (cls, strict, use_defs)
+        fingerprint = _fields_fingerprint(cls)
+        schema = _SCHEMA_CACHE.get(key, fingerprint)
+        if schema is None:
+            for source in _SCHEMA_SOURCES:
+                schema = source(cls, strict, use_defs)
+                if schema is not None:
+                    break
+            else:
+                schema = cls._build_json_schema(strict, use_defs)
+                if _is_dependent(key):
+                    # Generated inside a document it refers to, the schema is not valid on its own
+                    return schema
+            _SCHEMA_CACHE.set(key, fingerprint, schema)
+        return schema
+
+    @classmethod
+    def _build_json_schema(cls, strict: bool, use_defs: bool,
+                           profiler: typing.Optional[GenerationProfiler] = None) -> dict:
+        """
+        Generates complete read-only JSON schema, including shared definitions, without consulting the cache.
+
+        Args:
+            strict(bool): If True, adds "required" key to schema.
+            use_defs(bool): If True, embedded documents are emitted under "$defs".
+            profiler(typing.Optional[GenerationProfiler]): If given, generation is profiled.
+
+        Returns:
+            FrozenDict
+        """
 
+        key = (cls, strict, use_defs)
+        ctx = SchemaContext(strict=strict, use_defs=use_defs, profiler=profiler)
+        in_progress = _in_progress()
+        in_progress.append(key)
         try:
-            schema = getattr(cls, '_JSONSCHEMA')
-            if not cls._STRICT and 'required' in schema.keys():
-                del schema['required']
-            return schema
-        except AttributeError:
-            pass
-
-        model_properties = cls._parse()
+            schema = cls._generate(ctx)
+        finally:
+            in_progress.pop()
+            if not in_progress:
+                _IN_PROGRESS.dependent.clear()
+        if ctx.defs:
+            schema['$defs'] = ctx.defs
+        return freeze(schema)
+
+    @classmethod
+    def _derived(cls, name: str, factory: typing.Callable[[dict], typing.Any], strict: bool = True,
+                 use_defs: bool = False) -> typing.Any:
+        """
+        Returns a value computed from the schema by `factory(schema)` and cached alongside it, so it is invalidated
+        together with the schema.
+
+        Args:
+            name(str): Unique name of the derived value
+            factory(typing.Callable[[dict], typing.Any]): Function computing the value from the schema
+            strict(bool): Passed to `json_schema()`
+            use_defs(bool): Passed to `json_schema()`
+
+        Returns:
+            typing.Any
+        """
+
+        schema = cls.json_schema(strict=strict, use_defs=use_defs)
+        use_defs = use_defs and getattr(cls, '_JSONSCHEMA', None) is None
+        return _SCHEMA_CACHE.derive((cls, strict, use_defs), schema, name, factory)
+
+    @classmethod
+    def json_schema_bytes(cls, strict: bool = True, use_defs: bool = False) -> bytes:
+        """
+        Returns JSON schema serialized to canonical UTF-8 encoded JSON (sorted keys, no whitespace). Serialized bytes
+        are cached with the schema, which makes serving the schema over HTTP nearly free.
+
+        Args:
+            strict(bool): Passed to `json_schema()`. Defaults to True.
+            use_defs(bool): Passed to `json_schema()`. Defaults to False.
+
+        Returns:
+            bytes
+        """
+
+        return cls._derived('bytes', lambda schema: json.dumps(schema, sort_keys=True, separators=(',', ':'),
+                                                               ensure_ascii=False, default=str).encode('utf-8'),
+                            strict=strict, use_defs=use_defs)
+
+    @classmethod
+    def json_schema_etag(cls, strict: bool = True, use_defs: bool = False) -> str:
+        """
+        Returns SHA-256 hex digest of `json_schema_bytes()`. The value is stable across processes as long as the
+        generated schema does not change, so it can be used as an HTTP ETag.
+
+        Args:
+            strict(bool): Passed to `json_schema()`. Defaults to True.
+            use_defs(bool): Passed to `json_schema()`. Defaults to False.
+
+        Returns:
+            str
+        """
+
+        return cls._derived('etag', lambda schema: hashlib.sha256(
+            cls.json_schema_bytes(strict=strict, use_defs=use_defs)).hexdigest(), strict=strict, use_defs=use_defs)
+
+    @classmethod
+    def profile_json_schema(cls, strict: bool = True, use_defs: bool = False,
+                            profiler: typing.Optional[GenerationProfiler] = None) -> GenerationProfiler:
+        """
+        Generates JSON schema with profiling enabled, bypassing the cache, and returns the profiler with wall time,
+        nesting depth and serialized size of every parsed document and field. Embedded and parent documents are
+        generated again too, so the profile covers the whole schema. The cache is not modified.
+
+        Args:
+            strict(bool): Passed to `json_schema()`. Defaults to True.
+            use_defs(bool): Passed to `json_schema()`. Defaults to False.
+            profiler(typing.Optional[GenerationProfiler]): Profiler to record into, e.g. one with callbacks. Defaults
+                                                           to a new profiler.
+
+        Returns:
+            GenerationProfiler
+        """
+
+        profiler = profiler or GenerationProfiler()
+        if getattr(cls, '_JSONSCHEMA', None) is None:
+            cls._build_json_schema(strict, use_defs, profiler)
+        return profiler
+
+    @classmethod
+    def json_validator(cls, strict: bool = True, use_defs: bool = False) -> typing.Any:
+        """
+        Returns a `jsonschema` validator for the document's JSON schema. The schema is checked and the validator is
+        built once, then cached alongside the schema, so it can be reused for every validation, e.g.
+        `Person.json_validator().validate(data)` or `Person.json_validator().iter_errors(data)`.
+
+        Args:
+            strict(bool): Passed to `json_schema()`. Defaults to True.
+            use_defs(bool): Passed to `json_schema()`. Defaults to False.
+
+        Returns:
+            jsonschema.protocols.Validator
+        """
+
+        return cls._derived('validator', build_validator, strict=strict, use_defs=use_defs)
+
+    @classmethod
+    def compiled_converter(cls, strict: bool = True, construct: bool = False) -> typing.Any:
+        """
+        Returns a compiled validator that also converts JSON values to Python values of the document's fields, see
+        `from_json_validated()`. It is compiled once and cached alongside the schema.
+
+        Args:
+            strict(bool): If True, required properties are checked. Defaults to True.
+            construct(bool): If True, converted values are returned as a document instance. Defaults to False.
+
+        Returns:
+            CompiledConverter
+        """
+
+        return cls._derived(f'compiled_converter_{construct}',
+                            lambda schema: compile_converter(cls, strict=strict, construct=construct), strict=strict)
+
+    @classmethod
+    def from_json_validated(cls, data: typing.Any, construct: bool = False, strict: bool = True) -> typing.Any:
+        """
+        Validates JSON data and converts values of fields defined as strings in the schema to their Python types in a
+        single traversal, e.g. `ObjectIdField` and reference fields to `bson.ObjectId`, `DateTimeField` to `datetime`,
+        `UUIDField` to `uuid.UUID`, `DecimalField` to `decimal.Decimal`, `BinaryField` from base64 to `bytes` and
+        `EnumField` to its enum. Given data is not modified.
+
+        Args:
+            data(typing.Any): JSON document
+            construct(bool): If True, returns a document instance with embedded documents constructed as well.
+                             Defaults to False, returning a dict.
+            strict(bool): If True, required properties are checked. Defaults to True.
+
+        Returns:
+            typing.Any: Converted dict, or document instance if `construct` is True
+
+        Raises:
+            jsonschema.exceptions.ValidationError: If data is invalid or a value cannot be converted
+        """
+
+        return cls.compiled_converter(strict=strict, construct=construct).convert(data)
+
+    @classmethod
+    def partial_validator(cls) -> typing.Any:
+        """
+        Returns a compiled validator of partial updates, e.g. PATCH payloads, that validates only the keys present in
+        the update against their field's schema and rejects unknown keys. Field validators are compiled once and
+        cached alongside the schema.
+
+        Returns:
+            PartialValidator
+        """
+
+        return cls._derived('partial_validator', lambda schema: compile_partial_validator(cls))
+
+    @classmethod
+    def validate_partial(cls, patch: dict) -> None:
+        """
+        Validates a partial update of the document, unlike `json_schema(strict=False)` only fields present in `patch`
+        are checked. Values are validated as a whole, e.g. a replaced embedded document must have its required
+        fields.
+
+        Args:
+            patch(dict): Field names and their new values
+
+        Raises:
+            jsonschema.exceptions.ValidationError: If a value is invalid or a key is not a field of the document
+        """
+
+        cls.partial_validator().validate(patch)
+
+    @classmethod
+    def raw_bson_validator(cls, strict: bool = True) -> typing.Any:
+        """
+        Returns a validator of BSON documents as stored in the database, e.g. read with
+        `bson.raw_bson.RawBSONDocument` as document class, that decodes only the elements the schema constrains
+        beyond their type. It is built once and cached alongside the schema.
+
+        Args:
+            strict(bool): If True, required properties are checked. Defaults to True.
+
+        Returns:
+            RawBSONValidator
+        """
+
+        return cls._derived('raw_bson_validator', lambda schema: compile_raw_bson_validator(cls, strict=strict),
+                            strict=strict)
+
+    @classmethod
+    def validate_many(cls, iterable: typing.Iterable, workers: typing.Optional[int] = None,
+                      chunk_size: int = batch.DEFAULT_CHUNK_SIZE, strict: bool = True,
+                      use_defs: bool = False) -> typing.Iterator[typing.Tuple[int, list]]:
+        """
+        Validates many instances against the document's JSON schema, e.g. records of a bulk import, and yields
+        `(index, errors)` of invalid instances in input order. Errors are lists of `(path, message)` tuples. Instances
+        are validated in chunks, optionally in a pool of worker processes, each holding a validator built once.
+
+        Args:
+            iterable(typing.Iterable): Instances to validate, consumed lazily
+            workers(typing.Optional[int]): Number of worker processes. Defaults to None, validating in this process.
+            chunk_size(int): Number of instances validated per task. Defaults to 1000.
+            strict(bool): Passed to `json_schema()`. Defaults to True.
+            use_defs(bool): Passed to `json_schema()`. Defaults to False.
+
+        Returns:
+            typing.Iterator[typing.Tuple[int, list]]
+        """
+
+        return batch.validate_many(cls.json_validator(strict=strict, use_defs=use_defs), iterable, workers=workers,
+                                   chunk_size=chunk_size)
+
+    @classmethod
+    def compiled_validator(cls, strict: bool = True) -> typing.Any:
+        """
+        Returns a validator generated as specialized Python code for this document class from its fields, similar to
+        what fastjsonschema does for schemas. It accepts the same documents as `json_validator()` but validates them
+        considerably faster. The validator is compiled once and cached alongside the schema.
+
+        Args:
+            strict(bool): If True, required properties are checked. Defaults to True.
+
+        Returns:
+            CompiledValidator
+        """
+
+        return cls._derived('compiled_validator', lambda schema: compile_validator(cls, strict=strict), strict=strict)
+
+    @classmethod
+    async def avalidate(cls, payload: typing.Any, strict: bool = True) -> typing.Any:
+        """
+        Validates a payload with `compiled_validator()` from async code, e.g. in request handlers. Small payloads are
+        validated inline, large ones in a bounded thread pool so the event loop is not blocked. Thresholds are set
+        with `configure_async_validation()`, metrics are read with `async_validation_info()`.
+
+        Args:
+            payload(typing.Any): JSON document, or raw JSON as str or bytes which is parsed first
+            strict(bool): Passed to `compiled_validator()`. Defaults to True.
+
+        Returns:
+            typing.Any: Validated JSON document
+
+        Raises:
+            jsonschema.exceptions.ValidationError: If the payload is invalid
+        """
+
+        return await aio.avalidate(cls.compiled_validator(strict=strict), payload)
+
+    @classmethod
+    async def avalidate_many(cls, payloads: typing.Sequence, strict: bool = True,
+                             chunk_size: int = batch.DEFAULT_CHUNK_SIZE) -> typing.List[typing.Tuple[int, list]]:
+        """
+        Async variant of `validate_many()` using `compiled_validator()`. Returns `(index, errors)` of invalid payloads
+        in input order. Large batches are validated in chunks in a bounded thread pool.
+
+        Args:
+            payloads(typing.Sequence): JSON documents
+            strict(bool): Passed to `compiled_validator()`. Defaults to True.
+            chunk_size(int): Number of payloads validated per offloaded task. Defaults to 1000.
+
+        Returns:
+            typing.List[typing.Tuple[int, list]]
+        """
+
+        return await aio.avalidate_many(cls.compiled_validator(strict=strict), payloads, chunk_size=chunk_size)
+
+    @classmethod
+    def polymorphic_json_schema(cls, strict: bool = True, use_defs: bool = False) -> dict:
+        """
+        Returns JSON schema accepting this document and all its registered subclasses, for documents with
+        `allow_inheritance` enabled. Branches are selected by the "_cls" discriminator with "if"/"then" and a
+        "discriminator" hint is added for code generators. The schema is cached alongside the document's schema and
+        regenerated when subclasses are added.
+
+        Args:
+            strict(bool): Passed to `json_schema()`, also makes "_cls" required. Defaults to True.
+            use_defs(bool): If True, branches are emitted under "$defs" and referenced with "$ref". Defaults to False.
+
+        Returns:
+            FrozenDict
+
+        Raises:
+            ValueError: If the document does not allow inheritance
+        """
+
+        subclasses = ','.join(getattr(cls, '_subclasses', ()))
+        return cls._derived(f'polymorphic_json_schema:{subclasses}',
+                            lambda schema: freeze(polymorphic_json_schema(cls, strict=strict, use_defs=use_defs)),
+                            strict=strict, use_defs=use_defs)
+
+    @classmethod
+    def polymorphic_validator(cls, strict: bool = True) -> typing.Any:
+        """
+        Returns a validator of documents of this document's inheritance hierarchy. It reads "_cls" and validates the
+        document with the compiled validator of that class only, accepting the same documents as a `jsonschema`
+        validator of `polymorphic_json_schema()`.
+
+        Args:
+            strict(bool): If True, "_cls" and required properties are checked. Defaults to True.
+
+        Returns:
+            PolymorphicValidator
+
+        Raises:
+            ValueError: If the document does not allow inheritance
+        """
+
+        subclasses = ','.join(getattr(cls, '_subclasses', ()))
+        return cls._derived(f'polymorphic_validator:{subclasses}',
+                            lambda schema: compile_polymorphic_validator(cls, strict=strict), strict=strict)
+
+    @classmethod
+    def mongo_validator(cls) -> dict:
+        """
+        Returns a MongoDB collection validator, `{'$jsonSchema': ...}`, converted from the document's strict JSON
+        schema, see `mongo_json_schema()`. Documents with `allow_inheritance` also accept their registered subclasses.
+        It is cached alongside the schema, regenerated when subclasses are added, and read-only like the schema.
+
+        Returns:
+            FrozenDict
+        """
+
+        subclasses = ','.join(getattr(cls, '_subclasses', ()))
+        return cls._derived(f'mongo_validator:{subclasses}',
+                            lambda schema: freeze({'$jsonSchema': mongo_json_schema(cls)}))
+
+    @classmethod
+    def mongo_validator_command(cls, command: str = 'collMod', validation_level: str = 'strict',
+                                validation_action: str = 'error') -> dict:
+        """
+        Returns the database command that applies `mongo_validator()` to the document's collection, e.g.
+        `Person._get_db().command(Person.mongo_validator_command())`.
+
+        Args:
+            command(str): 'collMod' for existing collections or 'create' for new ones. Defaults to 'collMod'.
+            validation_level(str): 'strict', 'moderate' or 'off'. Defaults to 'strict'.
+            validation_action(str): 'error' or 'warn'. Defaults to 'error'.
+
+        Returns:
+            dict
+        """
+
+        return mongo_validator_command(cls, cls.mongo_validator(), command=command, validation_level=validation_level,
+                                       validation_action=validation_action)
+
+    @classmethod
+    def _custom_json_schema(cls, custom_schema: dict, strict: bool) -> dict:
+        """
+        Returns read-only variant of schema defined with `_JSONSCHEMA` class attribute. Strict and non-strict variants
+        are both frozen and cached on first access, the class attribute itself is never modified.
+
+        Args:
+            custom_schema(dict): Value of `_JSONSCHEMA` class attribute
+            strict(bool): If False, returns the variant without "required" key
+
+        Returns:
+            FrozenDict
+        """
+
+        fingerprint = ('_JSONSCHEMA', custom_schema)
+        schema = _SCHEMA_CACHE.get((cls, strict, False), fingerprint)
+        if schema is None:
+            strict_schema = freeze(custom_schema)
+            non_strict_schema = freeze({k: v for k, v in strict_schema.items() if k != 'required'})
+            _SCHEMA_CACHE.set((cls, True, False), fingerprint, strict_schema)
+            _SCHEMA_CACHE.set((cls, False, False), fingerprint, non_strict_schema)
+            schema = strict_schema if strict else non_strict_schema
+        return schema
+
+    @classmethod
+    def _generate(cls, ctx: SchemaContext) -> dict:
+        """
+        Generates JSON schema without consulting the cache.
+
+        Args:
+            ctx(SchemaContext): Generation options
+
+        Returns:
+            dict
+        """
+
+        if ctx.profiler is not None:
+            return ctx.profiler.document(cls, lambda: cls._generate_schema(ctx))
+        return cls._generate_schema(ctx)
+
+    @classmethod
+    def _generate_schema(cls, ctx: SchemaContext) -> dict:
+        """
+        Generates JSON schema of document's own and inherited fields, called by `_generate`.
+
+        Args:
+            ctx(SchemaContext): Generation options
+
+        Returns:
+            dict
+        """
+
+        model_properties = cls._parse(ctx)
         required_list = []
         for k, v in model_properties.items():
             req = v.get('required', False)
@@ -384,11 +1000,19 @@ class JsonSchemaMixin:
                                                              me.document.DynamicEmbeddedDocument)) else False
         }
 
-        if JsonSchemaMixin in cls.__bases__[0].__bases__:
-            schema['properties'] = {**schema['properties'],
-                                    **cls.__bases__[0].json_schema(strict=cls._STRICT)['properties']}
-
-        if required_list and strict:
+        own_properties = set(model_properties)
+        for parent in _schema_parents(cls):
+            # Parent schemas are cached, so siblings share one generation of every ancestor. Fields redefined by this
+            # class override the parent's.
+            parent_schema = _nested_schema(parent, ctx, ctx.use_defs)
+            for name, prop in parent_schema.get('properties', {}).items():
+                model_properties.setdefault(name, prop)
+            required_list.extend(name for name in parent_schema.get('required', ())
+                                 if name not in own_properties and name not in required_list)
+            for name, definition in parent_schema.get('$defs', {}).items():
+                ctx.defs.setdefault(name, definition)
+
+        if required_list and ctx.strict:
             schema['required'] = required_list
 
         return schema
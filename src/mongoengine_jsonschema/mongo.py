@@ -0,0 +1,251 @@
+import typing
+
+import mongoengine as me
+
+from .dispatch import FieldRegistry
+from .fields import DISCRIMINATOR
+from .polymorphic import polymorphic_documents
+
+# MongoDB does not support these keywords in $jsonSchema, they are removed
+UNSUPPORTED_KEYWORDS = frozenset(('$id', '$schema', '$ref', '$defs', 'definitions', 'default', 'format', 'const',
+                                  'examples', 'prefixItems', 'contains', 'propertyNames', 'if', 'then', 'else',
+                                  'discriminator', 'min_value', 'max_value'))
+
+JSON_BSON_TYPES = {
+    'string': 'string',
+    'integer': ['int', 'long'],
+    'number': ['double', 'int', 'long', 'decimal'],
+    'boolean': 'bool',
+    'object': 'object',
+    'array': 'array',
+    'null': 'null',
+}
+
+
+def _reference_bson_type(field: me.fields.BaseField) -> typing.Any:
+    if getattr(field, 'dbref', False):
+        return 'object'
+    document = field.document_type
+    pk_field = document._fields.get(document._meta.get('id_field'))
+    return field_bson_type(pk_field) if pk_field is not None else 'objectId'
+
+
+def _enum_bson_type(field: me.fields.EnumField) -> typing.Any:
+    values = [member.value for member in field._enum_cls]
+    if all(isinstance(value, str) for value in values):
+        return 'string'
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return ['int', 'long']
+    return None
+
+
+BSON_TYPES = FieldRegistry({
+    me.fields.BinaryField: 'binData',
+    me.fields.BooleanField: 'bool',
+    me.fields.CachedReferenceField: 'object',
+    me.fields.ComplexDateTimeField: 'string',
+    me.fields.DateTimeField: 'date',
+    me.fields.Decimal128Field: 'decimal',
+    me.fields.DecimalField: lambda field: 'string' if field.force_string else 'double',
+    me.fields.DictField: 'object',
+    me.fields.EnumField: _enum_bson_type,
+    me.fields.FloatField: 'double',
+    me.fields.GenericEmbeddedDocumentField: 'object',
+    me.fields.GenericLazyReferenceField: 'object',
+    me.fields.GenericReferenceField: 'object',
+    me.fields.IntField: ['int', 'long'],
+    me.fields.LazyReferenceField: _reference_bson_type,
+    me.fields.LongField: 'long',
+    me.fields.ObjectIdField: 'objectId',
+    me.fields.ReferenceField: _reference_bson_type,
+    me.fields.SequenceField: ['int', 'long'],
+    me.fields.StringField: 'string',
+    me.fields.UUIDField: lambda field: 'binData' if field._binary else 'string',
+})
+
+
+def field_bson_type(field: me.fields.BaseField) -> typing.Any:
+    """
+    Returns `bsonType` of values MongoEngine stores for given field, None if it is not known.
+
+    Args:
+        field(me.fields.BaseField): A MongoEngine field instance
+
+    Returns:
+        typing.Any: A BSON type alias, a list of aliases or None
+    """
+
+    bson_type = BSON_TYPES.resolve(type(field))
+    return bson_type(field) if callable(bson_type) else bson_type
+
+
+def _convert(schema: typing.Any) -> typing.Any:
+    """Rewrites a JSON schema without field information to MongoDB's $jsonSchema dialect."""
+
+    if isinstance(schema, list):
+        return [_convert(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    converted = {}
+    for key, value in schema.items():
+        if key in UNSUPPORTED_KEYWORDS:
+            continue
+        if key == 'type':
+            converted['bsonType'] = JSON_BSON_TYPES.get(value, value)
+        elif key in ('properties', 'patternProperties'):
+            converted[key] = {name: _convert(subschema) for name, subschema in value.items()}
+        elif key == 'items' and value is False:
+            continue
+        elif key == 'allOf':
+            # Branches of unions switched on "_cls" are conditional and left empty once "if"/"then" are removed
+            subschemas = [subschema for subschema in _convert(value) if subschema]
+            if subschemas:
+                converted[key] = subschemas
+        else:
+            converted[key] = _convert(value)
+
+    if 'prefixItems' in schema:
+        converted['items'] = _convert(schema['prefixItems'])
+        if schema.get('items') is False:
+            converted['additionalItems'] = False
+    return converted
+
+
+def _field_schema(field: typing.Optional[me.fields.BaseField], prop: dict, seen: frozenset) -> dict:
+    if isinstance(field, me.fields.EmbeddedDocumentField):
+        document = field.document_type
+        if document in seen or not hasattr(document, 'json_schema'):
+            # MongoDB does not support recursive schemas
+            return {'bsonType': 'object', **({'title': prop['title']} if 'title' in prop else {})}
+        schema = _document_schema(document, seen)
+        if 'title' in prop:
+            schema['title'] = prop['title']
+        return schema
+
+    if isinstance(field, me.fields.ListField) and 'items' in prop:
+        schema = _convert({key: value for key, value in prop.items() if key != 'items'})
+        schema['items'] = _field_schema(field.field, prop['items'], seen)
+        return schema
+
+    if isinstance(field, me.fields.DictField) and getattr(field, 'field', None) is not None and \
+            'patternProperties' in prop:
+        schema = _convert({key: value for key, value in prop.items() if key != 'patternProperties'})
+        schema['patternProperties'] = {pattern: _field_schema(field.field, subschema, seen)
+                                       for pattern, subschema in prop['patternProperties'].items()}
+        return schema
+
+    schema = _convert(prop)
+    bson_type = field_bson_type(field) if field is not None else None
+    if bson_type is not None and 'bsonType' in schema:
+        schema['bsonType'] = bson_type
+    if bson_type not in (None, 'string'):
+        for key in ('pattern', 'minLength', 'maxLength'):
+            schema.pop(key, None)
+        if 'enum' in schema and bson_type != JSON_BSON_TYPES.get(prop.get('type')):
+            del schema['enum']
+    return schema
+
+
+def _document_schema(document: type, seen: frozenset = frozenset()) -> dict:
+    if getattr(document, '_meta', {}).get('allow_inheritance') and getattr(document, '_JSONSCHEMA', None) is None:
+        documents = polymorphic_documents(document)
+        if len(documents) > 1:
+            # Collection holds documents of subclasses too, each is valid against the branch of its "_cls" value
+            schema = {'bsonType': 'object'}
+            title = document.json_schema(strict=True).get('title')
+            if title is not None:
+                schema['title'] = title
+            schema['anyOf'] = [_class_schema(doc_cls, seen, doc_cls._class_name) for doc_cls in documents]
+            return schema
+    return _class_schema(document, seen)
+
+
+def _class_schema(document: type, seen: frozenset, class_name: typing.Optional[str] = None) -> dict:
+    json_schema = document.json_schema(strict=True)
+    if getattr(document, '_JSONSCHEMA', None) is not None:
+        return _convert(json_schema)
+
+    seen = seen | {document}
+    fields = document._fields
+    properties = {}
+    db_names = {}
+    for name, prop in json_schema['properties'].items():
+        field = fields.get(name)
+        db_name = field.db_field if field is not None else name
+        db_names[name] = db_name
+        properties[db_name] = _field_schema(field, prop, seen)
+
+    schema = {'bsonType': 'object'}
+    if 'title' in json_schema:
+        schema['title'] = json_schema['title']
+    if json_schema.get('required'):
+        schema['required'] = [db_names.get(name, name) for name in json_schema['required']]
+
+    if json_schema.get('additionalProperties') is False:
+        # Keys MongoEngine writes in addition to the declared fields
+        if not document._meta.get('abstract') and issubclass(document, me.Document):
+            id_field = fields.get(document._meta.get('id_field'))
+            properties.setdefault('_id', {'bsonType': field_bson_type(id_field) or 'objectId'}
+                                  if id_field is not None else {})
+        if class_name is not None:
+            properties[DISCRIMINATOR] = {'bsonType': 'string', 'enum': [class_name]}
+        elif document._meta.get('allow_inheritance'):
+            properties.setdefault(DISCRIMINATOR, {'bsonType': 'string'})
+        schema['additionalProperties'] = False
+
+    schema['properties'] = properties
+    return schema
+
+
+def mongo_json_schema(document: type) -> dict:
+    """
+    Converts the document's strict JSON schema to MongoDB's `$jsonSchema` dialect: `type` keywords become `bsonType`
+    of values MongoEngine stores (e.g. objectId, date, decimal, binData, long), properties are named by database field
+    names, embedded documents are inlined, `_id` and `_cls` are allowed where additional properties are not, and
+    keywords MongoDB does not support are removed or rewritten (`prefixItems` to `items` and `additionalItems`).
+    Documents with `allow_inheritance` and registered subclasses, stored in the same collection, are accepted by
+    `anyOf` branches, one per class with its `_cls` value.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+
+    Returns:
+        dict
+    """
+
+    return _document_schema(document)
+
+
+def mongo_validator_command(document: type, validator: dict, command: str = 'collMod',
+                            validation_level: str = 'strict', validation_action: str = 'error') -> dict:
+    """
+    Returns a database command applying given validator to the document's collection, ready for
+    `db.command(...)`.
+
+    Args:
+        document(type): A MongoEngine document class with a collection
+        validator(dict): Validator, e.g. `{'$jsonSchema': ...}`
+        command(str): 'collMod' for existing collections or 'create' for new ones. Defaults to 'collMod'.
+        validation_level(str): 'strict', 'moderate' or 'off'. Defaults to 'strict'.
+        validation_action(str): 'error' or 'warn'. Defaults to 'error'.
+
+    Returns:
+        dict
+
+    Raises:
+        ValueError: If command is not supported or the document has no collection
+    """
+
+    if command not in ('collMod', 'create'):
+        raise ValueError(f"command must be 'collMod' or 'create', not {command!r}")
+    collection_name = document._get_collection_name() if hasattr(document, '_get_collection_name') else None
+    if not collection_name:
+        raise ValueError(f'{document.__name__} has no collection')
+
+    return {
+        command: collection_name,
+        'validator': validator,
+        'validationLevel': validation_level,
+        'validationAction': validation_action,
+    }
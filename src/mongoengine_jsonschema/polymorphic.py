@@ -0,0 +1,182 @@
+import typing
+
+from mongoengine.base.common import _document_registry
+
+from .compiler import CompiledValidator
+from .fields import DISCRIMINATOR
+
+
+def polymorphic_documents(document: type) -> typing.List[type]:
+    """
+    Returns the document class and its registered subclasses that can be stored in its collection, i.e. every class
+    whose name may appear in "_cls". Abstract documents are skipped.
+
+    Args:
+        document(type): A MongoEngine document class with `allow_inheritance` enabled
+
+    Returns:
+        typing.List[type]
+
+    Raises:
+        ValueError: If the document does not allow inheritance
+    """
+
+    if not getattr(document, '_meta', {}).get('allow_inheritance'):
+        raise ValueError(f'{document.__name__} does not allow inheritance')
+
+    documents = []
+    for name in getattr(document, '_subclasses', ()):
+        doc_cls = _document_registry.get(name)
+        if doc_cls is not None and not doc_cls._meta.get('abstract', False) and doc_cls not in documents:
+            documents.append(doc_cls)
+    return documents
+
+
+def discriminated_branch(schema: dict, name: str) -> dict:
+    """
+    Returns a document schema with its "_cls" property fixed to given value, for use as a branch of
+    `discriminated_union()`.
+
+    Args:
+        schema(dict): Document schema
+        name(str): "_cls" value of the document
+
+    Returns:
+        dict
+    """
+
+    return {**schema, 'properties': {DISCRIMINATOR: {'type': 'string', 'const': name}, **schema.get('properties', {})}}
+
+
+def discriminated_union(branches: typing.Sequence[typing.Tuple[str, dict]], strict: bool = True,
+                        mapping: typing.Optional[typing.Dict[str, str]] = None) -> dict:
+    """
+    Returns a JSON schema of objects whose "_cls" value is one of given names. Each branch is selected by "_cls" with
+    "if"/"then", so validators evaluate only the schema of the matching branch. A "discriminator" keyword (OpenAPI
+    style, ignored by JSON schema validators) is added as a hint for code generators.
+
+    Args:
+        branches(typing.Sequence[typing.Tuple[str, dict]]): ("_cls" value, branch schema) pairs
+        strict(bool): If True, "_cls" is required. Defaults to True.
+        mapping(typing.Optional[typing.Dict[str, str]]): "_cls" value to "$ref" of the branch, added to the
+                                                         discriminator. Defaults to None.
+
+    Returns:
+        dict
+    """
+
+    discriminator = {'propertyName': DISCRIMINATOR}
+    if mapping:
+        discriminator['mapping'] = mapping
+
+    schema = {
+        'type': 'object',
+        'properties': {DISCRIMINATOR: {'type': 'string', 'enum': [name for name, _ in branches]}},
+        'discriminator': discriminator,
+        'allOf': [{
+            'if': {'properties': {DISCRIMINATOR: {'const': name}}, 'required': [DISCRIMINATOR]},
+            'then': branch
+        } for name, branch in branches]
+    }
+    if strict:
+        schema['required'] = [DISCRIMINATOR]
+    return schema
+
+
+def _branch_schema(document: type, strict: bool, use_defs: bool) -> typing.Tuple[dict, dict]:
+    schema = document.json_schema(strict=strict, use_defs=use_defs)
+    branch = discriminated_branch({k: v for k, v in schema.items() if k not in ('$id', '$defs')},
+                                  document._class_name)
+    return branch, schema.get('$defs', {})
+
+
+def polymorphic_json_schema(document: type, strict: bool = True, use_defs: bool = False) -> dict:
+    """
+    Generates a JSON schema accepting any document stored in the collection of an inheritance hierarchy, a
+    `discriminated_union()` with a branch per document class.
+
+    Args:
+        document(type): A MongoEngine document class with `allow_inheritance` enabled
+        strict(bool): If True, "_cls" and required fields of each branch are required. Defaults to True.
+        use_defs(bool): If True, branches and embedded documents are emitted under "$defs" and referenced with
+                        "$ref", otherwise branches are inlined. Defaults to False.
+
+    Returns:
+        dict
+
+    Raises:
+        ValueError: If the document does not allow inheritance
+    """
+
+    defs, branches, mapping = {}, [], {}
+    for doc_cls in polymorphic_documents(document):
+        name = doc_cls._class_name
+        branch, branch_defs = _branch_schema(doc_cls, strict, use_defs)
+        for def_name, definition in branch_defs.items():
+            defs.setdefault(def_name, definition)
+        if use_defs:
+            defs[name] = branch
+            mapping[name] = f'#/$defs/{name}'
+            branch = {'$ref': mapping[name]}
+        branches.append((name, branch))
+
+    schema = {
+        '$id': f'/schemas/{document.__name__}',
+        'type': 'object',
+        'title': document._get_title(document.__name__),
+        **discriminated_union(branches, strict=strict, mapping=mapping)
+    }
+    if defs:
+        schema['$defs'] = defs
+    return schema
+
+
+class PolymorphicValidator(CompiledValidator):
+    """
+    Validator of documents of an inheritance hierarchy. The "_cls" value of a document selects the compiled validator
+    of its class with a single lookup, the remaining properties are validated by it.
+
+    Attributes:
+        validators(typing.Dict[str, CompiledValidator]): Compiled validators keyed by "_cls" value
+    """
+
+    def __init__(self, validators: typing.Dict[str, CompiledValidator], strict: bool = True):
+        names = list(validators)
+
+        def _validate(data, path, errors):
+            if not isinstance(data, dict):
+                errors.append((path, f'{data!r} is not of type \'object\''))
+                return
+            if DISCRIMINATOR not in data:
+                if strict:
+                    errors.append((path, f'{DISCRIMINATOR!r} is a required property'))
+                return
+            name = data[DISCRIMINATOR]
+            validator = validators.get(name) if isinstance(name, str) else None
+            if validator is None:
+                errors.append((path + (DISCRIMINATOR,), f'{name!r} is not one of {names!r}'))
+                return
+            validator.function({k: v for k, v in data.items() if k != DISCRIMINATOR}, path, errors)
+
+        super().__init__(_validate, '')
+        self.validators = validators
+
+
+def compile_polymorphic_validator(document: type, strict: bool = True) -> PolymorphicValidator:
+    """
+    Returns a validator of documents of an inheritance hierarchy, accepting the same documents as a `jsonschema`
+    validator of `polymorphic_json_schema()`.
+
+    Args:
+        document(type): A MongoEngine document class with `allow_inheritance` enabled
+        strict(bool): If True, "_cls" and required fields are checked. Defaults to True.
+
+    Returns:
+        PolymorphicValidator
+
+    Raises:
+        ValueError: If the document does not allow inheritance
+    """
+
+    return PolymorphicValidator({doc_cls._class_name: doc_cls.compiled_validator(strict=strict)
+                                 for doc_cls in polymorphic_documents(document)}, strict=strict)
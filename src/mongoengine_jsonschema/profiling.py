@@ -0,0 +1,149 @@
+import json
+import os
+import time
+import typing
+from collections import namedtuple
+
+FieldProfile = namedtuple('FieldProfile', ['document', 'field', 'field_type', 'depth', 'seconds', 'size'])
+DocumentProfile = namedtuple('DocumentProfile', ['document', 'depth', 'seconds', 'size'])
+
+
+def _size(prop: typing.Any) -> int:
+    return len(json.dumps(prop, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class GenerationProfiler:
+    """
+    Collects wall time, nesting depth and serialized size of every document and field parsed during schema
+    generation. Profiling is opt-in: a profiler is attached to a `SchemaContext`, e.g. by
+    `JsonSchemaMixin.profile_json_schema()`, and generation without one is not instrumented. Times are inclusive,
+    i.e. the time of a document includes the time of its fields and of the embedded documents they use. Field sizes are
+    of properties as parsed, before "required" flags are collected into the document's "required" list.
+
+    Args:
+        on_field(typing.Optional[typing.Callable[[FieldProfile], None]]): Called after each field is parsed
+        on_document(typing.Optional[typing.Callable[[DocumentProfile], None]]): Called after each document is parsed
+    """
+
+    def __init__(self,
+                 on_field: typing.Optional[typing.Callable[[FieldProfile], None]] = None,
+                 on_document: typing.Optional[typing.Callable[[DocumentProfile], None]] = None):
+        self.on_field = on_field
+        self.on_document = on_document
+        self.fields = []
+        self.documents = []
+        self._stack = []
+        self._children = [0.0]
+        self._self_times = {}
+
+    def _call(self, frame: str, func: typing.Callable[[], dict]) -> typing.Tuple[dict, float]:
+        self._stack.append(frame)
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            result = func()
+        finally:
+            seconds = time.perf_counter() - start
+            children = self._children.pop()
+            stack = ';'.join(self._stack)
+            self._self_times[stack] = self._self_times.get(stack, 0.0) + seconds - children
+            self._stack.pop()
+            self._children[-1] += seconds
+        return result, seconds
+
+    @property
+    def depth(self) -> int:
+        """Number of documents being parsed, the document being parsed at the top level has depth 0."""
+
+        return sum(1 for frame in self._stack if '.' not in frame) - 1
+
+    def document(self, cls: type, generate: typing.Callable[[], dict]) -> dict:
+        """
+        Profiles generation of a document schema.
+
+        Args:
+            cls(type): Document class
+            generate(typing.Callable[[], dict]): Generates the schema
+
+        Returns:
+            dict: Schema returned by `generate`
+        """
+
+        depth = self.depth + 1
+        schema, seconds = self._call(cls.__name__, generate)
+        profile = DocumentProfile(cls.__name__, depth, seconds, _size(schema))
+        self.documents.append(profile)
+        if self.on_document is not None:
+            self.on_document(profile)
+        return schema
+
+    def field(self, cls: type, name: str, field: typing.Any, parse: typing.Callable[[], dict]) -> dict:
+        """
+        Profiles generation of a field property.
+
+        Args:
+            cls(type): Document class declaring the field
+            name(str): Field name
+            field(me.fields.BaseField): Field instance
+            parse(typing.Callable[[], dict]): Generates the property
+
+        Returns:
+            dict: Property returned by `parse`
+        """
+
+        depth = self.depth
+        prop, seconds = self._call(f'{cls.__name__}.{name}', parse)
+        profile = FieldProfile(cls.__name__, name, type(field).__name__, depth, seconds, _size(prop))
+        self.fields.append(profile)
+        if self.on_field is not None:
+            self.on_field(profile)
+        return prop
+
+    def slowest_fields(self, n: int = 10) -> typing.List[FieldProfile]:
+        """
+        Returns the `n` fields that took the longest to parse, slowest first.
+
+        Args:
+            n(int): Number of fields. Defaults to 10.
+
+        Returns:
+            typing.List[FieldProfile]
+        """
+
+        return sorted(self.fields, key=lambda profile: profile.seconds, reverse=True)[:n]
+
+    def largest_fields(self, n: int = 10) -> typing.List[FieldProfile]:
+        """
+        Returns the `n` fields with the largest serialized properties, largest first.
+
+        Args:
+            n(int): Number of fields. Defaults to 10.
+
+        Returns:
+            typing.List[FieldProfile]
+        """
+
+        return sorted(self.fields, key=lambda profile: profile.size, reverse=True)[:n]
+
+    def folded_stacks(self) -> str:
+        """
+        Returns the profile in folded stack format, one `Document;Document.field;Embedded;... <microseconds>` line
+        per stack with the time spent in its top frame, which flame graph tools (e.g. `flamegraph.pl`, speedscope)
+        read directly.
+
+        Returns:
+            str
+        """
+
+        return ''.join(f'{stack} {round(seconds * 1e6)}\n' for stack, seconds in self._self_times.items())
+
+    def write_folded(self, path: typing.Union[str, os.PathLike]) -> None:
+        """
+        Writes `folded_stacks()` to a file.
+
+        Args:
+            path(typing.Union[str, os.PathLike]): Output file path
+        """
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.folded_stacks())
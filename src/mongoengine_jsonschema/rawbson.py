@@ -0,0 +1,215 @@
+import base64
+import datetime
+import re
+import struct
+import typing
+import uuid
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from .compiler import CompiledValidator, compile_partial_validator, document_plan
+from .stream import _REFERENCE_DOCUMENT_FIELDS, _normalize_field
+
+_FIXED_SIZES = {0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0,
+                0xFF: 0}
+
+# BSON element types that are accepted for a JSON type without decoding the element. Types that are represented
+# as strings in JSON, e.g. ObjectId and datetime, count as strings.
+_TYPE_BYTES = {
+    'string': frozenset((0x02, 0x05, 0x07, 0x09, 0x0B, 0x0D, 0x0E)),
+    'integer': frozenset((0x10, 0x12)),
+    'number': frozenset((0x01, 0x10, 0x12, 0x13)),
+    'boolean': frozenset((0x08,)),
+    'object': frozenset((0x03,)),
+    'array': frozenset((0x04,)),
+    'null': frozenset((0x0A,)),
+}
+
+_SKIPPED_KEYS = frozenset((b'_id', b'_cls'))
+
+_INT32 = struct.Struct('<i')
+_INT64 = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+
+
+def _value_end(data: bytes, element_type: int, start: int) -> int:
+    size = _FIXED_SIZES.get(element_type)
+    if size is not None:
+        return start + size
+    if element_type in (0x02, 0x0D, 0x0E):
+        return start + 4 + _INT32.unpack_from(data, start)[0]
+    if element_type in (0x03, 0x04, 0x0F):
+        return start + _INT32.unpack_from(data, start)[0]
+    if element_type == 0x05:
+        return start + 5 + _INT32.unpack_from(data, start)[0]
+    if element_type == 0x0B:
+        return data.index(b'\x00', data.index(b'\x00', start) + 1) + 1
+    if element_type == 0x0C:
+        return start + 4 + _INT32.unpack_from(data, start)[0] + 12
+    raise bson.errors.InvalidBSON(f'unknown element type {element_type:#04x}')
+
+
+def iter_elements(data: bytes) -> typing.Iterator[typing.Tuple[bytes, int, int, int]]:
+    """
+    Yields top-level elements of a BSON document as `(name, type, start, end)` without decoding them, where name is
+    the raw UTF-8 encoded key and `data[start:end]` holds the encoded value.
+
+    Args:
+        data(bytes): BSON document
+
+    Returns:
+        typing.Iterator[typing.Tuple[bytes, int, int, int]]
+    """
+
+    last = len(data) - 1
+    position = 4
+    while position < last:
+        element_type = data[position]
+        name_end = data.index(b'\x00', position + 1)
+        start = name_end + 1
+        end = _value_end(data, element_type, start)
+        yield data[position + 1:name_end], element_type, start, end
+        position = end
+
+
+def _to_json(value: typing.Any) -> typing.Any:
+    """Converts a decoded BSON value to the value it has in JSON documents the schema describes."""
+
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, (str, int, float)) or value is None:
+        return value
+    if isinstance(value, (bson.ObjectId, uuid.UUID)):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, bson.Decimal128):
+        return value.to_decimal()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, bson.DBRef):
+        return {'$ref': value.collection, '$id': _to_json(value.id)}
+    if isinstance(value, (bson.Regex, re.Pattern)):
+        return value.pattern
+    return value
+
+
+def _decode(data: bytes, element_type: int, start: int, end: int) -> typing.Any:
+    if element_type == 0x02:
+        return data[start + 4:end - 1].decode('utf-8')
+    if element_type == 0x10:
+        return _INT32.unpack_from(data, start)[0]
+    if element_type == 0x12:
+        return _INT64.unpack_from(data, start)[0]
+    if element_type == 0x01:
+        return _DOUBLE.unpack_from(data, start)[0]
+    if element_type == 0x08:
+        return data[start] == 1
+    if element_type == 0x0A:
+        return None
+    element = bytes((element_type,)) + b'v\x00' + data[start:end]
+    return _to_json(bson.decode(_INT32.pack(len(element) + 5) + element + b'\x00')['v'])
+
+
+class RawBSONValidator(CompiledValidator):
+    """
+    Validator of BSON documents as stored by MongoEngine, see `compile_raw_bson_validator()`. Accepts
+    `bson.raw_bson.RawBSONDocument` instances or BSON encoded bytes.
+
+    Attributes:
+        function(typing.Callable): Function `function(document, path, errors)` appending (path, message) tuples to
+                                   `errors`
+        source(str): Empty, the validator is not generated
+    """
+
+
+def compile_raw_bson_validator(document: type, strict: bool = True) -> RawBSONValidator:
+    """
+    Builds a validator that checks BSON documents as stored by MongoEngine against the document's JSON schema without
+    decoding them first. Top-level elements are scanned in the encoded buffer: database field names are mapped to
+    fields, `_id` and `_cls` are skipped, elements whose property schema only has a type are checked by their BSON
+    type and unconstrained ones are not looked at. Only elements with further constraints, e.g. bounds, patterns or
+    embedded documents, are decoded and validated by the field's compiled validator. BSON values are checked as
+    their JSON representation, e.g. ObjectId and datetime values as strings.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        strict(bool): If True, required properties are checked. Defaults to True.
+
+    Returns:
+        RawBSONValidator
+    """
+
+    plan = document_plan(document, strict=strict)
+    if 'fallback' in plan:
+        validator = document.json_validator(strict=strict)
+
+        def validate_fallback(raw, path, errors):
+            data = raw.raw if isinstance(raw, RawBSONDocument) else raw
+            instance = _to_json(bson.decode(data))
+            instance.pop('_id', None)
+            instance.pop('_cls', None)
+            errors.extend((path + tuple(e.absolute_path), e.message) for e in validator.iter_errors(instance))
+
+        return RawBSONValidator(validate_fallback, '')
+
+    field_validators = compile_partial_validator(document, strict=strict).field_validators
+    elements = {}
+    for name, field_plan_ in plan['properties'].items():
+        field = document._fields.get(name)
+        db_name = (field.db_field if field is not None else name).encode('utf-8')
+        constraints = set(field_plan_) - {'field'}
+        if not constraints:
+            elements[db_name] = (name, None, None, None)
+        elif constraints == {'type'} and field_plan_['type'] != 'integer' and \
+                not isinstance(field, _REFERENCE_DOCUMENT_FIELDS):
+            elements[db_name] = (name, field_plan_['type'], None, None)
+        else:
+            elements[db_name] = (name, None, field, field_validators[name])
+
+    required = frozenset(plan['required'])
+    additional_properties = plan['additional_properties']
+
+    def validate(raw, path, errors):
+        data = raw.raw if isinstance(raw, RawBSONDocument) else raw
+        seen = set()
+        for key, element_type, start, end in iter_elements(data):
+            entry = elements.get(key)
+            if entry is None:
+                if not additional_properties and key not in _SKIPPED_KEYS:
+                    errors.append((path, f'Additional properties are not allowed ({key.decode("utf-8")!r} was '
+                                         f'unexpected)'))
+                continue
+            name, json_type, field, validate_field = entry
+            seen.add(name)
+            if json_type is not None:
+                if element_type not in _TYPE_BYTES[json_type]:
+                    value = _decode(data, element_type, start, end)
+                    errors.append((path + (name,), f'{value!r} is not of type {json_type!r}'))
+            elif validate_field is not None:
+                value = _decode(data, element_type, start, end)
+                validate_field(_normalize_field(field, value), path + (name,), errors)
+        for name in required - seen:
+            errors.append((path, f'{name!r} is a required property'))
+
+    return RawBSONValidator(validate, '')
+
+
+def iter_raw_bson_errors(document: type, raw: typing.Union[RawBSONDocument, bytes],
+                         strict: bool = True) -> typing.Iterator[typing.Tuple[tuple, str]]:
+    """
+    Yields `(path, message)` tuples of validation errors of a raw BSON document, see `raw_bson_validator()`.
+
+    Args:
+        document(type): A document class that inherits JsonSchemaMixin
+        raw(typing.Union[RawBSONDocument, bytes]): Document read with `RawBSONDocument` as document class, or its bytes
+        strict(bool): If True, required properties are checked. Defaults to True.
+
+    Returns:
+        typing.Iterator[typing.Tuple[tuple, str]]
+    """
+
+    yield from document.raw_bson_validator(strict=strict).errors(raw)
@@ -0,0 +1,65 @@
+import typing
+
+from mongoengine.base.common import _document_registry
+
+from .mixin import JsonSchemaMixin
+
+
+def iter_schema_documents(include_embedded: bool = True) -> typing.Iterator[typing.Tuple[str, type]]:
+    """
+    Yields (registry name, document class) pairs of all registered MongoEngine documents that inherit
+    JsonSchemaMixin. Abstract documents are skipped.
+
+    Args:
+        include_embedded(bool): If False, embedded documents are skipped. Defaults to True.
+
+    Returns:
+        typing.Iterator[typing.Tuple[str, type]]
+    """
+
+    for name, doc_cls in sorted(_document_registry.items()):
+        if not issubclass(doc_cls, JsonSchemaMixin) or getattr(doc_cls, '_meta', {}).get('abstract', False):
+            continue
+        if not include_embedded and not getattr(doc_cls, '_is_document', False):
+            continue
+        yield name, doc_cls
+
+
+def generate_all(strict: bool = True,
+                 use_defs: bool = False,
+                 include_embedded: bool = True,
+                 bundle: bool = False) -> dict:
+    """
+    Generates JSON schemas of all registered documents in a single pass over MongoEngine's document registry. Schemas
+    are generated through `json_schema()`, so embedded documents and parent classes shared by several documents are
+    generated only once and the schema cache is warm afterwards. Generation is pure Python and CPU-bound, so it runs in
+    the calling thread.
+
+    Args:
+        strict(bool): Passed to `json_schema()`. Defaults to True.
+        use_defs(bool): Passed to `json_schema()`. Defaults to False.
+        include_embedded(bool): If False, only top level documents are generated. Defaults to True.
+        bundle(bool): If True, returns a single schema with all document schemas and their shared definitions under
+                      "$defs" instead of a mapping of schemas. Defaults to False.
+
+    Returns:
+        dict: Schemas keyed by document registry name or a bundle schema
+    """
+
+    schemas = {name: doc_cls.json_schema(strict=strict, use_defs=use_defs)
+               for name, doc_cls in iter_schema_documents(include_embedded=include_embedded)}
+
+    if not bundle:
+        return schemas
+
+    definitions = {}
+    for name, schema in schemas.items():
+        for def_name, definition in schema.get('$defs', {}).items():
+            definitions.setdefault(def_name, definition)
+    for name, schema in schemas.items():
+        definitions[name] = {k: v for k, v in schema.items() if k not in ('$id', '$defs')}
+
+    return {
+        '$id': '/schemas',
+        '$defs': definitions
+    }
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import typing
+from collections import namedtuple
+
+from .fingerprint import document_shape, generator_fingerprint
+from .frozen import freeze
+from .mixin import _SCHEMA_SOURCES
+from .registry import iter_schema_documents
+
+SNAPSHOT_ENV = 'MONGOENGINE_JSONSCHEMA_SNAPSHOT'
+SNAPSHOT_FORMAT = 2
+
+DEFAULT_VARIANTS = ((True, False), (False, False))
+
+SnapshotInfo = namedtuple('SnapshotInfo', ['documents', 'hits', 'stale'])
+
+
+class _Snapshot:
+    """Schemas loaded from a snapshot file, keyed by document key."""
+
+    def __init__(self):
+        self.schemas = {}
+        self.generator = None
+        self.env_checked = False
+        self.hits = 0
+        self.stale = 0
+        self.lock = threading.Lock()
+
+
+_SNAPSHOT = _Snapshot()
+
+
+def snapshot_key(cls: type) -> str:
+    """
+    Returns the key of a document class in snapshot files.
+
+    Args:
+        cls(type): A MongoEngine document class
+
+    Returns:
+        str
+    """
+
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+def _variant_name(strict: bool, use_defs: bool) -> str:
+    return ('strict' if strict else 'non_strict') + ('_defs' if use_defs else '')
+
+
+def export_snapshot(path: typing.Union[str, os.PathLike],
+                    documents: typing.Optional[typing.Iterable[type]] = None,
+                    variants: typing.Iterable[typing.Tuple[bool, bool]] = DEFAULT_VARIANTS) -> int:
+    """
+    Writes JSON schemas of given documents to a single snapshot file. The snapshot can be loaded at startup with
+    `load_snapshot()` or by setting MONGOENGINE_JSONSCHEMA_SNAPSHOT environment variable to its path, then
+    `json_schema()` serves schemas from it instead of generating them. Each document is stored with the shape of its
+    fields, see `document_shape()`, and the snapshot with the package version and registered field handlers, see
+    `generator_fingerprint()`. Documents whose fields were added, removed or changed type after the export, and all
+    documents after an upgrade or a change of handlers, are generated as usual. Changes of field options only, e.g. of
+    `max_length`, are not detected, export the snapshot again after making them.
+
+    Args:
+        path(typing.Union[str, os.PathLike]): Snapshot file path
+        documents(typing.Optional[typing.Iterable[type]]): Document classes to export. Defaults to all registered
+                                                            documents that inherit JsonSchemaMixin.
+        variants(typing.Iterable[typing.Tuple[bool, bool]]): (strict, use_defs) pairs to export. Defaults to strict
+                                                             and non-strict schemas without "$defs".
+
+    Returns:
+        int: Number of exported documents
+    """
+
+    if documents is None:
+        documents = [doc_cls for _, doc_cls in iter_schema_documents()]
+
+    variants = tuple(variants)
+    schemas = {}
+    for doc_cls in documents:
+        schemas[snapshot_key(doc_cls)] = {
+            'shape': document_shape(doc_cls),
+            'variants': {_variant_name(strict, use_defs): doc_cls.json_schema(strict=strict, use_defs=use_defs)
+                         for strict, use_defs in variants}
+        }
+
+    tmp_path = f'{os.fspath(path)}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'format': SNAPSHOT_FORMAT, 'generator': generator_fingerprint(), 'schemas': schemas}, f,
+                  sort_keys=True, default=str)
+    os.replace(tmp_path, path)
+    return len(schemas)
+
+
+def load_snapshot(path: typing.Union[str, os.PathLike]) -> int:
+    """
+    Loads a snapshot file written by `export_snapshot()`, replacing any previously loaded snapshot. Schema cache is
+    not cleared, call `clear_schema_cache()` to serve already generated schemas from the snapshot.
+
+    Args:
+        path(typing.Union[str, os.PathLike]): Snapshot file path
+
+    Returns:
+        int: Number of documents in snapshot
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported format
+    """
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict) or data.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f'{path} is not a schema snapshot of format {SNAPSHOT_FORMAT}')
+
+    schemas = {key: (entry['shape'], {name: freeze(schema) for name, schema in entry['variants'].items()})
+               for key, entry in data['schemas'].items()}
+    with _SNAPSHOT.lock:
+        _SNAPSHOT.schemas = schemas
+        _SNAPSHOT.generator = data['generator']
+        _SNAPSHOT.env_checked = True
+        _SNAPSHOT.hits = 0
+        _SNAPSHOT.stale = 0
+    return len(schemas)
+
+
+def unload_snapshot() -> None:
+    """Unloads snapshot, schemas that are not cached yet are generated again."""
+
+    with _SNAPSHOT.lock:
+        _SNAPSHOT.schemas = {}
+        _SNAPSHOT.generator = None
+        _SNAPSHOT.env_checked = True
+        _SNAPSHOT.hits = 0
+        _SNAPSHOT.stale = 0
+
+
+def snapshot_info() -> SnapshotInfo:
+    """
+    Returns snapshot statistics. `hits` counts schemas served from the snapshot, `stale` counts lookups that fell
+    back to generation because document fields or the generator differ from the snapshot.
+
+    Returns:
+        SnapshotInfo: Named tuple of (documents, hits, stale)
+    """
+
+    with _SNAPSHOT.lock:
+        return SnapshotInfo(len(_SNAPSHOT.schemas), _SNAPSHOT.hits, _SNAPSHOT.stale)
+
+
+def _snapshot_source(cls: type, strict: bool, use_defs: bool) -> typing.Optional[dict]:
+    if not _SNAPSHOT.env_checked:
+        _SNAPSHOT.env_checked = True
+        path = os.environ.get(SNAPSHOT_ENV)
+        if path and os.path.exists(path):
+            load_snapshot(path)
+
+    entry = _SNAPSHOT.schemas.get(snapshot_key(cls))
+    if entry is None:
+        return None
+
+    schema = entry[1].get(_variant_name(strict, use_defs))
+    if schema is None:
+        return None
+
+    fresh = entry[0] == document_shape(cls) and _SNAPSHOT.generator == generator_fingerprint()
+    with _SNAPSHOT.lock:
+        if fresh:
+            _SNAPSHOT.hits += 1
+        else:
+            _SNAPSHOT.stale += 1
+    return schema if fresh else None
+
+
+_SCHEMA_SOURCES.append(_snapshot_source)
@@ -0,0 +1,306 @@
+import base64
+import datetime
+import io
+import json
+import mmap
+import os
+import time
+import typing
+import uuid
+from collections import namedtuple
+
+import mongoengine as me
+from mongoengine.base.common import _document_registry
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+LineError = namedtuple('LineError', ['line', 'errors'])
+
+Source = typing.Union[str, os.PathLike, typing.BinaryIO]
+
+
+class StreamStats:
+    """
+    Statistics of a streaming validation, updated while lines are validated.
+
+    Attributes:
+        lines(int): Number of non-empty lines read
+        invalid(int): Number of lines that are not valid JSON or fail validation
+        bytes(int): Number of bytes read
+        seconds(float): Elapsed time
+    """
+
+    __slots__ = ('lines', 'invalid', 'bytes', 'seconds')
+
+    def __init__(self):
+        self.lines = 0
+        self.invalid = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (f'StreamStats(lines={self.lines}, invalid={self.invalid}, bytes={self.bytes}, '
+                f'seconds={self.seconds:.3f})')
+
+
+def _iter_mmap_lines(mm: mmap.mmap) -> typing.Iterator[bytes]:
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    start = 0
+    size = len(mm)
+    while start < size:
+        end = mm.find(b'\n', start)
+        if end == -1:
+            end = size
+        yield mm[start:end]
+        start = end + 1
+
+
+def _iter_buffered_lines(f: typing.BinaryIO, buffer_size: int) -> typing.Iterator[bytes]:
+    pending = []
+    while True:
+        buffer = f.read(buffer_size)
+        if not buffer:
+            break
+        start = 0
+        end = buffer.find(b'\n')
+        while end != -1:
+            if pending:
+                pending.append(buffer[start:end])
+                yield b''.join(pending)
+                pending = []
+            else:
+                yield buffer[start:end]
+            start = end + 1
+            end = buffer.find(b'\n', start)
+        if start < len(buffer):
+            pending.append(buffer[start:])
+    if pending:
+        yield b''.join(pending)
+
+
+def _iter_file_lines(f: typing.BinaryIO, buffer_size: int) -> typing.Iterator[bytes]:
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        # Not a regular file (pipe, socket, in-memory stream) or an empty file
+        yield from _iter_buffered_lines(f, buffer_size)
+        return
+    with mm:
+        yield from _iter_mmap_lines(mm)
+
+
+def iter_lines(source: Source, buffer_size: int = DEFAULT_BUFFER_SIZE) -> typing.Iterator[bytes]:
+    """
+    Yields lines of a file without line terminators, without loading the whole file into memory. Regular files are
+    memory-mapped, other files are read in fixed-size buffers.
+
+    Args:
+        source(Source): File path or a file object opened in binary mode
+        buffer_size(int): Size of read buffers when the file cannot be memory-mapped. Defaults to 1 MiB.
+
+    Returns:
+        typing.Iterator[bytes]
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _iter_file_lines(f, buffer_size)
+    else:
+        yield from _iter_file_lines(source, buffer_size)
+
+
+def _from_binary(data: str, subtype: str) -> str:
+    """Returns base64 data of a binary value, or the UUID string of UUID subtypes (3 and 4)."""
+
+    if int(subtype, 16) in (3, 4):
+        return str(uuid.UUID(bytes=base64.b64decode(data)))
+    return data
+
+
+def _from_extended_json(value: typing.Any) -> typing.Any:
+    if isinstance(value, list):
+        return [_from_extended_json(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if '$binary' in value:
+        binary = value['$binary']
+        if isinstance(binary, dict) and len(value) == 1:
+            return _from_binary(binary.get('base64', ''), binary.get('subType', '00'))
+        if isinstance(binary, str) and set(value) == {'$binary', '$type'}:
+            # Legacy extended JSON
+            return _from_binary(binary, value['$type'])
+    if len(value) == 1:
+        key, inner = next(iter(value.items()))
+        if key == '$oid':
+            return inner
+        if key in ('$numberInt', '$numberLong'):
+            return int(inner)
+        if key == '$numberDouble':
+            return float(inner)
+        if key == '$numberDecimal':
+            return float(inner)
+        if key == '$date':
+            if isinstance(inner, dict):
+                inner = int(inner.get('$numberLong', 0))
+            if isinstance(inner, int):
+                return datetime.datetime.fromtimestamp(inner / 1000, datetime.timezone.utc).isoformat()
+            return inner
+        if key == '$uuid':
+            return inner
+    return {k: _from_extended_json(v) for k, v in value.items()}
+
+
+_REFERENCE_DOCUMENT_FIELDS = (me.fields.CachedReferenceField, me.fields.GenericReferenceField,
+                              me.fields.GenericLazyReferenceField)
+
+
+def _reference_id(value: typing.Any) -> typing.Any:
+    if isinstance(value, dict):
+        value = value.get('_ref', value.get('_id', value))
+    if isinstance(value, dict):
+        value = value.get('$id', value)
+    return value
+
+
+def _normalize_field(field: typing.Optional[me.fields.BaseField], value: typing.Any) -> typing.Any:
+    """Converts a stored field value to the shape of field's property schema."""
+
+    inner = getattr(field, 'field', None)
+    if isinstance(field, me.fields.EmbeddedDocumentField):
+        return _rename_fields(field.document_type, value)
+    if isinstance(field, me.fields.GenericEmbeddedDocumentField) and isinstance(value, dict):
+        name = value.get('_cls')
+        document = _document_registry.get(name) if isinstance(name, str) else None
+        if document is None:
+            return value
+        return {'_cls': value['_cls'], **_rename_fields(document, value)}
+    if isinstance(field, me.fields.GenericReferenceField) and getattr(field, 'choices', None) and \
+            isinstance(value, dict) and '_cls' in value:
+        # Generic references with choices are validated as {"_cls": ..., "_ref": <id>}
+        return {'_cls': value['_cls'], '_ref': _reference_id(value)}
+    if isinstance(field, _REFERENCE_DOCUMENT_FIELDS):
+        return _reference_id(value)
+    if isinstance(inner, (me.fields.EmbeddedDocumentField, me.fields.GenericEmbeddedDocumentField,
+                          *_REFERENCE_DOCUMENT_FIELDS)) and isinstance(value, list):
+        return [_normalize_field(inner, item) for item in value]
+    return value
+
+
+def _rename_fields(document: type, record: typing.Any) -> typing.Any:
+    if not isinstance(record, dict):
+        return record
+    renamed = {}
+    for key, value in record.items():
+        name = document._reverse_db_field_map.get(key, key)
+        if key in ('_id', '_cls') and (name == 'id' or name.startswith('_') or name not in document._fields):
+            # Not part of the schema unless stored for a primary key field declared under another name
+            continue
+        renamed[name] = _normalize_field(document._fields.get(name), value)
+    return renamed
+
+
+def mongoexport_transform(document: type) -> typing.Callable[[typing.Any], typing.Any]:
+    """
+    Returns a function converting records of `mongoexport` output (MongoDB Extended JSON) to the shape of the
+    document's JSON schema: `$oid`, `$date`, `$uuid`, `$binary` (base64, or UUID strings of UUID subtypes) and
+    number wrappers are flattened to plain values, `_id` and `_cls` keys are dropped, stored references are reduced
+    to their ids and database field names are renamed to attribute names, including in embedded documents. `_id` is
+    kept as the value of a primary key field declared under another name, e.g. `code = StringField(primary_key=True)`.
+    Generic embedded documents and generic references with choices keep their `_cls` value, which their schemas are
+    switched on.
+
+    Args:
+        document(type): Document class the records belong to
+
+    Returns:
+        typing.Callable[[typing.Any], typing.Any]
+    """
+
+    return lambda record: _rename_fields(document, _from_extended_json(record))
+
+
+def iter_ndjson_errors(document: type,
+                       source: Source,
+                       strict: bool = True,
+                       transform: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+                       buffer_size: int = DEFAULT_BUFFER_SIZE,
+                       stats: typing.Optional[StreamStats] = None) -> typing.Iterator[LineError]:
+    """
+    Validates each line of a newline-delimited JSON file against document's JSON schema and yields `LineError` of
+    invalid lines with their 1-based line number. Errors are lists of `(path, message)` tuples, lines that are not
+    valid JSON are reported with an empty path. Empty lines are skipped.
+
+    Args:
+        document(type): Document class, validation uses its `compiled_validator()`
+        source(Source): File path or a file object opened in binary mode
+        strict(bool): Passed to `compiled_validator()`. Defaults to True.
+        transform(typing.Optional[typing.Callable[[typing.Any], typing.Any]]): Applied to each parsed record before
+            validation, e.g. `mongoexport_transform(document)`. Defaults to None.
+        buffer_size(int): Size of read buffers when the file cannot be memory-mapped. Defaults to 1 MiB.
+        stats(typing.Optional[StreamStats]): Updated with statistics while lines are read. Defaults to None.
+
+    Returns:
+        typing.Iterator[LineError]
+    """
+
+    validator = document.compiled_validator(strict=strict)
+    stats = stats if stats is not None else StreamStats()
+    start = time.perf_counter()
+    try:
+        for line_number, line in enumerate(iter_lines(source, buffer_size=buffer_size), 1):
+            stats.bytes += len(line) + 1
+            if not line.strip():
+                continue
+            stats.lines += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                errors = [((), f'Invalid JSON: {e}')]
+            else:
+                errors = validator.errors(transform(record) if transform is not None else record)
+            if errors:
+                stats.invalid += 1
+                yield LineError(line_number, errors)
+    finally:
+        stats.seconds += time.perf_counter() - start
+
+
+def validate_ndjson(document: type,
+                    source: Source,
+                    strict: bool = True,
+                    transform: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+                    buffer_size: int = DEFAULT_BUFFER_SIZE,
+                    on_error: typing.Optional[typing.Callable[[LineError], typing.Any]] = None) -> StreamStats:
+    """
+    Validates a newline-delimited JSON file, e.g. `mongoexport` output, against document's JSON schema and returns
+    statistics. See `iter_ndjson_errors()`.
+
+    Args:
+        document(type): Document class
+        source(Source): File path or a file object opened in binary mode
+        strict(bool): Passed to `compiled_validator()`. Defaults to True.
+        transform(typing.Optional[typing.Callable[[typing.Any], typing.Any]]): Applied to each parsed record before
+            validation. Defaults to None.
+        buffer_size(int): Size of read buffers when the file cannot be memory-mapped. Defaults to 1 MiB.
+        on_error(typing.Optional[typing.Callable[[LineError], typing.Any]]): Called with each invalid line.
+                                                                             Defaults to None.
+
+    Returns:
+        StreamStats
+    """
+
+    stats = StreamStats()
+    for error in iter_ndjson_errors(document, source, strict=strict, transform=transform, buffer_size=buffer_size,
+                                    stats=stats):
+        if on_error is not None:
+            on_error(error)
+    return stats
@@ -0,0 +1,72 @@
+import re
+import typing
+
+from jsonschema import validators
+from jsonschema.exceptions import ValidationError
+
+_PATTERNS = {}
+_VALIDATOR_CLASSES = {}
+
+
+def compiled_pattern(pattern: str) -> typing.Pattern:
+    """
+    Returns compiled regular expression of given pattern. Compiled patterns are kept for the lifetime of the process,
+    unlike `re` module's own cache which is limited in size.
+
+    Args:
+        pattern(str): Regular expression
+
+    Returns:
+        typing.Pattern
+    """
+
+    try:
+        return _PATTERNS[pattern]
+    except KeyError:
+        return _PATTERNS.setdefault(pattern, re.compile(pattern))
+
+
+def _pattern(validator, pattern, instance, schema):
+    if validator.is_type(instance, 'string') and not compiled_pattern(pattern).search(instance):
+        yield ValidationError(f'{instance!r} does not match {pattern!r}')
+
+
+def _pattern_properties(validator, pattern_properties, instance, schema):
+    if not validator.is_type(instance, 'object'):
+        return
+
+    for pattern, subschema in pattern_properties.items():
+        regex = compiled_pattern(pattern)
+        for k, v in instance.items():
+            if regex.search(k):
+                yield from validator.descend(v, subschema, path=k, schema_path=pattern)
+
+
+def _validator_class(schema: dict) -> type:
+    base = validators.validator_for(schema)
+    try:
+        return _VALIDATOR_CLASSES[base]
+    except KeyError:
+        validator_cls = validators.extend(base, {'pattern': _pattern, 'patternProperties': _pattern_properties})
+        return _VALIDATOR_CLASSES.setdefault(base, validator_cls)
+
+
+def build_validator(schema: dict) -> typing.Any:
+    """
+    Checks given schema against its meta-schema once and returns a `jsonschema` validator instance for it. Validator
+    class is picked by the schema's "$schema" keyword (latest draft by default) and extended to reuse compiled
+    "pattern" and "patternProperties" regular expressions across validations.
+
+    Args:
+        schema(dict): JSON schema
+
+    Returns:
+        jsonschema.protocols.Validator
+
+    Raises:
+        jsonschema.exceptions.SchemaError: If the schema itself is invalid
+    """
+
+    validator_cls = _validator_class(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
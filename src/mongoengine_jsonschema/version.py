@@ -0,0 +1,7 @@
+from importlib import metadata
+
+try:
+    __version__ = metadata.version('mongoengine-jsonschema')
+except metadata.PackageNotFoundError:
+    # Imported from a source tree that is not installed
+    __version__ = '0+unknown'
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from mongoengine_jsonschema import async_validation_info, configure_async_validation, reset_async_validation_info
+from mongoengine_jsonschema.aio import _offload
+
+from test_json_schema import ExampleRequiredDocument
+
+
+@pytest.fixture(autouse=True)
+def async_settings():
+    configure_async_validation(inline_max_items=5, inline_max_bytes=100, max_pending=2)
+    reset_async_validation_info()
+    yield
+    configure_async_validation(inline_max_items=1000, inline_max_bytes=64 * 1024, max_pending=64)
+
+
+LARGE = {'required_field': 'A', 'embedded_document_list_field': [{'required_field': str(i)} for i in range(10)]}
+
+
+class TestAvalidate:
+    def test_inline(self):
+        assert asyncio.run(ExampleRequiredDocument.avalidate({'required_field': 'A'})) == {'required_field': 'A'}
+        info = async_validation_info()
+        assert (info.inline, info.offloaded) == (1, 0)
+
+    def test_offloaded(self):
+        assert asyncio.run(ExampleRequiredDocument.avalidate(LARGE)) == LARGE
+        info = async_validation_info()
+        assert (info.inline, info.offloaded, info.queue_depth, info.in_flight) == (0, 1, 0, 0)
+        assert info.max_latency >= info.mean_latency > 0
+
+    def test_raw_payload(self):
+        assert asyncio.run(ExampleRequiredDocument.avalidate(b'{"required_field": "A"}')) == {'required_field': 'A'}
+        assert asyncio.run(ExampleRequiredDocument.avalidate(json.dumps(LARGE))) == LARGE
+        assert async_validation_info().offloaded == 1
+
+    @pytest.mark.parametrize('payload', [{}, {**LARGE, 'required_field': 1}])
+    def test_invalid(self, payload):
+        with pytest.raises(ValidationError):
+            asyncio.run(ExampleRequiredDocument.avalidate(payload))
+
+    def test_not_strict(self):
+        assert asyncio.run(ExampleRequiredDocument.avalidate({}, strict=False)) == {}
+
+    def test_bounded(self):
+        async def validate_all():
+            return await asyncio.gather(*(ExampleRequiredDocument.avalidate(LARGE) for _ in range(10)))
+
+        assert asyncio.run(validate_all()) == [LARGE] * 10
+        info = async_validation_info()
+        assert info.offloaded == 10
+        assert info.max_queue_depth <= 2
+
+    def test_cancelled_before_started(self):
+        configure_async_validation(max_workers=1, max_pending=3)
+        release = threading.Event()
+
+        async def cancel_queued():
+            blocker = asyncio.ensure_future(_offload(release.wait))
+            queued = [asyncio.ensure_future(ExampleRequiredDocument.avalidate(LARGE)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert async_validation_info().queue_depth == 2
+            for task in queued:
+                task.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            release.set()
+            await blocker
+
+        try:
+            asyncio.run(cancel_queued())
+        finally:
+            configure_async_validation(max_workers=4)
+        info = async_validation_info()
+        assert (info.queue_depth, info.in_flight) == (0, 0)
+
+
+class TestAvalidateMany:
+    payloads = [{'required_field': 'A'}, {}, {'required_field': 1}] * 4
+
+    def test_inline(self):
+        results = asyncio.run(ExampleRequiredDocument.avalidate_many(self.payloads[:3]))
+        assert [index for index, _ in results] == [1, 2]
+        assert async_validation_info().inline == 1
+
+    def test_offloaded(self):
+        results = asyncio.run(ExampleRequiredDocument.avalidate_many(self.payloads, chunk_size=5))
+        assert results == list(ExampleRequiredDocument.validate_many(self.payloads))
+        assert async_validation_info().offloaded == 3
@@ -0,0 +1,74 @@
+import json
+
+import mongoengine as me
+
+from mongoengine_jsonschema import JsonSchemaMixin, SchemaAnalysis, analyze_registry, analyze_schema
+from mongoengine_jsonschema.fields import POINT_PROP
+
+from test_json_schema import (ExampleDefsDocument, ExampleDocumentWithCustomSchema, ExampleEmbeddedDocument,
+                              ExampleTreeNodeDocument)
+
+
+class ExampleAnalyzedDocument(me.Document, JsonSchemaMixin):
+    first = me.EmbeddedDocumentField(ExampleEmbeddedDocument)
+    others = me.EmbeddedDocumentListField(ExampleEmbeddedDocument)
+    location = me.GeoPointField()
+    point = me.PointField()
+    name = me.StringField()
+
+
+def _size(value):
+    return len(json.dumps(value, sort_keys=True, separators=(',', ':')))
+
+
+class TestAnalyzeSchema:
+    def test_sizes(self):
+        analysis = analyze_schema(ExampleAnalyzedDocument)
+        assert isinstance(analysis, SchemaAnalysis)
+        assert analysis.document == 'ExampleAnalyzedDocument'
+        assert analysis.size == len(ExampleAnalyzedDocument.json_schema_bytes())
+        assert analysis.defs_size == len(ExampleAnalyzedDocument.json_schema_bytes(use_defs=True))
+        assert analysis.defs_savings == analysis.size - analysis.defs_size
+
+    def test_properties(self):
+        analysis = analyze_schema(ExampleAnalyzedDocument)
+        properties = dict(analysis.properties)
+        schema = ExampleAnalyzedDocument.json_schema()
+        assert properties[('name',)] == _size(schema['properties']['name'])
+        assert properties[('first', 'embedded_field')] == _size(
+            schema['properties']['first']['properties']['embedded_field'])
+        assert ('others', 'embedded_field') in properties
+        # Geo fields are leaves, their "type" and "coordinates" are not document properties
+        assert [path for path in properties if path[0] == 'point'] == [('point',)]
+        sizes = [size for _, size in analysis.properties]
+        assert sizes == sorted(sizes, reverse=True)
+
+    def test_inlined(self):
+        analysis = analyze_schema(ExampleAnalyzedDocument)
+        properties = ExampleAnalyzedDocument.json_schema()['properties']
+        embedded_size = _size(properties['first']) + _size(properties['others']['items'])
+        assert analysis.inlined == {'ExampleEmbeddedDocument': (2, embedded_size)}
+        # Point field inlines the pair in both of its forms, geo point field once
+        assert analysis.point_blocks == (3, 3 * _size(POINT_PROP))
+
+    def test_defs_savings(self):
+        analysis = analyze_schema(ExampleDefsDocument)
+        assert analysis.inlined['ExampleAddressDocument'][0] == 3
+        assert analysis.defs_savings > 0
+
+    def test_recursive_document(self):
+        analysis = analyze_schema(ExampleTreeNodeDocument)
+        assert analysis.inlined == {}
+
+    def test_custom_schema(self):
+        analysis = analyze_schema(ExampleDocumentWithCustomSchema)
+        assert analysis.size == len(ExampleDocumentWithCustomSchema.json_schema_bytes())
+        assert analysis.defs_savings == 0
+
+    def test_registry(self):
+        analyses = analyze_registry(include_embedded=False)
+        names = [analysis.document for analysis in analyses]
+        assert 'ExampleAnalyzedDocument' in names
+        assert 'ExampleEmbeddedDocument' not in names
+        sizes = [analysis.size for analysis in analyses]
+        assert sizes == sorted(sizes, reverse=True)
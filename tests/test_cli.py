@@ -0,0 +1,77 @@
+import json
+
+from mongoengine_jsonschema.cli import MANIFEST_NAME, export_schemas, main
+
+import test_json_schema
+
+
+class TestExport:
+    def test_export(self, tmp_path):
+        results = export_schemas(['test_json_schema'], tmp_path)
+        names = {result.name for result in results}
+        assert 'ExampleDocument' in names
+        assert 'ExampleEmbeddedDocument' in names
+        assert all(result.status == 'written' for result in results)
+        schema = json.loads((tmp_path / 'ExampleDocument.json').read_text())
+        assert schema == test_json_schema.ExampleDocument.json_schema().to_dict()
+        assert (tmp_path / MANIFEST_NAME).exists()
+
+    def test_unchanged_skipped(self, tmp_path):
+        export_schemas(['test_json_schema'], tmp_path)
+        results = export_schemas(['test_json_schema'], tmp_path)
+        assert all(result.status == 'unchanged' for result in results)
+
+    def test_options_change_exports_all(self, tmp_path):
+        export_schemas(['test_json_schema'], tmp_path)
+        results = export_schemas(['test_json_schema'], tmp_path, strict=False)
+        assert all(result.status == 'written' for result in results)
+        assert 'required' not in json.loads((tmp_path / 'ExampleDocument.json').read_text())
+
+    def test_upgrade_exports_all(self, tmp_path, monkeypatch):
+        export_schemas(['test_json_schema'], tmp_path)
+        monkeypatch.setattr('mongoengine_jsonschema.fingerprint.__version__', '999')
+        monkeypatch.setattr('mongoengine_jsonschema.fingerprint._GENERATOR', {})
+        results = export_schemas(['test_json_schema'], tmp_path)
+        assert all(result.status == 'written' for result in results)
+
+    def test_deleted_file_exported(self, tmp_path):
+        export_schemas(['test_json_schema'], tmp_path)
+        (tmp_path / 'ExampleDocument.json').unlink()
+        results = {result.name: result.status for result in export_schemas(['test_json_schema'], tmp_path)}
+        assert results['ExampleDocument'] == 'written'
+        assert results['ExampleEmbeddedDocument'] == 'unchanged'
+
+    def test_no_embedded(self, tmp_path):
+        names = {result.name for result in export_schemas(['test_json_schema'], tmp_path, include_embedded=False)}
+        assert 'ExampleDocument' in names
+        assert 'ExampleEmbeddedDocument' not in names
+
+    def test_other_modules_excluded(self, tmp_path):
+        assert export_schemas(['json'], tmp_path) == []
+
+    def test_main(self, tmp_path, capsys):
+        assert main(['export', 'test_json_schema', '--out', str(tmp_path), '--workers', '2']) == 0
+        output = capsys.readouterr().out
+        assert 'ExampleDocument' in output
+        assert 'written' in output
+
+
+class TestAnalyze:
+    def test_document(self, capsys):
+        assert main(['analyze', 'test_json_schema.ExampleDefsDocument', '--top', '2']) == 0
+        output = capsys.readouterr().out
+        assert 'ExampleDefsDocument' in output
+        assert 'inlined ExampleAddressDocument x3' in output
+        assert 'work_address' not in output
+
+    def test_module_json(self, capsys):
+        assert main(['analyze', 'test_json_schema', '--no-embedded', '--json']) == 0
+        report = json.loads(capsys.readouterr().out)
+        names = [item['document'] for item in report]
+        assert 'ExampleDocument' in names
+        assert 'ExampleEmbeddedDocument' not in names
+        sizes = [item['size'] for item in report]
+        assert sizes == sorted(sizes, reverse=True)
+        document = report[names.index('ExampleDocument')]
+        assert document['size'] == len(test_json_schema.ExampleDocument.json_schema_bytes())
+        assert document['defs_savings'] == document['size'] - document['defs_size']
@@ -0,0 +1,244 @@
+import datetime
+import decimal
+import itertools
+import uuid
+
+import bson
+import pytest
+import mongoengine as me
+
+from mongoengine_jsonschema import JsonSchemaMixin, register_field_converter
+from mongoengine_jsonschema.compiler import CompiledValidator, PartialValidator, compile_validator
+from jsonschema.exceptions import ValidationError
+
+from test_json_schema import (ChoiceEnum, ExampleDefsDocument, ExampleDocument, ExampleDocumentInherited,
+                              ExampleDocumentWithRequiredCustomSchema, ExampleDynamicDocument,
+                              ExampleDynamicEmbeddedDocument, ExampleEmbeddedDocument, ExampleRequiredDocument,
+                              example_json)
+
+PROBES = [None, True, False, 0, 1, -1, 1.0, 1.5, 6, 10 ** 20, '', '1', '4', 'abc', 'A', 'https://localhost/',
+          'no url', [], [1], [1, 2], [1, 2, 3], ['1'], ['a', 'b'], [True], [1.5, 'a'], [[1, 2]], [[1, 2], [3]],
+          [[[1, 2]]], [[[[1, 2]]]], [{}], [{'embedded_field': 'A'}], [{'embedded_field': 1}], {}, {'a': 1},
+          {'a': 'b'}, {'embedded_field': 'A'}, {'embedded_field': 1}, {'unknown': 1}, {'street': 'A'},
+          {'type': 'Point', 'coordinates': [1, 2]}, {'type': 'Point', 'coordinates': [1, 'a']},
+          {'type': 'LineString', 'coordinates': [[1, 2], [3, 4]]}, {'type': 'Polygon'}, {'coordinates': [[[1, 2]]]},
+          {'name': 'root', 'children': []}, {'name': 'root', 'children': [{'children': []}]}]
+
+EXAMPLE_JSON = example_json.__wrapped__()
+
+
+def _payloads(base):
+    yield base
+    yield {}
+    yield []
+    yield 'string'
+    yield {**base, 'unknown_field': 1}
+    for key in base:
+        yield {k: v for k, v in base.items() if k != key}
+    for key, probe in itertools.product(base, PROBES):
+        yield {**base, key: probe}
+
+
+def _assert_equivalent(document, base, strict=True):
+    compiled = document.compiled_validator(strict=strict)
+    reference = document.json_validator(strict=strict)
+    for payload in _payloads(base):
+        assert compiled.is_valid(payload) == reference.is_valid(payload), payload
+
+
+class TestEquivalence:
+    @pytest.mark.parametrize('strict', [True, False])
+    def test_example_document(self, strict):
+        _assert_equivalent(ExampleDocument, EXAMPLE_JSON, strict=strict)
+
+    @pytest.mark.parametrize('strict', [True, False])
+    def test_embedded_documents(self, strict):
+        base = {'home_address': {'street': 'A'}, 'work_address': {'street': 'B'}, 'addresses': [{'street': 'C'}],
+                'tree': {'name': 'root', 'children': [{'name': 'leaf', 'children': []}]}}
+        _assert_equivalent(ExampleDefsDocument, base, strict=strict)
+        _assert_equivalent(ExampleRequiredDocument,
+                           {'required_field': 'A', 'embedded_document_field': {'required_field': 'B'},
+                            'embedded_document_list_field': [{'required_field': 'C'}]}, strict=strict)
+
+    def test_inherited_document(self):
+        _assert_equivalent(ExampleDocumentInherited, {'base_field': 'A', 'field': 'B'})
+
+    def test_dynamic_documents(self):
+        _assert_equivalent(ExampleDynamicDocument, {'field': 'A', 'dynamic': 1})
+
+    def test_dynamic_embedded_document(self):
+        _assert_equivalent(ExampleDynamicEmbeddedDocument,
+                           {'embedded_field': 'A', 'multi_embedded_field': {'embedded_field': 'B'}})
+
+    def test_custom_schema(self):
+        _assert_equivalent(ExampleDocumentWithRequiredCustomSchema, {'field': 'A'})
+
+    def test_choices_and_bounds(self):
+        class ExampleConstraintsDocument(me.Document, JsonSchemaMixin):
+            int_choices = me.IntField(choices=[1, 2])
+            float_bounds = me.FloatField(min_value=-1.5, max_value=1.5)
+            string_regex = me.StringField(regex=r'^[a-z]+$', required=True)
+            email = me.EmailField()
+            url = me.URLField()
+
+        base = {'int_choices': 1, 'float_bounds': 0.5, 'string_regex': 'abc', 'email': 'a@b.c',
+                'url': 'https://example.com/'}
+        _assert_equivalent(ExampleConstraintsDocument, base)
+        compiled = ExampleConstraintsDocument.compiled_validator()
+        assert not compiled.is_valid({**base, 'int_choices': True})
+        assert not compiled.is_valid({**base, 'url': 'HTTPS://example.com/'})
+
+
+class TestCompiledValidator:
+    def test_cached(self):
+        validator = ExampleDocument.compiled_validator()
+        assert isinstance(validator, CompiledValidator)
+        assert ExampleDocument.compiled_validator() is validator
+        assert ExampleDocument.compiled_validator(strict=False) is not validator
+
+    def test_source(self):
+        source = compile_validator(ExampleDocument).source
+        assert source.startswith('def validate_ExampleDocument(data, path, errors):')
+
+    def test_errors(self):
+        validator = ExampleDocument.compiled_validator()
+        errors = validator.errors({**EXAMPLE_JSON, 'int_field': 6,
+                                   'embedded_document_list_field': [{'embedded_field': 1}]})
+        assert errors == [(('embedded_document_list_field', 0, 'embedded_field'), "1 is not of type 'string'"),
+                          (('int_field',), '6 is greater than the maximum of 5')]
+
+    def test_validate(self):
+        validator = ExampleDocument.compiled_validator()
+        validator.validate(EXAMPLE_JSON)
+        with pytest.raises(ValidationError) as e:
+            validator.validate({**EXAMPLE_JSON, 'string_field': '4'})
+        assert list(e.value.path) == ['string_field']
+
+    def test_mongoengine_regex_reused(self):
+        class ExampleRegexDocument(me.Document, JsonSchemaMixin):
+            code = me.StringField(regex=r'^[A-Z]{3}$')
+
+        validator = compile_validator(ExampleRegexDocument)
+        assert ExampleRegexDocument.code.regex in validator.function.__globals__.values()
+
+    def test_list_of_plain_embedded_documents(self):
+        class ExamplePlainEmbeddedDocument(me.EmbeddedDocument):
+            name = me.StringField()
+
+        class ExamplePlainListDocument(me.Document, JsonSchemaMixin):
+            items = me.EmbeddedDocumentListField(ExamplePlainEmbeddedDocument)
+
+        _assert_equivalent(ExamplePlainListDocument, {'items': [{'name': 'A'}]})
+        assert ExamplePlainListDocument.compiled_validator().errors({'items': 'A'}) == [
+            (('items',), "'A' is not of type 'array'")]
+        ExamplePlainListDocument.validate_partial({'items': []})
+        assert ExamplePlainListDocument.from_json_validated({'items': [{'name': 'A'}]}) == {'items': [{'name': 'A'}]}
+        assert ExamplePlainListDocument.raw_bson_validator().errors(bson.encode({'items': [{'name': 'A'}]})) == []
+
+
+class TestPartialValidator:
+    def test_cached(self):
+        validator = ExampleDocument.partial_validator()
+        assert isinstance(validator, PartialValidator)
+        assert ExampleDocument.partial_validator() is validator
+        assert set(validator.field_validators) == set(ExampleDocument.json_schema()['properties'])
+
+    @pytest.mark.parametrize('key', [key for key in EXAMPLE_JSON if 'embedded' not in key])
+    def test_equivalent_to_non_strict(self, key):
+        validator = ExampleDocument.partial_validator()
+        reference = ExampleDocument.json_validator(strict=False)
+        for probe in PROBES:
+            assert validator.is_valid({key: probe}) == reference.is_valid({key: probe}), probe
+
+    def test_only_present_keys(self):
+        ExampleRequiredDocument.validate_partial({})
+        ExampleRequiredDocument.validate_partial({'embedded_document_field': {'required_field': 'A'}})
+
+    def test_values_strict(self):
+        with pytest.raises(ValidationError) as e:
+            ExampleRequiredDocument.validate_partial({'embedded_document_field': {}})
+        assert list(e.value.path) == ['embedded_document_field']
+
+    def test_unknown_key(self):
+        with pytest.raises(ValidationError) as e:
+            ExampleDocument.validate_partial({'string_field': '1', 'unknown': 1})
+        assert e.value.message == "Additional properties are not allowed ('unknown' was unexpected)"
+        ExampleDynamicDocument.validate_partial({'unknown': 1})
+
+    def test_not_object(self):
+        assert not ExampleDocument.partial_validator().is_valid([])
+
+    def test_custom_schema(self):
+        validator = ExampleDocumentWithRequiredCustomSchema.partial_validator()
+        assert validator.is_valid({})
+        assert validator.errors({'field': 1}) == [(('field',), "1 is not of type 'string'")]
+
+
+class TestConverter:
+    def test_convert(self):
+        data = {**EXAMPLE_JSON, 'binary_field': 'AAE=', 'reference_field': '507f191e810c19729de860eb',
+                'complex_datetime_field': '2018,11,13,20,20,39,000001'}
+        converted = ExampleDocument.from_json_validated(data)
+        assert converted['object_ID_field'] == bson.ObjectId('507f191e810c19729de860ea')
+        assert converted['reference_field'] == bson.ObjectId('507f191e810c19729de860eb')
+        assert converted['datetime_field'] == datetime.datetime(2018, 11, 13, 20, 20, 39)
+        assert converted['complex_datetime_field'] == datetime.datetime(2018, 11, 13, 20, 20, 39, 1)
+        assert converted['date_field'] == datetime.date(2018, 11, 13)
+        assert converted['decimal_field'] == decimal.Decimal('1.10')
+        assert converted['UUID_field'] == uuid.UUID('3e4666bf-d5e5-4aa7-b8ce-cefe41c7568a')
+        assert converted['binary_field'] == b'\x00\x01'
+        assert converted['enum_field'] is ChoiceEnum.A
+        assert converted['embedded_document_list_field'] == [{'embedded_field': 'A'}]
+        assert converted['string_field'] == '1'
+        assert data['object_ID_field'] == '507f191e810c19729de860ea'
+
+    def test_convert_utc_designator(self):
+        converted = ExampleDocument.from_json_validated({**EXAMPLE_JSON, 'datetime_field': '2024-01-01T00:00:00Z',
+                                                         'complex_datetime_field': '2024-01-01T00:00:00z'})
+        expected = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        assert converted['datetime_field'] == expected
+        assert converted['complex_datetime_field'] == expected
+
+    def test_construct(self):
+        document = ExampleDocument.from_json_validated(EXAMPLE_JSON, construct=True)
+        assert isinstance(document, ExampleDocument)
+        assert document.object_ID_field == bson.ObjectId('507f191e810c19729de860ea')
+        assert isinstance(document.embedded_document_field, ExampleEmbeddedDocument)
+        assert document.embedded_document_list_field[0].embedded_field == 'A'
+        assert document.datetime_field == datetime.datetime(2018, 11, 13, 20, 20, 39)
+        assert isinstance(document.generic_embedded_document_field, ExampleEmbeddedDocument)
+
+    def test_conversion_error(self):
+        with pytest.raises(ValidationError) as e:
+            ExampleDocument.from_json_validated({**EXAMPLE_JSON, 'object_ID_field': 'abc'})
+        assert list(e.value.path) == ['object_ID_field']
+        assert e.value.message == "'abc' is not a valid ObjectIdField value"
+
+    def test_validation_error(self):
+        with pytest.raises(ValidationError) as e:
+            ExampleDocument.from_json_validated({**EXAMPLE_JSON, 'embedded_document_list_field': [{'x': 1}]},
+                                                construct=True)
+        assert list(e.value.path) == ['embedded_document_list_field', 0]
+
+    def test_validates_like_compiled_validator(self):
+        converter = ExampleDocument.compiled_converter()
+        validator = ExampleDocument.compiled_validator()
+        for payload in _payloads(EXAMPLE_JSON):
+            expected = validator.errors(payload)
+            assert converter.errors(payload)[:len(expected)] == expected, payload
+
+    def test_custom_schema(self):
+        assert ExampleDocumentWithRequiredCustomSchema.from_json_validated({'field': 'A'}) == {'field': 'A'}
+        with pytest.raises(ValidationError):
+            ExampleDocumentWithRequiredCustomSchema.from_json_validated({'field': 1})
+
+    def test_register_field_converter(self):
+        class ExampleUpperField(me.StringField):
+            pass
+
+        class ExampleConverterDocument(me.Document, JsonSchemaMixin):
+            code = ExampleUpperField()
+
+        assert ExampleConverterDocument.from_json_validated({'code': 'abc'}) == {'code': 'abc'}
+        register_field_converter(ExampleUpperField, lambda field, value: value.upper())
+        assert ExampleConverterDocument.from_json_validated({'code': 'abc'}) == {'code': 'ABC'}
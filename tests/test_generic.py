@@ -0,0 +1,222 @@
+from importlib.metadata import version
+
+import bson
+import mongoengine as me
+import mongomock
+import pytest
+
+from mongoengine_jsonschema import JsonSchemaMixin, document_fingerprint
+from mongoengine_jsonschema.fields import generic_documents
+from mongoengine_jsonschema.fingerprint import _FINGERPRINTS
+from mongoengine_jsonschema.validation import build_validator
+
+
+class ExampleWheelDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    size = me.IntField(required=True)
+
+
+class ExampleEngineDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    meta = {'allow_inheritance': True}
+    power = me.IntField(min_value=0)
+
+
+class ExampleTurboDocument(ExampleEngineDocument):
+    boost = me.FloatField(required=True)
+
+
+class ExampleOwnerDocument(me.Document, JsonSchemaMixin):
+    name = me.StringField()
+
+
+class ExampleGarageDocument(me.Document, JsonSchemaMixin):
+    number = me.IntField(primary_key=True)
+
+
+class ExampleCarDocument(me.Document, JsonSchemaMixin):
+    part = me.GenericEmbeddedDocumentField(choices=[ExampleWheelDocument, ExampleEngineDocument])
+    parts = me.ListField(me.GenericEmbeddedDocumentField(choices=[ExampleWheelDocument]))
+    owner = me.GenericReferenceField(choices=[ExampleOwnerDocument, ExampleGarageDocument], required=True)
+    lazy_owner = me.GenericLazyReferenceField(choices=['ExampleOwnerDocument'])
+    garages = me.ListField(me.GenericReferenceField(choices=[ExampleGarageDocument]))
+    anything = me.GenericEmbeddedDocumentField()
+    any_reference = me.GenericReferenceField()
+
+
+WHEEL = 'ExampleWheelDocument'
+ENGINE = 'ExampleEngineDocument'
+TURBO = ExampleTurboDocument._class_name
+OWNER = 'ExampleOwnerDocument'
+GARAGE = 'ExampleGarageDocument'
+OID = '5f0c8c8f8c8c8c8c8c8c8c8c'
+
+PAYLOADS = [
+    {'owner': {'_cls': OWNER, '_ref': OID}},
+    {'owner': {'_cls': GARAGE, '_ref': 3}},
+    {'owner': {'_cls': GARAGE, '_ref': OID}},
+    {'owner': {'_cls': 'Unknown', '_ref': OID}},
+    {'owner': {'_cls': OWNER}},
+    {'owner': {'_ref': OID}},
+    {'owner': {'_cls': OWNER, '_ref': OID, 'name': 'A'}},
+    {'owner': OID},
+    {},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': WHEEL, 'size': 3}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': WHEEL}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': WHEEL, 'power': 3}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': TURBO, 'boost': 1.5, 'power': 3}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': ENGINE, 'boost': 1.5}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': ENGINE, 'power': -1}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'size': 3}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': {'_cls': 1}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'part': []},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'parts': [{'_cls': WHEEL, 'size': 3}, {'_cls': WHEEL, 'size': 'a'}]},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'parts': [{'_cls': ENGINE}]},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'garages': [{'_cls': GARAGE, '_ref': 1}]},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'garages': [{'_cls': OWNER, '_ref': OID}]},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'lazy_owner': {'_cls': OWNER, '_ref': 1}},
+    {'owner': {'_cls': OWNER, '_ref': OID}, 'anything': {'a': 1}, 'any_reference': OID},
+]
+
+
+@pytest.fixture
+def connection():
+    if version('mongoengine') < '0.27.0':
+        me.connect('mongoenginetest', host='mongomock://localhost', alias='default')
+    else:
+        me.connect('mongoenginetest', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient,
+                   alias='default')
+    yield
+    for document in (ExampleCarDocument, ExampleOwnerDocument, ExampleGarageDocument):
+        document.drop_collection()
+
+
+class TestGenericSchema:
+    def test_documents(self):
+        assert generic_documents(ExampleCarDocument.part) == [(WHEEL, ExampleWheelDocument),
+                                                              (ENGINE, ExampleEngineDocument),
+                                                              (TURBO, ExampleTurboDocument)]
+        assert generic_documents(ExampleCarDocument.lazy_owner) == [(OWNER, ExampleOwnerDocument)]
+        assert generic_documents(ExampleCarDocument.anything) == []
+
+    def test_embedded_inline(self):
+        prop = ExampleCarDocument.json_schema()['properties']['part']
+        assert prop['type'] == 'object'
+        assert prop['title'] == 'Part'
+        assert prop['properties'] == {'_cls': {'type': 'string', 'enum': [WHEEL, ENGINE, TURBO]}}
+        assert prop['required'] == ['_cls']
+        assert prop['discriminator'] == {'propertyName': '_cls'}
+
+        branch = prop['allOf'][0]
+        assert branch['if'] == {'properties': {'_cls': {'const': WHEEL}}, 'required': ['_cls']}
+        assert branch['then']['properties'] == {'_cls': {'type': 'string', 'const': WHEEL},
+                                                'size': {'type': 'integer', 'title': 'Size'}}
+        assert branch['then']['required'] == ['size']
+
+    def test_embedded_defs(self):
+        schema = ExampleCarDocument.json_schema(use_defs=True)
+        prop = schema['properties']['part']
+        assert prop['discriminator']['mapping'] == {name: f'#/$defs/{name}:_cls' for name in (WHEEL, ENGINE, TURBO)}
+        assert [branch['then'] for branch in prop['allOf']] == [{'$ref': f'#/$defs/{name}:_cls'}
+                                                                for name in (WHEEL, ENGINE, TURBO)]
+        assert schema['properties']['parts']['items']['allOf'][0]['then'] == {'$ref': f'#/$defs/{WHEEL}:_cls'}
+        assert set(schema['$defs']) == {f'{name}:_cls' for name in (WHEEL, ENGINE, TURBO)}
+        assert schema['$defs'][f'{TURBO}:_cls']['properties']['_cls'] == {'type': 'string', 'const': TURBO}
+
+    def test_reference(self):
+        schema = ExampleCarDocument.json_schema()
+        prop = schema['properties']['owner']
+        assert 'owner' in schema['required']
+        assert prop['properties'] == {'_cls': {'type': 'string', 'enum': [OWNER, GARAGE]}, '_ref': {}}
+        assert prop['additionalProperties'] is False
+        assert prop['allOf'][0] == {'required': ['_cls', '_ref']}
+        assert [branch['then'] for branch in prop['allOf'][1:]] == [{'properties': {'_ref': {'type': 'string'}}},
+                                                                    {'properties': {'_ref': {'type': 'integer'}}}]
+        assert schema['properties']['garages']['items']['properties']['_cls']['enum'] == [GARAGE]
+
+    def test_not_strict(self):
+        schema = ExampleCarDocument.json_schema(strict=False)
+        assert 'required' not in schema['properties']['part']
+        assert schema['properties']['owner']['allOf'][0]['if']['properties']['_cls'] == {'const': OWNER}
+
+    def test_without_choices(self):
+        properties = ExampleCarDocument.json_schema()['properties']
+        assert properties['anything'] == {'type': 'object', 'title': 'Anything'}
+        assert properties['any_reference']['type'] == 'string'
+
+    def test_fingerprint(self):
+        class ExampleSeatDocument(me.EmbeddedDocument, JsonSchemaMixin):
+            color = me.StringField()
+
+        class ExampleVanDocument(me.Document, JsonSchemaMixin):
+            seat = me.GenericEmbeddedDocumentField(choices=[ExampleSeatDocument])
+            driver = me.GenericReferenceField(choices=[ExampleOwnerDocument])
+
+        van, owner = document_fingerprint(ExampleVanDocument), document_fingerprint(ExampleOwnerDocument)
+        size = me.IntField()
+        size.name = 'size'
+        ExampleSeatDocument._fields = {**ExampleSeatDocument._fields, 'size': size}
+        ExampleSeatDocument._fields_ordered += ('size',)
+        # Memoized fingerprints are checked against the document's own fields only, as in a new process
+        _FINGERPRINTS.pop(ExampleVanDocument)
+        assert document_fingerprint(ExampleVanDocument) != van
+        assert document_fingerprint(ExampleOwnerDocument) == owner
+
+    def test_mongo_validator(self):
+        properties = ExampleCarDocument.mongo_validator()['$jsonSchema']['properties']
+        assert properties['part'] == {'bsonType': 'object', 'title': 'Part', 'required': ['_cls'],
+                                      'properties': {'_cls': {'bsonType': 'string', 'enum': [WHEEL, ENGINE, TURBO]}}}
+        assert properties['owner']['allOf'] == [{'required': ['_cls', '_ref']}]
+        assert 'discriminator' not in properties['owner']
+
+
+class TestGenericValidation:
+    @pytest.mark.parametrize('strict', [True, False])
+    @pytest.mark.parametrize('use_defs', [True, False])
+    def test_equivalence(self, strict, use_defs):
+        json_validator = build_validator(ExampleCarDocument.json_schema(strict, use_defs).to_dict())
+        validator = ExampleCarDocument.compiled_validator(strict=strict)
+        for payload in PAYLOADS:
+            assert validator.is_valid(payload) == json_validator.is_valid(payload), payload
+
+    def test_errors(self):
+        validator = ExampleCarDocument.compiled_validator()
+        owner = {'_cls': OWNER, '_ref': OID}
+        assert validator.errors({'owner': {'_cls': GARAGE, '_ref': OID}}) == [
+            (('owner', '_ref'), f"'{OID}' is not of type 'integer'")]
+        assert validator.errors({'owner': {'_cls': 'Unknown', '_ref': OID}}) == [
+            (('owner', '_cls'), f"'Unknown' is not one of {[OWNER, GARAGE]!r}")]
+        assert validator.errors({'owner': owner, 'part': {'_cls': ENGINE, 'power': -1}}) == [
+            (('part', 'power'), '-1 is less than the minimum of 0')]
+        assert validator.errors({'owner': owner, 'parts': [{'size': 1}]}) == [
+            (('parts', 0), "'_cls' is a required property")]
+
+    def test_stored_document(self):
+        car = ExampleCarDocument(owner=ExampleGarageDocument(number=3), part=ExampleTurboDocument(boost=1.0),
+                                 parts=[ExampleWheelDocument(size=1)])
+        raw = bson.encode(car.to_mongo())
+        assert ExampleCarDocument.raw_bson_validator().errors(raw) == []
+
+        car.part = ExampleTurboDocument()
+        raw = bson.encode(car.to_mongo())
+        assert ExampleCarDocument.raw_bson_validator().errors(raw) == [(('part',), "'boost' is a required property")]
+
+    def test_construct(self):
+        car = ExampleCarDocument.from_json_validated({'owner': {'_cls': OWNER, '_ref': OID},
+                                                      'part': {'_cls': TURBO, 'boost': 1.5}}, construct=True)
+        assert isinstance(car.part, ExampleTurboDocument)
+        assert car.part.boost == 1.5
+
+    def test_construct_reference(self, connection):
+        owner = ExampleOwnerDocument(name='A').save()
+        garage = ExampleGarageDocument(number=3).save()
+        car = ExampleCarDocument.from_json_validated({'owner': {'_cls': OWNER, '_ref': str(owner.id)},
+                                                      'garages': [{'_cls': GARAGE, '_ref': 3}]}, construct=True)
+        assert car.to_mongo()['owner']['_ref'] == bson.DBRef('example_owner_document', owner.id)
+        car.save()
+
+        car = ExampleCarDocument.objects.get(id=car.id)
+        assert car.owner == owner
+        assert car.garages == [garage]
+
+    def test_convert_reference(self):
+        converted = ExampleCarDocument.from_json_validated({'owner': {'_cls': GARAGE, '_ref': 3}})
+        assert converted['owner'] == {'_cls': GARAGE, '_ref': bson.DBRef('example_garage_document', 3)}
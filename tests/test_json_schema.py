@@ -1,9 +1,16 @@
+import copy
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 import pytest
 from importlib.metadata import version
 
 import mongoengine as me
-from mongoengine_jsonschema import JsonSchemaMixin
+from mongoengine_jsonschema import (FrozenDict, JsonSchemaMixin, SchemaContext, clear_schema_cache,
+                                    document_fingerprint, export_snapshot, generate_all, generator_fingerprint,
+                                    iter_schema_documents, load_snapshot, register_field_handler, register_field_type,
+                                    schema_cache_info, snapshot_info, unload_snapshot)
 import mongomock
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
@@ -60,6 +67,17 @@ class ExampleDocumentWithCustomSchema(me.Document, JsonSchemaMixin):
     }
 
 
+class ExampleDocumentWithRequiredCustomSchema(me.Document, JsonSchemaMixin):
+    _JSONSCHEMA = {
+        '$id': '/schemas/ExampleDocumentWithRequiredCustomSchema',
+        'type': 'object',
+        'title': 'Example Document With Required Custom Schema',
+        'properties': {'field': {'type': 'string'}},
+        'required': ['field'],
+        'additionalProperties': False
+    }
+
+
 class ExampleDocument(me.Document, JsonSchemaMixin):
     binary_field = me.BinaryField()
     boolean_field = me.BooleanField(required=True)
@@ -196,6 +214,521 @@ class TestDocumentSchema:
         }
 
 
+class ExampleLevel0Document(me.Document, JsonSchemaMixin):
+    meta = {'allow_inheritance': True}
+    level_0 = me.StringField(required=True)
+    overridden = me.StringField(required=True)
+
+
+class ExampleLevel1Document(ExampleLevel0Document):
+    level_1 = me.IntField()
+
+
+class ExampleLevel2Document(ExampleLevel1Document):
+    level_2 = me.IntField(required=True)
+    overridden = me.IntField()
+
+
+class ExampleLevel3Document(ExampleLevel2Document):
+    level_3 = me.IntField()
+
+
+class ExampleLevel3SiblingDocument(ExampleLevel2Document):
+    sibling = me.IntField()
+
+
+class ExampleLevel1NoMixinDocument(me.Document):
+    meta = {'allow_inheritance': True}
+    not_in_schema = me.StringField()
+
+
+class ExampleLevel2MixinDocument(ExampleLevel1NoMixinDocument, JsonSchemaMixin):
+    in_schema = me.StringField()
+
+
+class ExampleLevel3MixinDocument(ExampleLevel2MixinDocument):
+    leaf = me.StringField()
+
+
+class TestInheritance:
+    def test_deep_hierarchy(self):
+        schema = ExampleLevel3Document.json_schema()
+        assert list(schema['properties']) == ['level_3', 'level_2', 'overridden', 'level_1', 'level_0']
+        assert schema['required'] == ['level_2', 'level_0']
+        validate({'level_0': 'a', 'level_1': 1, 'level_2': 2, 'level_3': 3}, schema)
+        assert ExampleLevel3Document.compiled_validator().is_valid({'level_0': 'a', 'level_2': 2, 'overridden': 1})
+        assert not ExampleLevel3Document.compiled_validator().is_valid({'level_2': 2})
+
+    def test_child_overrides_parent(self):
+        schema = ExampleLevel3Document.json_schema()
+        assert schema['properties']['overridden']['type'] == 'integer'
+        assert 'overridden' not in schema['required']
+        assert ExampleLevel1Document.json_schema()['required'] == ['level_0', 'overridden']
+
+    def test_not_strict(self):
+        assert 'required' not in ExampleLevel3Document.json_schema(strict=False)
+
+    def test_no_mixin_ancestor_skipped(self):
+        schema = ExampleLevel3MixinDocument.json_schema()
+        assert list(schema['properties']) == ['leaf', 'in_schema']
+
+    def test_parent_schemas_reused(self):
+        clear_schema_cache()
+        ExampleLevel3Document.json_schema()
+        assert schema_cache_info().misses == 4
+        ExampleLevel3SiblingDocument.json_schema()
+        assert schema_cache_info().misses == 5
+        assert schema_cache_info().hits == 1
+
+    def test_defs(self):
+        schema = ExampleLevel3Document.json_schema(use_defs=True)
+        assert set(schema['properties']) == set(ExampleLevel3Document.json_schema()['properties'])
+
+
+class TestSchemaCache:
+    def test_cache_hit(self):
+        clear_schema_cache()
+        schema = ExampleDocument.json_schema()
+        assert schema_cache_info().misses >= 1
+        hits = schema_cache_info().hits
+        assert ExampleDocument.json_schema() is schema
+        assert schema_cache_info().hits == hits + 1
+
+    def test_cache_keyed_by_strict(self):
+        clear_schema_cache()
+        assert ExampleDocument.json_schema(strict=True) is not ExampleDocument.json_schema(strict=False)
+        assert 'required' in ExampleDocument.json_schema(strict=True)
+        assert 'required' not in ExampleDocument.json_schema(strict=False)
+
+    def test_clear_schema_cache(self):
+        schema = ExampleDocument.json_schema()
+        clear_schema_cache()
+        assert schema_cache_info() == (0, 0, 0)
+        assert ExampleDocument.json_schema() is not schema
+        assert ExampleDocument.json_schema() == schema
+
+    def test_cache_invalidated_on_field_change(self):
+        class ExampleMutableDocument(me.Document, JsonSchemaMixin):
+            field = me.StringField()
+
+        schema = ExampleMutableDocument.json_schema()
+        new_field = me.IntField()
+        new_field.name = 'new_field'
+        ExampleMutableDocument.new_field = new_field
+        ExampleMutableDocument._fields = {**ExampleMutableDocument._fields, 'new_field': new_field}
+        ExampleMutableDocument._fields_ordered += ('new_field',)
+        new_schema = ExampleMutableDocument.json_schema()
+        assert new_schema is not schema
+        assert new_schema['properties']['new_field']['type'] == 'integer'
+
+    def test_cache_invalidated_on_field_replaced_in_place(self):
+        class ExampleReplacedFieldDocument(me.Document, JsonSchemaMixin):
+            field = me.StringField()
+
+        schema = ExampleReplacedFieldDocument.json_schema()
+        new_field = me.IntField()
+        new_field.name = 'field'
+        ExampleReplacedFieldDocument._fields['field'] = new_field
+        ExampleReplacedFieldDocument.field = new_field
+        assert ExampleReplacedFieldDocument.json_schema()['properties']['field']['type'] == 'integer'
+        assert schema['properties']['field']['type'] == 'string'
+
+
+class ExampleRequiredEmbeddedDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    required_field = me.StringField(required=True)
+
+
+class ExampleRequiredDocument(me.Document, JsonSchemaMixin):
+    required_field = me.StringField(required=True)
+    embedded_document_field = me.EmbeddedDocumentField(ExampleRequiredEmbeddedDocument)
+    embedded_document_list_field = me.EmbeddedDocumentListField(ExampleRequiredEmbeddedDocument)
+
+
+class ExampleAddressDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    street = me.StringField(required=True)
+
+
+class ExampleTreeNodeDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    name = me.StringField(required=True)
+    children = me.EmbeddedDocumentListField('ExampleTreeNodeDocument')
+
+
+class ExampleDefsDocument(me.Document, JsonSchemaMixin):
+    home_address = me.EmbeddedDocumentField(ExampleAddressDocument)
+    work_address = me.EmbeddedDocumentField(ExampleAddressDocument)
+    addresses = me.EmbeddedDocumentListField(ExampleAddressDocument)
+    tree = me.EmbeddedDocumentField(ExampleTreeNodeDocument)
+
+
+class TestDefs:
+    def test_embedded_documents_referenced(self):
+        schema = ExampleDefsDocument.json_schema(use_defs=True)
+        assert schema['properties']['home_address']['$ref'] == '#/$defs/ExampleAddressDocument'
+        assert schema['properties']['work_address']['$ref'] == '#/$defs/ExampleAddressDocument'
+        assert schema['properties']['addresses']['items'] == {'$ref': '#/$defs/ExampleAddressDocument'}
+        assert schema['$defs']['ExampleAddressDocument']['required'] == ['street']
+        assert '$id' not in schema['$defs']['ExampleAddressDocument']
+
+    def test_no_defs_by_default(self):
+        schema = ExampleDocument.json_schema()
+        assert '$defs' not in schema
+
+    def test_self_referencing_document(self):
+        schema = ExampleDefsDocument.json_schema(use_defs=True)
+        node = schema['$defs']['ExampleTreeNodeDocument']
+        assert node['properties']['children']['items'] == {'$ref': '#/$defs/ExampleTreeNodeDocument'}
+
+    def test_self_referencing_document_inlined(self):
+        schema = ExampleDefsDocument.json_schema()
+        node = schema['properties']['tree']
+        assert node['properties']['children']['items'] == {'$ref': '/schemas/ExampleTreeNodeDocument'}
+        validate({'tree': {'name': 'root', 'children': [{'name': 'leaf', 'children': []}]}}, schema)
+        with pytest.raises(ValidationError):
+            validate({'tree': {'name': 'root', 'children': [{'children': []}]}}, schema)
+
+    def test_self_referencing_field_by_name(self):
+        class ExampleLinkedNodeDocument(me.EmbeddedDocument, JsonSchemaMixin):
+            name = me.StringField(required=True)
+            next = me.EmbeddedDocumentField('ExampleLinkedNodeDocument')
+            children = me.ListField(me.EmbeddedDocumentField('ExampleLinkedNodeDocument'))
+
+        # Generated before anything else resolves the document names of the fields
+        schema = ExampleLinkedNodeDocument.json_schema()
+        assert schema['properties']['next'] == {'$ref': '/schemas/ExampleLinkedNodeDocument', 'title': 'Next'}
+        assert schema['properties']['children']['items'] == {'$ref': '/schemas/ExampleLinkedNodeDocument'}
+        assert ExampleLinkedNodeDocument.compiled_validator().errors({'name': 'a', 'next': {'next': {}}}) == [
+            (('next',), "'name' is a required property"), (('next', 'next'), "'name' is a required property")]
+
+    def test_mutually_referencing_documents(self):
+        class ExampleMutualADocument(me.EmbeddedDocument, JsonSchemaMixin):
+            b = me.EmbeddedDocumentField('ExampleMutualBDocument')
+
+        class ExampleMutualBDocument(me.EmbeddedDocument, JsonSchemaMixin):
+            name = me.StringField(required=True)
+            a = me.EmbeddedDocumentField('ExampleMutualADocument')
+
+        ExampleMutualADocument.json_schema()
+        validator = ExampleMutualBDocument.json_validator()
+        validator.validate({'name': 'b', 'a': {'b': {'name': 'c', 'a': {}}}})
+        assert not validator.is_valid({'name': 'b', 'a': {'b': {'a': {}}}})
+        assert ExampleMutualBDocument.compiled_validator().is_valid({'name': 'b', 'a': {'b': {'name': 'c'}}})
+
+    def test_not_strict(self):
+        schema = ExampleDefsDocument.json_schema(strict=False, use_defs=True)
+        assert 'required' not in schema['$defs']['ExampleAddressDocument']
+
+    def test_validation(self):
+        schema = ExampleDefsDocument.json_schema(use_defs=True)
+        valid = {'home_address': {'street': 'A'},
+                 'addresses': [{'street': 'B'}],
+                 'tree': {'name': 'root', 'children': [{'name': 'leaf', 'children': []}]}}
+        validate(valid, schema)
+        with pytest.raises(ValidationError):
+            validate({'tree': {'name': 'root', 'children': [{'children': []}]}}, schema)
+        with pytest.raises(ValidationError):
+            validate({'addresses': [{}]}, schema)
+
+    def test_inlined_and_referenced_schemas_equivalent(self, example_json):
+        validate(example_json, ExampleDocument.json_schema(use_defs=True))
+
+
+class ExampleAbstractDocument(me.Document, JsonSchemaMixin):
+    meta = {'abstract': True}
+    field = me.StringField()
+
+
+class TestRegistry:
+    def test_iter_schema_documents(self):
+        names = dict(iter_schema_documents())
+        assert names['ExampleDocument'] is ExampleDocument
+        assert 'ExampleEmbeddedDocument' in names
+        assert 'ExampleBaseNoMixinDocument' not in names
+        assert 'ExampleAbstractDocument' not in names
+        assert 'ExampleEmbeddedDocument' not in dict(iter_schema_documents(include_embedded=False))
+
+    def test_generate_all(self):
+        clear_schema_cache()
+        schemas = generate_all()
+        assert schemas['ExampleDocument'] is ExampleDocument.json_schema()
+        assert schemas['ExampleBaseDocument.ExampleDocumentInherited'] is ExampleDocumentInherited.json_schema()
+        assert schemas['ExampleEmbeddedDocument'] is ExampleEmbeddedDocument.json_schema()
+
+    def test_generate_all_bundle(self, example_json):
+        bundle = generate_all(use_defs=True, bundle=True)
+        assert '$defs' in bundle
+        assert 'ExampleAddressDocument' in bundle['$defs']
+        assert '$id' not in bundle['$defs']['ExampleDocument']
+        validate(example_json, {**bundle, '$ref': '#/$defs/ExampleDocument'})
+
+
+class CustomStringField(me.StringField):
+    pass
+
+
+class CustomPointField(me.PolygonField):
+    pass
+
+
+class CustomEmbeddedDocumentListField(me.EmbeddedDocumentListField):
+    pass
+
+
+class IPAddressField(me.StringField):
+    pass
+
+
+class UnknownTypeField(me.base.BaseField):
+    pass
+
+
+class ExampleCustomFieldsDocument(me.Document, JsonSchemaMixin):
+    custom_string_field = CustomStringField(max_length=3)
+    custom_email_field = type('CustomEmailField', (me.EmailField,), {})()
+    custom_polygon_field = CustomPointField()
+    custom_list_field = CustomEmbeddedDocumentListField(ExampleEmbeddedDocument)
+    ip_address_field = IPAddressField()
+    unknown_type_field = UnknownTypeField()
+
+
+class TestFieldDispatch:
+    def test_subclass_inherits_type(self):
+        schema = ExampleCustomFieldsDocument.json_schema()
+        assert schema['properties']['custom_string_field']['type'] == 'string'
+        assert schema['properties']['custom_string_field']['maxLength'] == 3
+
+    def test_subclass_inherits_special_keywords(self):
+        schema = ExampleCustomFieldsDocument.json_schema()
+        assert schema['properties']['custom_email_field']['format'] == 'email'
+
+    def test_subclass_inherits_handler(self):
+        schema = ExampleCustomFieldsDocument.json_schema()
+        assert schema['properties']['custom_polygon_field']['anyOf'][0]['properties']['type']['enum'] == ['Polygon']
+        assert schema['properties']['custom_list_field']['items']['$id'] == '/schemas/ExampleEmbeddedDocument'
+
+    def test_register_field_handler(self):
+        assert 'format' not in ExampleCustomFieldsDocument.json_schema()['properties']['ip_address_field']
+        assert ExampleCustomFieldsDocument.json_validator().is_valid({'ip_address_field': 'a'})
+        register_field_handler(IPAddressField, lambda cls, name, field, ctx: cls._add_title(
+            name, {'type': 'string', 'format': 'ipv4'}))
+        schema = ExampleCustomFieldsDocument.json_schema()
+        assert schema['properties']['ip_address_field'] == {'type': 'string', 'format': 'ipv4',
+                                                            'title': 'Ip Address Field'}
+        assert schema['properties']['custom_string_field']['type'] == 'string'
+
+    def test_register_field_type(self):
+        assert 'type' not in ExampleCustomFieldsDocument.json_schema()['properties']['unknown_type_field']
+        assert ExampleCustomFieldsDocument.compiled_validator().is_valid({'unknown_type_field': 'a'})
+        register_field_type(UnknownTypeField, 'integer')
+        assert ExampleCustomFieldsDocument.json_schema()['properties']['unknown_type_field']['type'] == 'integer'
+        assert not ExampleCustomFieldsDocument.compiled_validator().is_valid({'unknown_type_field': 'a'})
+
+
+class TestFrozenSchema:
+    def test_read_only(self, example_schema):
+        assert isinstance(example_schema, FrozenDict)
+        with pytest.raises(TypeError):
+            example_schema['title'] = 'Changed'
+        with pytest.raises(TypeError):
+            del example_schema['properties']
+        with pytest.raises(TypeError):
+            example_schema.update({'title': 'Changed'})
+
+    def test_nested_read_only(self, example_schema):
+        with pytest.raises(TypeError):
+            example_schema['properties']['int_field']['minimum'] = 1
+        with pytest.raises(TypeError):
+            example_schema['required'].append('int_field')
+        with pytest.raises(TypeError):
+            example_schema['properties']['string_field']['enum'][0] = '4'
+
+    def test_to_dict(self, example_schema):
+        schema = example_schema.to_dict()
+        assert type(schema) is dict
+        assert type(schema['properties']['int_field']) is dict
+        assert type(schema['required']) is list
+        schema['properties']['int_field']['minimum'] = 1
+        assert example_schema['properties']['int_field']['minimum'] == 0
+        assert schema == {**example_schema, 'properties': {**example_schema['properties'],
+                                                           'int_field': schema['properties']['int_field']}}
+
+    def test_embedded_schema_shared(self, example_schema):
+        embedded = ExampleEmbeddedDocument.json_schema()
+        assert example_schema['properties']['embedded_document_field']['properties'] is embedded['properties']
+
+    def test_copy_and_serialization(self, example_schema):
+        assert copy.deepcopy(example_schema) is example_schema
+        assert pickle.loads(pickle.dumps(example_schema)) == example_schema
+        assert json.loads(json.dumps(example_schema)) == example_schema.to_dict()
+
+    def test_custom_schema_variants(self):
+        strict_schema = ExampleDocumentWithRequiredCustomSchema.json_schema()
+        non_strict_schema = ExampleDocumentWithRequiredCustomSchema.json_schema(strict=False)
+        assert strict_schema['required'] == ['field']
+        assert 'required' not in non_strict_schema
+        assert ExampleDocumentWithRequiredCustomSchema.json_schema(strict=False) is non_strict_schema
+        assert ExampleDocumentWithRequiredCustomSchema._JSONSCHEMA['required'] == ['field']
+
+
+class TestSerializedSchema:
+    def test_json_schema_bytes(self, example_schema):
+        serialized = ExampleDocument.json_schema_bytes()
+        assert isinstance(serialized, bytes)
+        assert json.loads(serialized) == example_schema.to_dict()
+        assert ExampleDocument.json_schema_bytes() is serialized
+
+    def test_json_schema_bytes_canonical(self):
+        serialized = ExampleDocument.json_schema_bytes(strict=False)
+        assert serialized == json.dumps(json.loads(serialized), sort_keys=True, separators=(',', ':')).encode()
+        assert 'required' not in json.loads(serialized)
+
+    def test_json_schema_etag(self):
+        etag = ExampleDocument.json_schema_etag()
+        assert len(etag) == 64
+        assert etag == ExampleDocument.json_schema_etag()
+        assert etag != ExampleDocument.json_schema_etag(strict=False)
+        clear_schema_cache()
+        assert etag == ExampleDocument.json_schema_etag()
+
+    def test_invalidated_with_schema(self):
+        class ExampleMutableSerializedDocument(me.Document, JsonSchemaMixin):
+            field = me.StringField()
+
+        serialized = ExampleMutableSerializedDocument.json_schema_bytes()
+        etag = ExampleMutableSerializedDocument.json_schema_etag()
+        new_field = me.IntField()
+        new_field.name = 'new_field'
+        ExampleMutableSerializedDocument.new_field = new_field
+        ExampleMutableSerializedDocument._fields = {**ExampleMutableSerializedDocument._fields, 'new_field': new_field}
+        ExampleMutableSerializedDocument._fields_ordered += ('new_field',)
+        assert b'new_field' in ExampleMutableSerializedDocument.json_schema_bytes()
+        assert b'new_field' not in serialized
+        assert ExampleMutableSerializedDocument.json_schema_etag() != etag
+
+    def test_custom_schema(self):
+        serialized = ExampleDocumentWithRequiredCustomSchema.json_schema_bytes(use_defs=True)
+        assert json.loads(serialized) == ExampleDocumentWithRequiredCustomSchema._JSONSCHEMA
+        assert ExampleDocumentWithRequiredCustomSchema.json_schema_bytes(use_defs=True) is serialized
+
+
+class TestSnapshot:
+    @pytest.fixture(autouse=True)
+    def unload(self):
+        yield
+        unload_snapshot()
+        clear_schema_cache()
+
+    def test_document_fingerprint(self):
+        fingerprint = document_fingerprint(ExampleDocument)
+        assert fingerprint == document_fingerprint(ExampleDocument)
+        assert fingerprint != document_fingerprint(ExampleDocumentInherited)
+        assert document_fingerprint(ExampleTreeNodeDocument)
+
+    def test_export_and_load(self, tmp_path):
+        path = tmp_path / 'schemas.json'
+        assert export_snapshot(path) == len(list(iter_schema_documents()))
+        expected = ExampleDocument.json_schema()
+        clear_schema_cache()
+        load_snapshot(path)
+        schema = ExampleDocument.json_schema()
+        assert isinstance(schema, FrozenDict)
+        assert schema == expected
+        assert 'required' not in ExampleDocument.json_schema(strict=False)
+        assert snapshot_info().hits == 2
+
+    def test_missing_variant_generated(self, tmp_path):
+        path = tmp_path / 'schemas.json'
+        export_snapshot(path, documents=[ExampleDefsDocument])
+        clear_schema_cache()
+        load_snapshot(path)
+        assert snapshot_info().documents == 1
+        assert '$defs' in ExampleDefsDocument.json_schema(use_defs=True)
+        assert snapshot_info().hits == 0
+
+    def test_stale_snapshot_falls_back(self, tmp_path):
+        class ExampleSnapshotDocument(me.Document, JsonSchemaMixin):
+            field = me.StringField()
+
+        path = tmp_path / 'schemas.json'
+        export_snapshot(path, documents=[ExampleSnapshotDocument])
+        new_field = me.IntField()
+        new_field.name = 'new_field'
+        ExampleSnapshotDocument.new_field = new_field
+        ExampleSnapshotDocument._fields = {**ExampleSnapshotDocument._fields, 'new_field': new_field}
+        ExampleSnapshotDocument._fields_ordered += ('new_field',)
+        load_snapshot(path)
+        assert 'new_field' in ExampleSnapshotDocument.json_schema()['properties']
+        assert snapshot_info().stale == 1
+
+    def test_changed_generator_falls_back(self, tmp_path, monkeypatch):
+        class ExampleSnapshotStringField(me.StringField):
+            pass
+
+        class ExampleSnapshotGeneratorDocument(me.Document, JsonSchemaMixin):
+            field = me.StringField()
+
+        path = tmp_path / 'schemas.json'
+        export_snapshot(path, documents=[ExampleSnapshotGeneratorDocument])
+        load_snapshot(path)
+        clear_schema_cache()
+        # As after an upgrade, in a new process
+        monkeypatch.setattr('mongoengine_jsonschema.fingerprint.__version__', '999')
+        monkeypatch.setattr('mongoengine_jsonschema.fingerprint._GENERATOR', {})
+        assert ExampleSnapshotGeneratorDocument.json_schema()['properties']['field']['type'] == 'string'
+        assert snapshot_info().stale == 1
+
+        monkeypatch.undo()
+        fingerprint = generator_fingerprint()
+        register_field_type(ExampleSnapshotStringField, 'string')
+        assert generator_fingerprint() != fingerprint
+        clear_schema_cache()
+        ExampleSnapshotGeneratorDocument.json_schema()
+        assert snapshot_info() == (1, 0, 2)
+
+    def test_invalid_snapshot(self, tmp_path):
+        path = tmp_path / 'schemas.json'
+        path.write_text('{}')
+        with pytest.raises(ValueError):
+            load_snapshot(path)
+
+
+class TestThreadSafety:
+    @staticmethod
+    def _check(strict):
+        schema = ExampleRequiredDocument._generate(SchemaContext(strict=strict))
+        embedded = schema['properties']['embedded_document_field']
+        embedded_items = schema['properties']['embedded_document_list_field']['items']
+        if strict:
+            return (schema.get('required') == ['required_field'] and
+                    embedded.get('required') == ['required_field'] and
+                    embedded_items.get('required') == ['required_field'])
+        return 'required' not in schema and 'required' not in embedded and 'required' not in embedded_items
+
+    def test_parallel_strict_and_non_strict_generation(self):
+        def run(i):
+            if i % 10 == 0:
+                clear_schema_cache()
+            return self._check(i % 2 == 0)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(run, range(2000)))
+        assert all(results)
+
+    def test_parallel_cached_schemas(self):
+        def run(i):
+            strict = i % 2 == 0
+            schema = ExampleRequiredDocument.json_schema(strict=strict)
+            return ('required' in schema) is strict
+
+        clear_schema_cache()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(run, range(2000)))
+        assert all(results)
+
+    def test_custom_schema_not_mutated(self):
+        ExampleDocumentWithRequiredCustomSchema.json_schema(strict=False)
+        assert ExampleDocumentWithRequiredCustomSchema.json_schema()['required'] == ['field']
+
+
 class TestDocumentSchemaProps:
     def test_binary_field(self, example_schema):
         assert example_schema['properties']['binary_field']['type'] == 'string'
@@ -746,6 +1279,35 @@ class TestTitle:
 
 
 class TestValidation:
+    def test_json_validator(self, example_json):
+        validator = ExampleDocument.json_validator()
+        assert ExampleDocument.json_validator() is validator
+        assert validator.is_valid(example_json)
+        with pytest.raises(ValidationError):
+            validator.validate({**example_json, 'int_field': 6})
+        assert not validator.is_valid({key: value for key, value in example_json.items() if key != 'boolean_field'})
+
+    def test_json_validator_not_strict(self):
+        assert ExampleDocument.json_validator(strict=False).is_valid({})
+        assert not ExampleDocument.json_validator().is_valid({})
+
+    def test_json_validator_pattern(self):
+        class ExamplePatternDocument(me.Document, JsonSchemaMixin):
+            code = me.StringField(regex=r'^[A-Z]{3}$')
+            map_field = me.MapField(me.IntField())
+
+        validator = ExamplePatternDocument.json_validator()
+        assert validator.is_valid({'code': 'ABC', 'map_field': {'a': 1}})
+        error = next(validator.iter_errors({'code': 'abc'}))
+        assert error.message == "'abc' does not match '^[A-Z]{3}$'"
+        assert not validator.is_valid({'map_field': {'a': 'b'}})
+
+    def test_json_validator_custom_schema(self):
+        validator = ExampleDocumentWithRequiredCustomSchema.json_validator()
+        assert validator.is_valid({'field': 'A'})
+        assert not validator.is_valid({})
+        assert ExampleDocumentWithRequiredCustomSchema.json_validator(strict=False).is_valid({})
+
     def test_jsonschema_validation(self, example_json, example_schema):
         try:
             validate(example_json, example_schema)
@@ -764,3 +1326,40 @@ class TestValidation:
             ExampleDocument(**example_json).validate()
         except me.ValidationError as e:
             assert False, f"Mongoengine validation failed. {str(e)}"
+
+
+class TestBatchValidation:
+    records = [{'required_field': 'A'}, {}, {'required_field': 1}, {'required_field': 'B'}, {'unknown': 1}]
+    expected = [(1, [((), "'required_field' is a required property")]),
+                (2, [(('required_field',), "1 is not of type 'string'")]),
+                (4, [((), "Additional properties are not allowed ('unknown' was unexpected)"),
+                     ((), "'required_field' is a required property")])]
+
+    def test_validate_many(self):
+        assert list(ExampleRequiredDocument.validate_many(self.records, chunk_size=2)) == self.expected
+
+    def test_validate_many_lazy(self):
+        consumed = []
+
+        def records():
+            for i, record in enumerate(self.records):
+                consumed.append(i)
+                yield record
+
+        results = ExampleRequiredDocument.validate_many(records(), chunk_size=2)
+        assert next(results)[0] == 1
+        assert consumed == [0, 1]
+
+    def test_validate_many_not_strict(self):
+        results = list(ExampleRequiredDocument.validate_many(self.records, strict=False))
+        assert [index for index, _ in results] == [2, 4]
+
+    def test_validate_many_workers(self):
+        records = self.records * 50
+        results = list(ExampleRequiredDocument.validate_many(records, workers=2, chunk_size=7))
+        assert results == list(ExampleRequiredDocument.validate_many(records))
+        assert [index for index, _ in results] == [i * 5 + j for i in range(50) for j in (1, 2, 4)]
+
+    def test_validate_many_chunk_size(self):
+        with pytest.raises(ValueError):
+            list(ExampleRequiredDocument.validate_many(self.records, chunk_size=0))
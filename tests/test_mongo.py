@@ -0,0 +1,197 @@
+import datetime
+import decimal
+import uuid
+from importlib.metadata import version
+
+import bson
+import mongoengine as me
+import mongomock
+import pytest
+from jsonschema import Draft4Validator, validators
+from jsonschema.exceptions import ValidationError
+
+from mongoengine_jsonschema import FrozenDict, JsonSchemaMixin
+from mongoengine_jsonschema.mongo import UNSUPPORTED_KEYWORDS
+
+from test_json_schema import ExampleDocument, ExampleEmbeddedDocument, ExampleTreeNodeDocument
+
+BSON_TYPE_CHECKS = {
+    'string': lambda value: isinstance(value, str),
+    'objectId': lambda value: isinstance(value, bson.ObjectId),
+    'date': lambda value: isinstance(value, datetime.datetime),
+    'int': lambda value: isinstance(value, int) and not isinstance(value, bool) and -2 ** 31 <= value < 2 ** 31,
+    'long': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'double': lambda value: isinstance(value, float),
+    'decimal': lambda value: isinstance(value, bson.Decimal128),
+    'bool': lambda value: isinstance(value, bool),
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'binData': lambda value: isinstance(value, (bytes, uuid.UUID)),
+    'null': lambda value: value is None,
+}
+
+
+def _bson_type(validator, bson_types, instance, schema):
+    bson_types = bson_types if isinstance(bson_types, list) else [bson_types]
+    if not any(BSON_TYPE_CHECKS[bson_type](instance) for bson_type in bson_types):
+        yield ValidationError(f'{instance!r} is not of BSON type {bson_types!r}')
+
+
+# Local stand-in for the server-side $jsonSchema validation, which mongomock does not implement
+MongoJsonSchemaValidator = validators.extend(Draft4Validator, {'bsonType': _bson_type})
+
+
+class ExampleMongoEmbeddedDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    street = me.StringField(db_field='st', required=True, max_length=20)
+
+
+class ExampleMongoDocument(me.Document, JsonSchemaMixin):
+    name = me.StringField(db_field='n', required=True, regex=r'^[A-Z]')
+    count = me.IntField(min_value=0)
+    total = me.LongField()
+    price = me.Decimal128Field()
+    created = me.DateTimeField()
+    key = me.UUIDField(binary=True)
+    data = me.BinaryField()
+    owner = me.ReferenceField(ExampleDocument)
+    location = me.GeoPointField()
+    address = me.EmbeddedDocumentField(ExampleMongoEmbeddedDocument)
+    tags = me.ListField(me.StringField())
+    events = me.MapField(me.DateTimeField())
+    owners = me.MapField(me.ReferenceField(ExampleDocument))
+    meta = {'allow_inheritance': True, 'collection': 'mongo_documents'}
+
+
+EXPECTED_SCHEMA = {
+    'bsonType': 'object',
+    'title': 'Example Mongo Document',
+    'required': ['n'],
+    'additionalProperties': False,
+    'properties': {
+        'n': {'bsonType': 'string', 'pattern': '^[A-Z]', 'title': 'Name'},
+        'count': {'bsonType': ['int', 'long'], 'minimum': 0, 'title': 'Count'},
+        'total': {'bsonType': 'long', 'title': 'Total'},
+        'price': {'bsonType': 'decimal', 'title': 'Price'},
+        'created': {'bsonType': 'date', 'title': 'Created'},
+        'key': {'bsonType': 'binData', 'title': 'Key'},
+        'data': {'bsonType': 'binData', 'title': 'Data'},
+        'owner': {'bsonType': 'objectId', 'title': 'Owner'},
+        'location': {'bsonType': 'array', 'title': 'Location',
+                     'items': [{'bsonType': ['double', 'int', 'long', 'decimal']},
+                               {'bsonType': ['double', 'int', 'long', 'decimal']}],
+                     'additionalItems': False},
+        'address': {'bsonType': 'object', 'title': 'Address', 'required': ['st'], 'additionalProperties': False,
+                    'properties': {'st': {'bsonType': 'string', 'maxLength': 20, 'title': 'Street'}}},
+        'tags': {'bsonType': 'array', 'title': 'Tags', 'items': {'bsonType': 'string'}},
+        'events': {'bsonType': 'object', 'title': 'Events', 'patternProperties': {'.*': {'bsonType': 'date'}}},
+        'owners': {'bsonType': 'object', 'title': 'Owners', 'patternProperties': {'.*': {'bsonType': 'objectId'}}},
+        '_id': {'bsonType': 'objectId'},
+        '_cls': {'bsonType': 'string'},
+    }
+}
+
+
+def _keywords(schema):
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            yield key
+            if key not in ('properties', 'patternProperties'):
+                yield from _keywords(value)
+            else:
+                for subschema in value.values():
+                    yield from _keywords(subschema)
+    elif isinstance(schema, list):
+        for item in schema:
+            yield from _keywords(item)
+
+
+@pytest.fixture
+def collection():
+    if version('mongoengine') < '0.27.0':
+        me.connect('mongoenginetest', host='mongomock://localhost', alias='default')
+    else:
+        me.connect('mongoenginetest', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient,
+                   alias='default')
+    collection = ExampleMongoDocument._get_collection()
+    yield collection
+    collection.drop()
+
+
+class TestMongoValidator:
+    def test_schema(self):
+        validator = ExampleMongoDocument.mongo_validator()
+        assert isinstance(validator, FrozenDict)
+        assert validator.to_dict() == {'$jsonSchema': EXPECTED_SCHEMA}
+        assert ExampleMongoDocument.mongo_validator() is validator
+
+    def test_unsupported_keywords_removed(self):
+        for document in (ExampleDocument, ExampleTreeNodeDocument):
+            keywords = set(_keywords(document.mongo_validator()['$jsonSchema']))
+            assert not keywords & UNSUPPORTED_KEYWORDS
+            assert 'type' not in keywords
+
+    def test_recursive_document(self):
+        properties = ExampleTreeNodeDocument.mongo_validator()['$jsonSchema']['properties']
+        assert properties['children']['items'] == {'bsonType': 'object'}
+
+    def test_embedded_document(self):
+        schema = ExampleEmbeddedDocument.mongo_validator()['$jsonSchema']
+        assert '_id' not in schema['properties']
+
+    def test_inheritance(self, collection):
+        class ExampleMongoPetDocument(me.Document, JsonSchemaMixin):
+            name = me.StringField(required=True)
+            meta = {'allow_inheritance': True, 'collection': 'mongo_pets'}
+
+        class ExampleMongoDogDocument(ExampleMongoPetDocument):
+            barks = me.BooleanField()
+
+        schema = ExampleMongoPetDocument.mongo_validator()['$jsonSchema']
+        assert [branch['properties']['_cls'] for branch in schema['anyOf']] == [
+            {'bsonType': 'string', 'enum': ['ExampleMongoPetDocument']},
+            {'bsonType': 'string', 'enum': ['ExampleMongoPetDocument.ExampleMongoDogDocument']}]
+
+        ExampleMongoPetDocument(name='A').save()
+        ExampleMongoDogDocument(name='B', barks=True).save()
+        validator = MongoJsonSchemaValidator(schema.to_dict())
+        stored = list(ExampleMongoPetDocument._get_collection().find())
+        assert len(stored) == 2
+        for document in stored:
+            assert list(validator.iter_errors(document)) == []
+        assert not validator.is_valid({**stored[0], 'barks': True})
+        assert not validator.is_valid({**stored[1], 'barks': 1})
+        ExampleMongoPetDocument._get_collection().drop()
+
+    def test_command(self):
+        command = ExampleMongoDocument.mongo_validator_command()
+        assert command == {'collMod': 'mongo_documents', 'validator': {'$jsonSchema': EXPECTED_SCHEMA},
+                           'validationLevel': 'strict', 'validationAction': 'error'}
+        command = ExampleMongoDocument.mongo_validator_command('create', validation_level='moderate',
+                                                               validation_action='warn')
+        assert command['create'] == 'mongo_documents'
+        assert (command['validationLevel'], command['validationAction']) == ('moderate', 'warn')
+
+    def test_command_errors(self):
+        with pytest.raises(ValueError):
+            ExampleMongoDocument.mongo_validator_command('drop')
+        with pytest.raises(ValueError):
+            ExampleMongoEmbeddedDocument.mongo_validator_command()
+
+    def test_stored_documents(self, collection):
+        ExampleMongoDocument(name='A', count=1, total=2 ** 40, price=decimal.Decimal('1.5'),
+                             created=datetime.datetime(2020, 1, 1), data=b'\x00',
+                             owner=bson.ObjectId(), location=[1.5, 2], tags=['a'],
+                             events={'opened': datetime.datetime(2020, 1, 2)}, owners={'first': bson.ObjectId()},
+                             address=ExampleMongoEmbeddedDocument(street='Main')).save()
+        ExampleMongoDocument(name='B').save()
+
+        validator = MongoJsonSchemaValidator(ExampleMongoDocument.mongo_validator()['$jsonSchema'].to_dict())
+        stored = list(collection.find())
+        assert len(stored) == 2
+        for document in stored:
+            assert list(validator.iter_errors(document)) == []
+
+        invalid = {**stored[0], 'n': 'a', 'count': '1', 'created': '2020-01-01', 'owner': str(stored[0]['owner']),
+                   'events': {'opened': '2020-01-02'}, 'unknown': 1}
+        paths = {tuple(error.path) for error in validator.iter_errors(invalid)}
+        assert paths == {('n',), ('count',), ('created',), ('owner',), ('events', 'opened'), ()}
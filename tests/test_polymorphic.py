@@ -0,0 +1,124 @@
+import mongoengine as me
+import pytest
+
+from mongoengine_jsonschema import FrozenDict, JsonSchemaMixin
+from mongoengine_jsonschema.polymorphic import PolymorphicValidator, polymorphic_documents
+from mongoengine_jsonschema.validation import build_validator
+
+from test_json_schema import ExampleDocument
+
+
+class ExamplePetTagDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    code = me.StringField(required=True)
+
+
+class ExamplePetDocument(me.Document, JsonSchemaMixin):
+    meta = {'allow_inheritance': True}
+    name = me.StringField(required=True)
+    tag = me.EmbeddedDocumentField(ExamplePetTagDocument)
+
+
+class ExampleDogDocument(ExamplePetDocument):
+    barks = me.BooleanField(required=True)
+
+
+class ExampleCatDocument(ExamplePetDocument):
+    lives = me.IntField(min_value=1, max_value=9)
+
+
+class ExampleLionDocument(ExampleCatDocument):
+    pride = me.StringField()
+
+
+DOG = 'ExamplePetDocument.ExampleDogDocument'
+CAT = 'ExamplePetDocument.ExampleCatDocument'
+LION = 'ExamplePetDocument.ExampleCatDocument.ExampleLionDocument'
+
+PAYLOADS = [
+    {'_cls': 'ExamplePetDocument', 'name': 'Rex'},
+    {'_cls': DOG, 'name': 'Rex', 'barks': True, 'tag': {'code': 'A'}},
+    {'_cls': DOG, 'name': 'Rex'},
+    {'_cls': DOG, 'name': 'Rex', 'barks': True, 'lives': 3},
+    {'_cls': DOG, 'name': 'Rex', 'barks': True, 'tag': {}},
+    {'_cls': CAT, 'name': 'Tom', 'lives': 9},
+    {'_cls': CAT, 'name': 'Tom', 'lives': 10},
+    {'_cls': CAT, 'name': 'Tom', 'pride': 'x'},
+    {'_cls': LION, 'name': 'Leo', 'lives': 9, 'pride': 'x'},
+    {'_cls': 'Unknown', 'name': 'Rex'},
+    {'_cls': 1, 'name': 'Rex'},
+    {'name': 'Rex'},
+    {},
+    [],
+    'Rex',
+]
+
+
+class TestPolymorphicSchema:
+    def test_documents(self):
+        assert polymorphic_documents(ExamplePetDocument) == [ExamplePetDocument, ExampleDogDocument,
+                                                             ExampleCatDocument, ExampleLionDocument]
+        assert polymorphic_documents(ExampleCatDocument) == [ExampleCatDocument, ExampleLionDocument]
+
+    def test_not_inheritable(self):
+        with pytest.raises(ValueError):
+            ExampleDocument.polymorphic_json_schema()
+        with pytest.raises(ValueError):
+            ExampleDocument.polymorphic_validator()
+
+    def test_inline(self):
+        schema = ExamplePetDocument.polymorphic_json_schema()
+        assert isinstance(schema, FrozenDict)
+        assert schema is ExamplePetDocument.polymorphic_json_schema()
+        assert schema['required'] == ['_cls']
+        assert schema['discriminator'] == {'propertyName': '_cls'}
+        assert schema['properties']['_cls']['enum'] == ['ExamplePetDocument', DOG, CAT, LION]
+        assert '$defs' not in schema
+
+        branch = schema['allOf'][1]
+        assert branch['if'] == {'properties': {'_cls': {'const': DOG}}, 'required': ['_cls']}
+        assert branch['then']['properties']['_cls'] == {'type': 'string', 'const': DOG}
+        assert set(branch['then']['properties']) == {'_cls', 'barks', 'name', 'tag'}
+        assert branch['then']['required'] == ['barks', 'name']
+
+    def test_defs(self):
+        schema = ExampleCatDocument.polymorphic_json_schema(use_defs=True)
+        assert schema['discriminator']['mapping'] == {CAT: f'#/$defs/{CAT}', LION: f'#/$defs/{LION}'}
+        assert [branch['then'] for branch in schema['allOf']] == [{'$ref': f'#/$defs/{CAT}'},
+                                                                  {'$ref': f'#/$defs/{LION}'}]
+        assert set(schema['$defs']) == {CAT, LION, 'ExamplePetTagDocument'}
+        assert '$id' not in schema['$defs'][CAT]
+
+    def test_not_strict(self):
+        schema = ExamplePetDocument.polymorphic_json_schema(strict=False)
+        assert 'required' not in schema
+        assert all('required' not in branch['then'] for branch in schema['allOf'])
+
+    @pytest.mark.parametrize('strict', [True, False])
+    @pytest.mark.parametrize('use_defs', [True, False])
+    def test_validator_equivalence(self, strict, use_defs):
+        json_validator = build_validator(ExamplePetDocument.polymorphic_json_schema(strict, use_defs).to_dict())
+        validator = ExamplePetDocument.polymorphic_validator(strict=strict)
+        for payload in PAYLOADS:
+            assert validator.is_valid(payload) == json_validator.is_valid(payload), payload
+
+    def test_validator_errors(self):
+        validator = ExamplePetDocument.polymorphic_validator()
+        assert isinstance(validator, PolymorphicValidator)
+        assert set(validator.validators) == {'ExamplePetDocument', DOG, CAT, LION}
+        assert validator.validators[DOG] is ExampleDogDocument.compiled_validator()
+        assert validator.errors({'_cls': CAT, 'name': 'Tom', 'lives': 10}) == [
+            (('lives',), '10 is greater than the maximum of 9')]
+        assert [path for path, _ in validator.errors({'_cls': 'Unknown'})] == [('_cls',)]
+        assert [path for path, _ in validator.errors({'name': 'Rex'})] == [()]
+
+    def test_new_subclass(self):
+        schema = ExamplePetDocument.polymorphic_json_schema()
+
+        class ExampleFishDocument(ExamplePetDocument):
+            fins = me.IntField()
+
+        updated = ExamplePetDocument.polymorphic_json_schema()
+        assert updated is not schema
+        assert 'ExamplePetDocument.ExampleFishDocument' in updated['properties']['_cls']['enum']
+        assert ExamplePetDocument.polymorphic_validator().is_valid({'_cls': 'ExamplePetDocument.ExampleFishDocument',
+                                                                    'name': 'Nemo', 'fins': 2})
@@ -0,0 +1,90 @@
+import json
+
+from mongoengine_jsonschema import (DocumentProfile, FieldProfile, GenerationProfiler, clear_schema_cache,
+                                    schema_cache_info)
+
+from test_json_schema import (ExampleDefsDocument, ExampleDocument, ExampleDocumentInherited,
+                              ExampleDocumentWithCustomSchema, ExampleTreeNodeDocument)
+
+
+class TestGenerationProfiler:
+    def test_profile_does_not_touch_cache(self):
+        clear_schema_cache()
+        ExampleDocument.profile_json_schema()
+        assert schema_cache_info().currsize == 0
+        profiler = GenerationProfiler()
+        ExampleDocument._build_json_schema(True, False, profiler)
+        assert ExampleDocument.json_schema() == ExampleDocument._build_json_schema(True, False)
+
+    def test_fields(self):
+        profiler = ExampleDocument.profile_json_schema()
+        top_level = [profile for profile in profiler.fields if profile.document == 'ExampleDocument']
+        assert [profile.field for profile in top_level] == list(ExampleDocument.json_schema()['properties'])
+        assert all(isinstance(profile, FieldProfile) and profile.seconds >= 0 and profile.size > 0
+                   for profile in profiler.fields)
+        assert {profile.depth for profile in top_level} == {0}
+
+        by_name = {profile.field: profile for profile in top_level}
+        assert by_name['embedded_document_field'].field_type == 'EmbeddedDocumentField'
+        string_property = ExampleDocument.json_schema()['properties']['string_field']
+        assert by_name['string_field'].size >= len(json.dumps(string_property, separators=(',', ':')))
+
+    def test_embedded_depth(self):
+        profiler = ExampleDocument.profile_json_schema()
+        embedded = [profile for profile in profiler.fields if profile.document == 'ExampleEmbeddedDocument']
+        assert embedded and {profile.depth for profile in embedded} == {1}
+        documents = {(profile.document, profile.depth) for profile in profiler.documents}
+        assert documents == {('ExampleDocument', 0), ('ExampleEmbeddedDocument', 1)}
+        root = profiler.documents[-1]
+        assert root.document == 'ExampleDocument'
+        assert root.size == len(ExampleDocument.json_schema_bytes())
+        assert root.seconds >= max(profile.seconds for profile in profiler.fields)
+
+    def test_recursive_and_defs(self):
+        profiler = ExampleTreeNodeDocument.profile_json_schema()
+        assert [profile.document for profile in profiler.documents] == ['ExampleTreeNodeDocument']
+
+        profiler = ExampleDefsDocument.profile_json_schema(use_defs=True)
+        assert max(profile.depth for profile in profiler.documents) >= 1
+
+    def test_inherited(self):
+        profiler = ExampleDocumentInherited.profile_json_schema()
+        assert {profile.document for profile in profiler.documents} == {'ExampleDocumentInherited',
+                                                                        'ExampleBaseDocument'}
+        assert {profile.document for profile in profiler.fields} == {'ExampleDocumentInherited',
+                                                                     'ExampleBaseDocument'}
+
+    def test_custom_schema(self):
+        profiler = ExampleDocumentWithCustomSchema.profile_json_schema()
+        assert profiler.fields == [] and profiler.documents == []
+
+    def test_callbacks(self):
+        fields, documents = [], []
+        profiler = GenerationProfiler(on_field=fields.append, on_document=documents.append)
+        assert ExampleDocument.profile_json_schema(profiler=profiler) is profiler
+        assert fields == profiler.fields and documents == profiler.documents
+        assert all(isinstance(profile, DocumentProfile) for profile in documents)
+
+    def test_rankings(self):
+        profiler = ExampleDocument.profile_json_schema()
+        slowest = profiler.slowest_fields(3)
+        assert len(slowest) == 3 and slowest[0].seconds >= slowest[1].seconds >= slowest[2].seconds
+        largest = profiler.largest_fields(3)
+        assert largest[0].size == max(profile.size for profile in profiler.fields)
+
+    def test_folded_stacks(self, tmp_path):
+        profiler = ExampleDocument.profile_json_schema()
+        lines = profiler.folded_stacks().splitlines()
+        stacks = {}
+        for line in lines:
+            stack, microseconds = line.rsplit(' ', 1)
+            stacks[stack] = int(microseconds)
+        assert 'ExampleDocument' in stacks
+        assert 'ExampleDocument;ExampleDocument.string_field' in stacks
+        assert ('ExampleDocument;ExampleDocument.embedded_document_field;ExampleEmbeddedDocument;'
+                'ExampleEmbeddedDocument.embedded_field') in stacks
+        assert abs(sum(stacks.values()) - profiler.documents[-1].seconds * 1e6) <= len(stacks)
+
+        path = tmp_path / 'profile.folded'
+        profiler.write_folded(path)
+        assert path.read_text(encoding='utf-8') == profiler.folded_stacks()
@@ -0,0 +1,115 @@
+import datetime
+import uuid
+
+import bson
+import mongoengine as me
+import pytest
+from bson.binary import UuidRepresentation
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from mongoengine_jsonschema import JsonSchemaMixin, iter_raw_bson_errors
+from mongoengine_jsonschema import rawbson
+from mongoengine_jsonschema.rawbson import iter_elements
+
+from test_json_schema import ExampleDocumentWithRequiredCustomSchema, ExampleRequiredDocument
+
+CODEC_OPTIONS = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+
+
+class ExampleStoredEmbeddedDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    street = me.StringField(db_field='st', required=True, max_length=10)
+    meta = {'allow_inheritance': True}
+
+
+class ExampleStoredDocument(me.Document, JsonSchemaMixin):
+    name = me.StringField(db_field='n', required=True, min_length=1)
+    count = me.IntField(min_value=0)
+    created = me.DateTimeField()
+    key = me.UUIDField(binary=True)
+    ref = me.ObjectIdField()
+    tags = me.ListField(me.StringField())
+    extra = me.DictField()
+    anything = me.DynamicField()
+    address = me.EmbeddedDocumentField(ExampleStoredEmbeddedDocument)
+    addresses = me.EmbeddedDocumentListField(ExampleStoredEmbeddedDocument)
+    meta = {'allow_inheritance': True}
+
+
+def _encode(document: dict) -> RawBSONDocument:
+    return RawBSONDocument(bson.encode(document, codec_options=CODEC_OPTIONS))
+
+
+def _stored(**values) -> dict:
+    document = ExampleStoredDocument(name='A', count=1, created=datetime.datetime(2020, 1, 1), key=uuid.uuid4(),
+                                     ref=bson.ObjectId(), tags=['a'], extra={'a': {'b': 1}}, anything=[1, 'a'],
+                                     address=ExampleStoredEmbeddedDocument(street='Main'),
+                                     addresses=[ExampleStoredEmbeddedDocument(street='Side')])
+    son = document.to_mongo().to_dict()
+    son['_id'] = bson.ObjectId()
+    son.update(values)
+    return son
+
+
+class TestIterElements:
+    def test_elements(self):
+        son = _stored(regex=bson.Regex('a.*', 'i'), decimal=bson.Decimal128('1.5'), binary=b'\x00\x01',
+                      nothing=None, flag=True, ts=bson.Timestamp(1, 1), big=2 ** 40, number=1.5)
+        raw = bson.encode(son, codec_options=CODEC_OPTIONS)
+        assert [name.decode() for name, _, _, _ in iter_elements(raw)] == list(bson.decode(raw))
+
+
+class TestRawBSONValidator:
+    def test_valid(self):
+        assert ExampleStoredDocument.raw_bson_validator().errors(_encode(_stored())) == []
+
+    def test_bytes(self):
+        assert ExampleStoredDocument.raw_bson_validator().is_valid(bson.encode(_stored(), codec_options=CODEC_OPTIONS))
+
+    def test_errors(self):
+        son = _stored(count=-1, n='', created='yesterday', tags=[1], unknown=1)
+        son['addresses'][0]['st'] = 'A very long street'
+        del son['address']['st']
+        errors = list(iter_raw_bson_errors(ExampleStoredDocument, _encode(son)))
+        assert sorted(errors) == sorted([
+            (('name',), "'' is too short"),
+            (('count',), '-1 is less than the minimum of 0'),
+            (('tags', 0), "1 is not of type 'string'"),
+            (('address',), "'street' is a required property"),
+            (('addresses', 0, 'street'), "'A very long street' is too long"),
+            ((), "Additional properties are not allowed ('unknown' was unexpected)"),
+        ])
+
+    def test_type_checked_without_decoding(self, monkeypatch):
+        decoded = []
+        decode = rawbson._decode
+        monkeypatch.setattr(rawbson, '_decode', lambda data, element_type, start, end: decoded.append(
+            data[start:end]) or decode(data, element_type, start, end))
+        ExampleStoredDocument.raw_bson_validator().errors(_encode(_stored()))
+        assert len(decoded) == 5  # name, count, tags, address, addresses
+
+        errors = ExampleStoredDocument.raw_bson_validator().errors(_encode(_stored(extra=[1], created=1)))
+        assert sorted(errors) == [(('created',), "1 is not of type 'string'"),
+                                  (('extra',), "[1] is not of type 'object'")]
+
+    def test_required(self):
+        son = _stored()
+        del son['n']
+        assert ExampleStoredDocument.raw_bson_validator().errors(_encode(son)) == [
+            ((), "'name' is a required property")]
+        assert ExampleStoredDocument.raw_bson_validator(strict=False).is_valid(_encode(son))
+
+    def test_cached(self):
+        assert ExampleRequiredDocument.raw_bson_validator() is ExampleRequiredDocument.raw_bson_validator()
+
+    def test_custom_schema(self):
+        validator = ExampleDocumentWithRequiredCustomSchema.raw_bson_validator()
+        assert validator.is_valid(_encode({'_id': bson.ObjectId(), 'field': 'A'}))
+        assert validator.errors(_encode({'field': 1})) == [(('field',), "1 is not of type 'string'")]
+
+    @pytest.mark.parametrize('payload', [{'required_field': 'A', 'embedded_document_field': {'required_field': 1}},
+                                         {'required_field': 'A', 'embedded_document_list_field': [{}]},
+                                         {'embedded_document_list_field': 'A'}])
+    def test_equivalent_to_compiled_validator(self, payload):
+        expected = ExampleRequiredDocument.compiled_validator().errors(payload)
+        assert sorted(ExampleRequiredDocument.raw_bson_validator().errors(_encode(payload))) == sorted(expected)
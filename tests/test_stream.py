@@ -0,0 +1,132 @@
+import io
+import json
+
+import mongoengine as me
+import pytest
+
+from mongoengine_jsonschema import JsonSchemaMixin
+from mongoengine_jsonschema.cli import main
+from mongoengine_jsonschema.stream import (LineError, StreamStats, iter_lines, iter_ndjson_errors,
+                                           mongoexport_transform, validate_ndjson)
+
+from test_json_schema import ExampleRequiredDocument
+
+
+class ExampleExportedEmbeddedDocument(me.EmbeddedDocument, JsonSchemaMixin):
+    street = me.StringField(db_field='st', required=True)
+
+
+class ExampleExportedDocument(me.Document, JsonSchemaMixin):
+    name = me.StringField(db_field='n', required=True)
+    count = me.IntField(min_value=0)
+    created = me.DateTimeField()
+    ref = me.ObjectIdField()
+    addresses = me.EmbeddedDocumentListField(ExampleExportedEmbeddedDocument)
+    blob = me.BinaryField()
+    key = me.UUIDField(binary=True)
+    meta = {'allow_inheritance': True}
+
+
+LINES = [b'{"required_field": "A"}', b'', b'{"required_field": 1}', b'{not json', b'{"required_field": "B"}']
+
+
+@pytest.fixture
+def ndjson_file(tmp_path):
+    path = tmp_path / 'records.ndjson'
+    path.write_bytes(b'\n'.join(LINES) + b'\n')
+    return path
+
+
+class TestIterLines:
+    def test_mmap(self, ndjson_file):
+        assert list(iter_lines(ndjson_file)) == LINES
+
+    def test_buffered(self):
+        data = b'\n'.join(LINES)
+        for buffer_size in (1, 3, 7, 1 << 20):
+            assert list(iter_lines(io.BytesIO(data), buffer_size=buffer_size)) == LINES
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / 'empty.ndjson'
+        path.write_bytes(b'')
+        assert list(iter_lines(path)) == []
+
+
+class TestValidateNdjson:
+    def test_errors(self, ndjson_file):
+        errors = list(iter_ndjson_errors(ExampleRequiredDocument, ndjson_file))
+        assert [error.line for error in errors] == [3, 4]
+        assert errors[0] == LineError(3, [(('required_field',), "1 is not of type 'string'")])
+        assert errors[1].errors[0][0] == ()
+        assert errors[1].errors[0][1].startswith('Invalid JSON')
+
+    def test_stats(self, ndjson_file):
+        reported = []
+        stats = validate_ndjson(ExampleRequiredDocument, ndjson_file, on_error=reported.append)
+        assert isinstance(stats, StreamStats)
+        assert (stats.lines, stats.invalid) == (4, 2)
+        assert stats.bytes == ndjson_file.stat().st_size
+        assert [error.line for error in reported] == [3, 4]
+
+    def test_not_strict(self, tmp_path):
+        path = tmp_path / 'records.ndjson'
+        path.write_bytes(b'{}\n{}\n')
+        assert validate_ndjson(ExampleRequiredDocument, path).invalid == 2
+        assert validate_ndjson(ExampleRequiredDocument, path, strict=False).invalid == 0
+
+    def test_mongoexport(self, tmp_path):
+        records = [
+            {'_id': {'$oid': '5f0c7c2e9b1e8a3d4c5b6a79'}, '_cls': 'ExampleExportedDocument', 'n': 'A',
+             'count': {'$numberLong': '3'}, 'created': {'$date': {'$numberLong': '1594653742000'}},
+             'ref': {'$oid': '5f0c7c2e9b1e8a3d4c5b6a79'}, 'addresses': [{'st': 'Main'}]},
+            {'_id': {'$oid': '5f0c7c2e9b1e8a3d4c5b6a7a'}, 'n': 'B', 'created': {'$date': '2020-07-13T15:22:22Z'}},
+            {'_id': {'$oid': '5f0c7c2e9b1e8a3d4c5b6a7b'}, 'count': {'$numberInt': '-1'}, 'addresses': [{}]},
+        ]
+        path = tmp_path / 'export.json'
+        path.write_text('\n'.join(json.dumps(record) for record in records))
+
+        assert validate_ndjson(ExampleExportedDocument, path).invalid == 3
+        errors = list(iter_ndjson_errors(ExampleExportedDocument, path,
+                                         transform=mongoexport_transform(ExampleExportedDocument)))
+        assert [error.line for error in errors] == [3]
+        assert sorted(error_path for error_path, _ in errors[0].errors) == [(), ('addresses', 0), ('count',)]
+
+    def test_mongoexport_binary(self):
+        transform = mongoexport_transform(ExampleExportedDocument)
+        canonical = {'n': 'A', 'blob': {'$binary': {'base64': 'AAE=', 'subType': '00'}},
+                     'key': {'$binary': {'base64': 'EjRWeBI0VngSNFZ4EjRWeA==', 'subType': '04'}}}
+        legacy = {'n': 'A', 'blob': {'$binary': 'AAE=', '$type': '00'},
+                  'key': {'$binary': 'EjRWeBI0VngSNFZ4EjRWeA==', '$type': '03'}}
+        for record in (canonical, legacy):
+            assert transform(record) == {'name': 'A', 'blob': 'AAE=', 'key': '12345678-1234-5678-1234-567812345678'}
+            assert ExampleExportedDocument.compiled_validator().errors(transform(record)) == []
+
+    def test_mongoexport_custom_primary_key(self):
+        class ExampleExportedCodeDocument(me.Document, JsonSchemaMixin):
+            code = me.StringField(primary_key=True)
+            v = me.IntField()
+
+        transform = mongoexport_transform(ExampleExportedCodeDocument)
+        assert transform({'_id': 'abc', 'v': 1}) == {'code': 'abc', 'v': 1}
+        assert ExampleExportedCodeDocument.compiled_validator().errors(transform({'_id': 'abc', 'v': 1})) == []
+
+
+class TestValidateCommand:
+    def test_validate(self, ndjson_file, capsys):
+        assert main(['validate', 'test_json_schema.ExampleRequiredDocument', str(ndjson_file)]) == 1
+        out = capsys.readouterr().out
+        assert "line 3: required_field: 1 is not of type 'string'" in out
+        assert 'line 4: <root>: Invalid JSON' in out
+        assert '4 lines, 2 invalid' in out
+
+    def test_validate_valid(self, tmp_path, capsys):
+        path = tmp_path / 'records.ndjson'
+        path.write_bytes(b'{}\n')
+        assert main(['validate', '--non-strict', 'test_json_schema.ExampleRequiredDocument', str(path)]) == 0
+
+    def test_max_errors(self, ndjson_file, capsys):
+        main(['validate', '--max-errors', '1', 'test_json_schema.ExampleRequiredDocument', str(ndjson_file)])
+        out = capsys.readouterr().out
+        assert 'line 3:' in out
+        assert 'line 4:' not in out
+        assert '2 invalid' in out